@@ -14,7 +14,9 @@ from .menu import (
 from .news_cache import (
     NewsCacheEntry,
     NewsCacheManager,
-    get_news_cache_manager
+    NewsQueryCache,
+    get_news_cache_manager,
+    get_news_query_cache
 )
 
 __all__ = [
@@ -24,5 +26,7 @@ __all__ = [
     'create_simple_menu',
     'NewsCacheEntry',
     'NewsCacheManager',
-    'get_news_cache_manager'
+    'NewsQueryCache',
+    'get_news_cache_manager',
+    'get_news_query_cache'
 ]
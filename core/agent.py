@@ -23,6 +23,7 @@ from skills.date_calculator import DateCalculatorSkill
 from skills.cache import CacheSkill
 from skills.lunar_calendar import LunarCalendarSkill
 from skills.menu import MenuSkill
+from skills.unified_search import UnifiedSearchSkill
 from core.session import SessionManager
 from core.paths import paths
 
@@ -398,20 +399,25 @@ class Agent:
         self.skill_manager.register_skill(ThinkingToggleSkill())
         self.skill_manager.register_skill(WeatherSkill())
         self.skill_manager.register_skill(FileSystemSkill())
-        self.skill_manager.register_skill(EmailSkill())
+        email_skill = EmailSkill()
+        self.skill_manager.register_skill(email_skill)
         # self.skill_manager.register_skill(ProgrammingSkill())
         # self.skill_manager.register_skill(SetupWizardSkill())
         # self.skill_manager.register_skill(MapSkill())
         self.skill_manager.register_skill(SystemSkill())
-        self.skill_manager.register_skill(MemorySkill())
-        self.skill_manager.register_skill(BookmarkSkill())
+        memory_skill = MemorySkill()
+        self.skill_manager.register_skill(memory_skill)
+        bookmark_skill = BookmarkSkill()
+        self.skill_manager.register_skill(bookmark_skill)
         self.skill_manager.register_skill(NewsSkill())
         self.skill_manager.register_skill(ProfileSkill())
         self.skill_manager.register_skill(GitSkill())
         self.skill_manager.register_skill(DateCalculatorSkill())
-        self.skill_manager.register_skill(CacheSkill())
+        cache_skill = CacheSkill()
+        self.skill_manager.register_skill(cache_skill)
         self.skill_manager.register_skill(LunarCalendarSkill())
         self.skill_manager.register_skill(MenuSkill())
+        self.skill_manager.register_skill(UnifiedSearchSkill([memory_skill, bookmark_skill, cache_skill, email_skill]))
         # self.skill_manager.register_skill(ChatSkill()) # Fallback / General Skill
 
     def _init_langchain_agent(self):
@@ -489,6 +495,8 @@ class Agent:
 
 News items by number: use check_news_cache then read_news_item.
 
+Saved personal info (notes, bookmarks, cache, emails): use search_everything once instead of each search tool.
+
 Chinese calendar: use get_lunar_date tool only.
 
 Multi-select: use select_from_menu with comma-separated options for arrow-key selection."""
@@ -0,0 +1,382 @@
+"""
+Cache Eviction
+
+TTL and size-bounded eviction for the content cache. Policies are configured per
+content_type (max age, max item count, max bytes) and applied LRU or LFU using
+access times recorded on reads and search hits. Every limit is off (0) until set
+with set_policy, and the background sweep only runs once one is.
+
+Each sweep deletes at most a bounded batch of items and does work proportional
+to that batch: per content type the evictor keeps running totals and heaps
+ordered by timestamp and by last access (or hit count), updated from keyword
+index changes and reads, instead of rescanning every item.
+"""
+
+import os
+import json
+import time
+import heapq
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Nothing is evicted until a limit is configured (0 = no limit)
+DEFAULT_POLICIES: Dict[str, Dict[str, Any]] = {
+    "default": {"max_age_days": 0, "max_items": 0, "max_bytes": 0, "strategy": "lru"},
+}
+
+STRATEGIES = ("lru", "lfu")
+
+
+class AccessTracker:
+    """Records last-access time and hit count per cached item, persisted lazily."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._access: Dict[str, Dict[str, float]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._access = json.load(f)
+            except Exception:
+                self._access = {}
+
+    def touch(self, doc_ids: List[str]):
+        """Record a read of the given items."""
+        now = time.time()
+        with self._lock:
+            for doc_id in doc_ids:
+                entry = self._access.setdefault(doc_id, {"last_access": now, "hits": 0})
+                entry["last_access"] = now
+                entry["hits"] += 1
+            self._dirty = True
+
+    def get(self, doc_id: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._access.get(doc_id, {}))
+
+    def forget(self, doc_ids: List[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                if self._access.pop(doc_id, None) is not None:
+                    self._dirty = True
+
+    def flush(self):
+        """Write access records to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._access)
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Failed to save cache access log: {e}")
+
+
+class CacheEvictor:
+    """
+    Applies per-content_type eviction policies to a cache collection.
+
+    Item metadata and sizes come from the collection's keyword index (one pass
+    when tracking starts, then its change notifications), so a sweep never scans
+    the vector store or the whole index.
+    """
+
+    def __init__(
+        self,
+        keyword_index,
+        delete_fn: Callable[[List[str]], None],
+        policy_file: str,
+        access_file: str,
+        interval: float = 300.0,
+        batch_size: int = 200
+    ):
+        self.keyword_index = keyword_index
+        self.delete_fn = delete_fn
+        self.policy_file = policy_file
+        self.tracker = AccessTracker(access_file)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.policies = self._load_policies()
+        self.stats: Dict[str, Any] = {
+            "sweeps": 0,
+            "evicted_age": 0,
+            "evicted_count": 0,
+            "evicted_bytes": 0,
+            "bytes_freed": 0,
+            "by_type": {},
+            "last_sweep": None,
+            "last_sweep_ms": 0.0,
+        }
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._sweep_lock = threading.Lock()
+
+        # Per-item state and per-type totals/heaps, filled from the keyword index on first use.
+        # Heap entries are not removed when an item changes; stale ones are skipped when popped.
+        self._track_lock = threading.Lock()
+        self._tracking = False
+        self._state_lock = threading.Lock()
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._by_age: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_use: Dict[str, List[Tuple[tuple, str]]] = {}
+
+    def _load_policies(self) -> Dict[str, Dict[str, Any]]:
+        policies = {k: dict(v) for k, v in DEFAULT_POLICIES.items()}
+        if os.path.exists(self.policy_file):
+            try:
+                with open(self.policy_file, "r") as f:
+                    for content_type, policy in json.load(f).items():
+                        policies.setdefault(content_type, dict(policies["default"])).update(policy)
+            except Exception as e:
+                print(f"Warning: Failed to load cache eviction policies: {e}")
+        return policies
+
+    def _save_policies(self):
+        with open(self.policy_file, "w") as f:
+            json.dump(self.policies, f, indent=2)
+
+    @property
+    def enabled(self) -> bool:
+        """True if any policy sets a limit."""
+        return any(
+            policy.get("max_age_days") or policy.get("max_items") or policy.get("max_bytes")
+            for policy in self.policies.values()
+        )
+
+    def get_policy(self, content_type: str) -> Dict[str, Any]:
+        return self.policies.get(content_type) or self.policies["default"]
+
+    def set_policy(self, content_type: str, **limits) -> Dict[str, Any]:
+        """Update the policy for a content type; None values leave a limit unchanged, 0 disables it."""
+        content_type = content_type or "default"
+        policy = self.policies.setdefault(content_type, dict(self.policies["default"]))
+        for key, value in limits.items():
+            if value is None:
+                continue
+            if key == "strategy" and value not in STRATEGIES:
+                raise ValueError(f"Unknown strategy '{value}'. Use one of: {', '.join(STRATEGIES)}.")
+            policy[key] = value
+        self._save_policies()
+        if limits.get("strategy") is not None:
+            # The usage order of every type following this policy changes
+            with self._state_lock:
+                for tracked_type in list(self._totals):
+                    self._rebuild_use_heap(tracked_type)
+        return policy
+
+    def _ensure_tracking(self):
+        with self._track_lock:
+            if self._tracking:
+                return
+            self._tracking = True
+        # Replays every indexed document once, then reports each change
+        self.keyword_index.add_listener(self._on_index_change)
+
+    def _use_key(self, doc_id: str, item: Dict[str, Any]) -> tuple:
+        """Eviction order within a type: oldest access first (LRU) or fewest hits first (LFU)."""
+        access = self.tracker.get(doc_id)
+        last_access = access.get("last_access") or item["created"]
+        if self.get_policy(item["type"]).get("strategy") == "lfu":
+            return (access.get("hits", 0), last_access)
+        return (last_access,)
+
+    def _on_index_change(self, upserts: List[Tuple[str, str, Dict[str, Any]]], removed: List[str]):
+        with self._state_lock:
+            for doc_id in removed:
+                self._drop(doc_id)
+            for doc_id, text, metadata in upserts:
+                self._drop(doc_id)
+                metadata = metadata or {}
+                timestamp = metadata.get("timestamp", "")
+                try:
+                    created = datetime.fromisoformat(timestamp).timestamp()
+                except (TypeError, ValueError):
+                    created = 0.0
+                item = {
+                    "type": metadata.get("content_type", "general"),
+                    "size": len((text or "").encode("utf-8")),
+                    "timestamp": timestamp,
+                    "created": created,
+                }
+                item["key"] = self._use_key(doc_id, item)
+                self._items[doc_id] = item
+                totals = self._totals.setdefault(item["type"], {"items": 0, "bytes": 0})
+                totals["items"] += 1
+                totals["bytes"] += item["size"]
+                if timestamp:
+                    self._push(self._by_age, item["type"], (timestamp, doc_id))
+                self._push(self._by_use, item["type"], (item["key"], doc_id))
+
+    def _drop(self, doc_id: str):
+        item = self._items.pop(doc_id, None)
+        if item is None:
+            return
+        totals = self._totals[item["type"]]
+        totals["items"] -= 1
+        totals["bytes"] -= item["size"]
+        if not totals["items"]:
+            del self._totals[item["type"]]
+            self._by_age.pop(item["type"], None)
+            self._by_use.pop(item["type"], None)
+
+    def _push(self, heaps: Dict[str, list], content_type: str, entry: tuple):
+        heap = heaps.setdefault(content_type, [])
+        heapq.heappush(heap, entry)
+        # Stale entries pile up as items are read or replaced; drop them once they dominate
+        if len(heap) > 2 * self._totals.get(content_type, {}).get("items", 0) + 64:
+            if heaps is self._by_use:
+                self._rebuild_use_heap(content_type)
+            else:
+                heaps[content_type] = [
+                    (item["timestamp"], doc_id) for doc_id, item in self._items.items()
+                    if item["type"] == content_type and item["timestamp"]
+                ]
+                heapq.heapify(heaps[content_type])
+
+    def _rebuild_use_heap(self, content_type: str):
+        heap = []
+        for doc_id, item in self._items.items():
+            if item["type"] == content_type:
+                item["key"] = self._use_key(doc_id, item)
+                heap.append((item["key"], doc_id))
+        heapq.heapify(heap)
+        self._by_use[content_type] = heap
+
+    def touch(self, doc_ids: List[str]):
+        """Record a read of the given items."""
+        self.tracker.touch(doc_ids)
+        if not self._tracking:
+            return
+        with self._state_lock:
+            for doc_id in doc_ids:
+                item = self._items.get(doc_id)
+                if item is None:
+                    continue
+                item["key"] = self._use_key(doc_id, item)
+                self._push(self._by_use, item["type"], (item["key"], doc_id))
+
+    def _select(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Pop up to `limit` items that violate their policy, expired items first."""
+        victims: List[Dict[str, Any]] = []
+        chosen = set()
+
+        def take(doc_id: str, reason: str):
+            item = self._items[doc_id]
+            chosen.add(doc_id)
+            victims.append({"id": doc_id, "type": item["type"], "size": item["size"], "reason": reason})
+
+        with self._state_lock:
+            for content_type in list(self._totals):
+                policy = self.get_policy(content_type)
+                max_age = policy.get("max_age_days") or 0
+                heap = self._by_age.get(content_type, [])
+                if max_age:
+                    cutoff = datetime.fromtimestamp(now - max_age * 86400).isoformat()
+                    while heap and heap[0][0] < cutoff and len(victims) < limit:
+                        timestamp, doc_id = heapq.heappop(heap)
+                        item = self._items.get(doc_id)
+                        if item is not None and item["timestamp"] == timestamp and doc_id not in chosen:
+                            take(doc_id, "age")
+
+            for content_type, totals in list(self._totals.items()):
+                policy = self.get_policy(content_type)
+                max_items = policy.get("max_items") or 0
+                max_bytes = policy.get("max_bytes") or 0
+                if not max_items and not max_bytes:
+                    continue
+                expired = [v for v in victims if v["type"] == content_type]
+                count = totals["items"] - len(expired)
+                total_bytes = totals["bytes"] - sum(v["size"] for v in expired)
+                heap = self._by_use.get(content_type, [])
+                while heap and len(victims) < limit:
+                    if max_items and count > max_items:
+                        reason = "count"
+                    elif max_bytes and total_bytes > max_bytes:
+                        reason = "bytes"
+                    else:
+                        break
+                    key, doc_id = heapq.heappop(heap)
+                    item = self._items.get(doc_id)
+                    if item is None or item["key"] != key or doc_id in chosen:
+                        continue
+                    take(doc_id, reason)
+                    count -= 1
+                    total_bytes -= item["size"]
+        return victims
+
+    def _restore(self, victims: List[Dict[str, Any]]):
+        """Put back popped items whose deletion failed, so a later sweep retries them."""
+        with self._state_lock:
+            for victim in victims:
+                item = self._items.get(victim["id"])
+                if item is None:
+                    continue
+                if item["timestamp"]:
+                    self._push(self._by_age, item["type"], (item["timestamp"], victim["id"]))
+                self._push(self._by_use, item["type"], (item["key"], victim["id"]))
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Evict up to `limit` items (default: batch_size). Returns the number evicted."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            start = time.time()
+            self._ensure_tracking()
+            victims = self._select(start, limit or self.batch_size) if self.enabled else []
+            if victims:
+                ids = [v["id"] for v in victims]
+                try:
+                    self.delete_fn(ids)
+                except Exception:
+                    self._restore(victims)
+                    raise
+                self.tracker.forget(ids)
+                for victim in victims:
+                    self.stats[f"evicted_{victim['reason']}"] += 1
+                    self.stats["bytes_freed"] += victim["size"]
+                    self.stats["by_type"][victim["type"]] = self.stats["by_type"].get(victim["type"], 0) + 1
+            self.tracker.flush()
+            self.stats["sweeps"] += 1
+            self.stats["last_sweep"] = datetime.now().isoformat()
+            self.stats["last_sweep_ms"] = (time.time() - start) * 1000
+            return len(victims)
+        finally:
+            self._sweep_lock.release()
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """Current item count and bytes per content type."""
+        self._ensure_tracking()
+        with self._state_lock:
+            return {content_type: dict(totals) for content_type, totals in self._totals.items()}
+
+    def _run(self):
+        # Short delay so startup is not slowed down by the first sweep
+        if self._stop.wait(5):
+            return
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Warning: Cache eviction sweep failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Start the background sweep thread once a policy sets a limit (idempotent)."""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-eviction", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.tracker.flush()
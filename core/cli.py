@@ -50,6 +50,11 @@ class SkillCommandCompleter(Completer):
             ("config set", "Set a configuration value"),
             ("backup", "Backup user data to a zip file"),
             ("restore", "Restore user data from a zip file"),
+            ("dedupe", "Remove duplicate notes, bookmarks and cached items"),
+            ("vectors", "Show vector store statistics"),
+            ("vectors rebuild", "Rebuild/compact a collection (M= ef= ef_construction=)"),
+            ("vectors tune", "Change a collection's HNSW ef_search (ef=)"),
+            ("vectors verify", "Check a collection for missing embeddings (add 'repair' to fix)"),
             ("provider", "Switch LLM provider (openai/ollama/llama/deepseek)"),
             ("news", "Open interactive news browser (if news was searched)"),
             ("news cached", "Browse saved news searches"),
@@ -268,6 +273,8 @@ def interactive_news_menu(news_items: list, query: str = "") -> dict:
             date = item.get('date', '')
 
             display_title = truncate_text(title, 55)
+            if item.get('similar'):
+                display_title += f" (+{len(item['similar'])})"
             prefix = " > " if i == selected_index else "   "
 
             if i == selected_index:
@@ -300,6 +307,22 @@ def interactive_news_menu(news_items: list, query: str = "") -> dict:
             result.append(("dim", f" | {date}"))
         result.append(("", "\n\n"))
         result.append(("", f"{body}\n\n"))
+        if item.get('similar'):
+            sources = sorted({s.get('source') for s in item['similar'] if s.get('source')})
+            result.append(("dim", f"Also reported by: {', '.join(sources) or 'other sources'}\n\n"))
+        # Article text downloaded in the background after the search, if available
+        try:
+            from core.news_cache import get_news_cache_manager
+            article = get_news_cache_manager().get_article(url) if url.startswith("http") else None
+        except Exception:
+            article = None
+        if article and article["text"]:
+            text = article["text"]
+            if len(text) > 3000:
+                text = text[:3000].rsplit(" ", 1)[0] + " ..."
+            result.append(("", f"{text}\n\n"))
+        elif url.startswith("http"):
+            result.append(("dim", "(Article text not downloaded yet)\n\n"))
         result.append(("cyan", f"Link: {url}\n\n"))
         result.append(("dim", "[b] Back  [o] Open in Browser  [Esc] Quit"))
         return to_formatted_text(result)
@@ -464,6 +487,144 @@ def handle_restore_command(command_parts):
     except Exception as e:
         console.print(f"[bold red]Restore failed:[/bold red] {e}")
 
+def handle_dedupe_command(agent):
+    """One-off pass collapsing duplicate documents in every vector-backed skill."""
+    found = False
+    for skill in agent.skill_manager.skills:
+        if not hasattr(skill, "dedupe"):
+            continue
+        found = True
+        try:
+            console.print(f"[dim]Deduplicating {skill.name}...[/dim]")
+            stats = skill.dedupe()
+            if not stats:
+                console.print(f"[yellow]{skill.name}: store not initialized, skipped.[/yellow]")
+                continue
+            console.print(
+                f"[green]{skill.name}:[/green] scanned {stats['scanned']}, "
+                f"removed {stats['removed']} duplicate(s), re-keyed {stats['rekeyed']}."
+            )
+        except Exception as e:
+            console.print(f"[red]{skill.name}: dedupe failed: {e}[/red]")
+
+    if not found:
+        console.print("[yellow]No vector-backed skills are loaded.[/yellow]")
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+
+
+def handle_vectors_command(command_parts):
+    """
+    /vectors                                   statistics for every collection
+    /vectors rebuild <name> [M=] [ef=] [ef_construction=]
+    /vectors tune <name> ef=<n>
+    /vectors verify <name|all> [repair]
+    """
+    from core.vector_maintenance import all_stats, rebuild_collection, tune_collection, verify_collection
+    from core.vector_store import registered_stores
+
+    action = command_parts[1].lower() if len(command_parts) > 1 else "stats"
+
+    if action == "stats":
+        for stats in all_stats():
+            if "error" in stats:
+                console.print(f"[red]{stats['name']}: {stats['error']}[/red]")
+                continue
+            if not stats["initialized"]:
+                console.print(f"[yellow]{stats['name']}: not initialized[/yellow] ({_format_bytes(stats['disk_bytes'])} on disk)")
+                continue
+            latency = stats["latency_ms"]
+            latency_text = (
+                f"p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms ({latency['samples']} queries)"
+                if latency["samples"] else "no queries yet"
+            )
+            hnsw = stats["hnsw"]
+            console.print(f"[bold cyan]{stats['name']}[/bold cyan]")
+            console.print(f"  Items: {stats['count']}" + (
+                f" (keyword index: {stats['keyword_index']})" if stats["keyword_index"] is not None else ""
+            ))
+            console.print(f"  Disk: {_format_bytes(stats['disk_bytes'])}")
+            console.print(f"  Latency: {latency_text}")
+            console.print(
+                f"  HNSW: space={hnsw.get('space') or 'default'}, M={hnsw.get('M') or 'default'}, "
+                f"ef_construction={hnsw.get('ef_construction') or 'default'}, ef_search={hnsw.get('ef_search') or 'default'}"
+            )
+        return
+
+    if action not in ("rebuild", "tune", "verify") or len(command_parts) < 3:
+        console.print(handle_vectors_command.__doc__)
+        return
+
+    name = command_parts[2]
+    options = {}
+    for part in command_parts[3:]:
+        if "=" in part:
+            key, value = part.split("=", 1)
+            key = {"m": "M", "ef": "ef_search", "ef_search": "ef_search", "ef_construction": "ef_construction"}.get(key.lower())
+            if key is None or not value.isdigit():
+                console.print(f"[red]Invalid option: {part}[/red]")
+                return
+            options[key] = int(value)
+
+    try:
+        if action == "verify":
+            repair = "repair" in [p.lower() for p in command_parts[3:]]
+            names = sorted(registered_stores()) if name.lower() == "all" else [name]
+            for store_name in names:
+                try:
+                    result = verify_collection(store_name, repair=repair)
+                except RuntimeError as e:
+                    console.print(f"[yellow]{store_name}: {e}[/yellow]")
+                    continue
+                status = "[green]OK[/green]" if result["ok"] else "[red]Problems found[/red]"
+                console.print(f"{store_name}: {status} ({result['count']} items, dimension {result['dimension']})")
+                if not result["ok"]:
+                    console.print(
+                        f"  Missing embeddings: {result['missing_embedding']}, missing documents: {result['missing_document']}, "
+                        f"wrong dimension: {result['wrong_dimension']}, keyword index missing/stale: "
+                        f"{result['keyword_index_missing']}/{result['keyword_index_stale']}"
+                    )
+                    if repair:
+                        console.print(f"  [green]Re-embedded {result['repaired']}, deleted {result['deleted']}, keyword index resynced.[/green]")
+                    else:
+                        console.print(f"  Run [bold]/vectors verify {store_name} repair[/bold] to fix.")
+            return
+
+        if action == "tune":
+            if "ef_search" not in options and "M" not in options and "ef_construction" not in options:
+                console.print("Usage: /vectors tune <name> ef=<n>")
+                return
+            console.print(f"[dim]Tuning {name}...[/dim]")
+            result = tune_collection(name, **options)
+        else:
+            console.print(f"[dim]Rebuilding {name}...[/dim]")
+            result = rebuild_collection(name, **options)
+
+        hnsw = result["hnsw"]
+        console.print(
+            f"[green]{name}:[/green] M={hnsw.get('M') or 'default'}, ef_construction={hnsw.get('ef_construction') or 'default'}, "
+            f"ef_search={hnsw.get('ef_search') or 'default'}"
+        )
+        if result.get("rebuilt", action == "rebuild"):
+            console.print(
+                f"  Rebuilt {result['count']} items in {result['seconds']:.1f}s, disk "
+                f"{_format_bytes(result['disk_bytes_before'])} -> {_format_bytes(result['disk_bytes_after'])}"
+            )
+    except KeyError as e:
+        console.print(f"[red]{e.args[0]}[/red]")
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+    except Exception as e:
+        console.print(f"[red]Vector maintenance failed: {e}[/red]")
+
+
 def get_config_schema(agent=None):
     """
     Define the configuration schema with types, descriptions, and options.
@@ -506,6 +667,25 @@ def get_config_schema(agent=None):
         "description": "Enable markdown rendering"
     })
 
+    # Embedding storage (email archive and content cache)
+    schema.append({
+        "key": "EMBEDDING_DIMENSIONS",
+        "type": "choice",
+        "default": "1536",
+        "options": ["1536", "1024", "512", "256"],
+        "category": "Embeddings",
+        "description": "Vector size for emails and cache; smaller uses text-embedding-3-small and re-embeds once"
+    })
+
+    schema.append({
+        "key": "EMBEDDING_QUANTIZATION",
+        "type": "choice",
+        "default": "none",
+        "options": ["none", "float16", "int8"],
+        "category": "Embeddings",
+        "description": "Optional extra int8/float16 copy of the vectors, scanned linearly instead of HNSW and re-ranked on full precision; adds memory and disk"
+    })
+
     # API Keys
     schema.append({
         "key": "OPENAI_API_KEY",
@@ -1244,6 +1424,14 @@ def main():
                 handle_restore_command(user_input.split())
                 continue
 
+            if user_input.lower().startswith("dedupe"):
+                handle_dedupe_command(agent)
+                continue
+
+            if user_input.lower().startswith("vectors"):
+                handle_vectors_command(user_input.split())
+                continue
+
             if user_input.startswith("news"):
                 try:
                     from skills.news import NewsSkill
@@ -1255,7 +1443,10 @@ def main():
                     if len(parts) > 1 and parts[1].lower() in ["cached", "history", "saved"]:
                         # Browse cached news searches
                         cache_mgr = get_news_cache_manager()
-                        searches = cache_mgr.get_all_searches()
+                        # Summaries only, a page at a time; news items load when a search is opened
+                        page_size = 50
+                        searches = cache_mgr.list_searches(0, page_size)
+                        total_searches = cache_mgr.count_searches()
 
                         if not searches:
                             console.print("[yellow]No cached news searches found. Search for news first![/yellow]")
@@ -1264,22 +1455,19 @@ def main():
                         # Create menu for cached searches
                         from core.menu import InteractiveMenu, MenuItem, MenuAction
 
-                        # Convert to menu items
-                        menu_items = []
-                        for entry in searches:
-                            menu_item = MenuItem(
+                        def search_menu_item(entry):
+                            return MenuItem(
                                 title=entry.query,
-                                subtitle=entry.timestamp[:16].replace("T", " "),
+                                subtitle=entry.timestamp[:16].replace("T", " ") + (" 📌" if entry.pinned else ""),
                                 data=entry,
-                                detail=f"Query: {entry.query}\nDate: {entry.timestamp}\nItems: {len(entry.news_items)} articles"
+                                detail=f"Query: {entry.query}\nDate: {entry.timestamp}\nItems: {entry.item_count} articles"
                             )
-                            menu_items.append(menu_item)
 
                         # Create menu
                         cache_menu = InteractiveMenu(
                             title="📰 Saved News Searches",
-                            subtitle="Select a search to load",
-                            items=menu_items,
+                            subtitle=f"Select a search to load ({total_searches} saved)",
+                            items=[search_menu_item(entry) for entry in searches],
                             stay_open=True
                         )
 
@@ -1326,6 +1514,19 @@ def main():
                             modes=["list", "detail"]
                         ))
 
+                        # Add "More" action: append the next page of older searches
+                        def more_searches_action(item: MenuItem, index: int):
+                            more = cache_mgr.list_searches(len(cache_menu.items), page_size)
+                            cache_menu.items.extend(search_menu_item(entry) for entry in more)
+
+                        if total_searches > page_size:
+                            cache_menu.add_action(MenuAction(
+                                key="m",
+                                label="More",
+                                callback=more_searches_action,
+                                modes=["list"]
+                            ))
+
                         # Run the menu
                         cache_menu.run()
                         continue
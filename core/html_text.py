@@ -0,0 +1,93 @@
+"""
+HTML to Text
+
+Converts HTML (email bodies, fetched articles) into compact readable text:
+scripts, styles and other non-content elements are dropped, block elements
+become line breaks, entities are decoded and whitespace is collapsed.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# Elements whose content is never readable text
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template", "svg", "iframe", "object"}
+# Elements that start a new line in the output
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul"
+}
+# Page furniture around an article's text, dropped with skip_boilerplate
+_BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "button", "menu", "dialog"}
+_SPACES_RE = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+
+class _TextExtractor(HTMLParser):
+
+    def __init__(self, max_chars: Optional[int] = None, skip_tags=_SKIP_TAGS):
+        super().__init__(convert_charrefs=True)
+        self.skip_tags = skip_tags
+        self.parts: List[str] = []
+        self.length = 0
+        self.max_chars = max_chars
+        self._skip_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skip_tags:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in ("td", "th"):
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.skip_tags:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        self.parts.append(data)
+        self.length += len(data)
+        if self.max_chars is not None and self.length >= self.max_chars * 2:
+            # Plenty of raw text collected; whitespace collapsing only shrinks it
+            self.done = True
+
+
+def html_to_text(html: str, max_chars: Optional[int] = None, skip_boilerplate: bool = False) -> str:
+    """
+    Convert HTML to compact plain text.
+
+    Args:
+        html: The HTML document or fragment.
+        max_chars: Optional cap on the returned text length.
+        skip_boilerplate: Also drop navigation, headers, footers, sidebars and forms
+            (for web pages, where they surround the actual article).
+
+    Returns:
+        Readable text with one paragraph per line.
+    """
+    if not html:
+        return ""
+    parser = _TextExtractor(max_chars, _SKIP_TAGS | _BOILERPLATE_TAGS if skip_boilerplate else _SKIP_TAGS)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Malformed markup: keep whatever was extracted so far
+        pass
+
+    text = "".join(parser.parts)
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+    text = "\n".join(line for line in lines if line)
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0]
+    return text
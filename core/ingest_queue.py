@@ -0,0 +1,297 @@
+"""
+Ingest Queue
+
+Write-behind queue for vector store inserts. Tools append documents to a durable
+local journal and return immediately; a background worker batch-embeds and commits
+them to Chroma. Pending documents are indexed in the keyword index straight away,
+so searches still find them before their embeddings exist.
+
+A batch that fails is moved behind the rest of the queue and its documents are
+retried one at a time, so a single bad document cannot hold up the others; after
+MAX_ATTEMPTS failures a document is set aside as failed.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import List, Dict, Any, Optional, Callable
+
+from langchain_core.documents import Document
+from core.vector_store import upsert_documents, delete_documents
+
+# Failed commits of one document before it is set aside
+MAX_ATTEMPTS = 8
+
+
+class IngestQueue:
+    """Durable, batched write-behind queue for one vector collection."""
+
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_name: str,
+        get_vectorstore: Callable[[], Any],
+        keyword_index=None,
+        batch_size: int = 32,
+        max_delay: float = 1.0,
+        compact_after: int = 1000
+    ):
+        self.journal_path = os.path.join(persist_directory, f"{collection_name}_ingest.jsonl")
+        self.get_vectorstore = get_vectorstore
+        self.keyword_index = keyword_index
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.compact_after = compact_after
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._failed: Dict[str, Dict[str, Any]] = {}
+        # Ids of the batch being committed, and those of them discarded meanwhile
+        self._inflight: set = set()
+        self._tombstones: set = set()
+        self._journal_lines = 0
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"enqueued": 0, "committed": 0, "skipped": 0, "failures": 0, "dead_lettered": 0, "last_error": None}
+
+        self._replay()
+
+    def _replay(self):
+        """Recover documents that were journaled but never committed."""
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    self._journal_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    op = record.get("op")
+                    if op == "add":
+                        self._pending[record["id"]] = record
+                        self._failed.pop(record["id"], None)
+                    elif op == "done":
+                        for doc_id in record.get("ids", []):
+                            self._pending.pop(doc_id, None)
+                            self._failed.pop(doc_id, None)
+                    elif op == "failed":
+                        failed = self._pending.pop(record["id"], None)
+                        if failed is not None:
+                            self._failed[record["id"]] = dict(failed, last_error=record.get("error"))
+        except Exception as e:
+            print(f"Warning: Failed to replay ingest journal {self.journal_path}: {e}")
+
+        if self.keyword_index is not None and self._pending:
+            self.keyword_index.add_many(
+                [(r["id"], r["text"], r["metadata"]) for r in self._pending.values() if r["id"] not in self.keyword_index]
+            )
+
+    def _append(self, records: List[Dict[str, Any]]):
+        """Append records to the journal and fsync before returning."""
+        with open(self.journal_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(records)
+
+    def _compact(self):
+        """Rewrite the journal with only the still-pending and failed documents."""
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for record in self._failed.values():
+                f.write(json.dumps(dict(record, op="add")) + "\n")
+                f.write(json.dumps({"op": "failed", "id": record["id"], "error": record.get("last_error")}) + "\n")
+            for record in self._pending.values():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._journal_lines = len(self._pending) + 2 * len(self._failed)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._pending
+
+    def pending_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._pending.keys())
+
+    def enqueue(self, documents: List[Document], ids: List[str], overwrite: bool = True):
+        """Durably queue documents for embedding; they become keyword-searchable immediately."""
+        records = [
+            {"op": "add", "id": doc_id, "text": doc.page_content, "metadata": doc.metadata, "overwrite": overwrite}
+            for doc_id, doc in zip(ids, documents)
+        ]
+        with self._lock:
+            self._append(records)
+            for record in records:
+                self._pending[record["id"]] = record
+                self._failed.pop(record["id"], None)
+            self.stats["enqueued"] += len(records)
+            self._wakeup.notify()
+
+        if self.keyword_index is not None:
+            self.keyword_index.add_many([(r["id"], r["text"], r["metadata"]) for r in records])
+        self.start()
+
+    def discard(self, ids: List[str]):
+        """
+        Drop queued documents (e.g. deleted before they were committed). Documents
+        of the batch being committed are removed from the vector store once the
+        commit finishes, so a delete racing the worker does not bring them back.
+        """
+        with self._lock:
+            dropped = [
+                doc_id for doc_id in ids
+                if (self._pending.pop(doc_id, None) or self._failed.pop(doc_id, None)) is not None
+            ]
+            self._tombstones.update(doc_id for doc_id in ids if doc_id in self._inflight)
+            if dropped:
+                self._append([{"op": "done", "ids": dropped}])
+
+    def pending(self) -> List[Document]:
+        """Documents queued but not yet committed to the vector store."""
+        with self._lock:
+            return [Document(id=r["id"], page_content=r["text"], metadata=dict(r["metadata"])) for r in self._pending.values()]
+
+    def failed(self) -> List[Document]:
+        """Documents set aside after MAX_ATTEMPTS failed commits."""
+        with self._lock:
+            return [Document(id=r["id"], page_content=r["text"], metadata=dict(r["metadata"])) for r in self._failed.values()]
+
+    def retry_failed(self) -> int:
+        """Queue failed documents again. Returns how many were re-queued."""
+        with self._lock:
+            records = list(self._failed.values())
+        for overwrite in (True, False):
+            group = [r for r in records if r.get("overwrite", True) == overwrite]
+            if group:
+                self.enqueue(
+                    [Document(page_content=r["text"], metadata=r["metadata"]) for r in group],
+                    [r["id"] for r in group],
+                    overwrite=overwrite
+                )
+        return len(records)
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            coalesced = False
+            while True:
+                while not self._pending:
+                    self._wakeup.wait()
+                head = next(iter(self._pending.values()))
+                if head.get("attempts"):
+                    # Documents that failed before are retried alone, so one bad document
+                    # does not fail the rest of a batch again
+                    batch = [head]
+                    break
+                if len(self._pending) < self.batch_size and not coalesced:
+                    # Give bursts of inserts a moment to coalesce into one embedding request
+                    coalesced = True
+                    self._wakeup.wait(self.max_delay)
+                    continue
+                batch = [r for r in self._pending.values() if not r.get("attempts")][:self.batch_size]
+                break
+            self._inflight = {r["id"] for r in batch}
+            return batch
+
+    def _commit(self, batch: List[Dict[str, Any]]):
+        vectorstore = self.get_vectorstore()
+        written, skipped = [], []
+        try:
+            if vectorstore is None:
+                raise RuntimeError("Vector store not initialized.")
+            # Records with different overwrite semantics are upserted separately
+            for overwrite in (True, False):
+                group = [r for r in batch if r.get("overwrite", True) == overwrite]
+                if not group:
+                    continue
+                documents = [Document(page_content=r["text"], metadata=r["metadata"]) for r in group]
+                w, s = upsert_documents(vectorstore, documents, [r["id"] for r in group], overwrite=overwrite)
+                written.extend(w)
+                skipped.extend(s)
+        finally:
+            # Documents deleted while this batch was being written must not reappear
+            with self._lock:
+                discarded = list(self._tombstones)
+                self._tombstones.clear()
+                self._inflight = set()
+            if discarded and vectorstore is not None:
+                delete_documents(vectorstore, discarded)
+
+        with self._lock:
+            # Only clear entries that were not re-queued with new content meanwhile
+            ids = [r["id"] for r in batch if self._pending.get(r["id"]) is r]
+            for doc_id in ids:
+                del self._pending[doc_id]
+            if ids:
+                self._append([{"op": "done", "ids": ids}])
+            if not self._pending and self._journal_lines >= self.compact_after:
+                self._compact()
+            self.stats["committed"] += len(written)
+            self.stats["skipped"] += len(skipped)
+
+    def _fail(self, batch: List[Dict[str, Any]], error: str):
+        """Count a failed attempt for each record, moving them behind the rest of the queue."""
+        with self._lock:
+            dead = []
+            for record in batch:
+                # Skip records discarded or re-queued with new content meanwhile
+                if self._pending.get(record["id"]) is not record:
+                    continue
+                del self._pending[record["id"]]
+                record["attempts"] = record.get("attempts", 0) + 1
+                record["last_error"] = error
+                if record["attempts"] >= MAX_ATTEMPTS:
+                    self._failed[record["id"]] = record
+                    dead.append(record)
+                else:
+                    self._pending[record["id"]] = record
+            if dead:
+                self._append([{"op": "failed", "id": r["id"], "error": error} for r in dead])
+                self.stats["dead_lettered"] += len(dead)
+        for record in dead:
+            print(f"Warning: Giving up on queued document {record['id']} after {MAX_ATTEMPTS} attempts: {error}")
+        if dead and self.keyword_index is not None:
+            self.keyword_index.remove([r["id"] for r in dead])
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            batch = self._next_batch()
+            try:
+                self._commit(batch)
+                backoff = 1.0
+            except Exception as e:
+                self.stats["failures"] += 1
+                self.stats["last_error"] = str(e)
+                # An uninitialized store is not the documents' fault
+                if self.get_vectorstore() is not None:
+                    self._fail(batch, str(e)[:300])
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def start(self):
+        """Start the background worker (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=f"ingest-{os.path.basename(self.journal_path)}", daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until every queued document has been committed. Returns False on timeout."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self._pending:
+                    return True
+                self._wakeup.notify()
+            time.sleep(0.05)
+        return False
@@ -0,0 +1,373 @@
+"""
+Keyword Index
+
+A local BM25 inverted index kept alongside each vector collection, so exact-token
+queries (invoice numbers, URLs, names) can be answered without an embedding call,
+and hybrid searches can fuse keyword and vector hits by reciprocal-rank fusion.
+
+Indexed documents persist in SQLite, one row each, so adding or removing a
+document writes only that row; postings are rebuilt in memory on load.
+"""
+
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from langchain_core.documents import Document
+from core.vector_store import record_query
+
+# Plain words plus compound tokens such as "inv-2024-0012", "example.com/path" or "a@b.com"
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_COMPOUND_RE = re.compile(r"[^\W_]+(?:[._\-/@:][^\W_]+)+", re.UNICODE)
+
+SEARCH_MODES = ("hybrid", "keyword", "semantic")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, plus compound tokens for identifiers and URLs."""
+    if not text:
+        return []
+    text = text.lower()
+    tokens = _WORD_RE.findall(text)
+    tokens.extend(_COMPOUND_RE.findall(text))
+    return tokens
+
+
+def _matches(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Simple equality filter on metadata, mirroring the Chroma filters we use."""
+    if not where:
+        return True
+    return all(metadata.get(key) == value for key, value in where.items())
+
+
+def chroma_filter(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Convert a flat equality dict into a Chroma where clause."""
+    if not where:
+        return None
+    if len(where) == 1:
+        return dict(where)
+    return {"$and": [{key: value} for key, value in where.items()]}
+
+
+class KeywordIndex:
+    """BM25 index over the documents of one vector collection, persisted in SQLite."""
+
+    def __init__(self, persist_directory: str, collection_name: str, k1: float = 1.5, b: float = 0.75):
+        self.collection_name = collection_name
+        self.path = os.path.join(persist_directory, f"{collection_name}_keywords.db")
+        self._legacy_path = os.path.join(persist_directory, f"{collection_name}_keywords.json")
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._listeners: List[Callable[[List[Tuple[str, str, Dict[str, Any]]], List[str]], None]] = []
+        os.makedirs(persist_directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self._migrate_json()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def _migrate_json(self):
+        """Import the JSON index of older versions once, then set it aside."""
+        if not os.path.exists(self._legacy_path):
+            return
+        try:
+            with open(self._legacy_path, "r") as f:
+                docs = json.load(f).get("docs", {})
+            self._write(
+                [(doc_id, entry.get("text", ""), entry.get("metadata", {})) for doc_id, entry in docs.items()], []
+            )
+            os.replace(self._legacy_path, self._legacy_path + ".migrated")
+        except Exception as e:
+            print(f"Warning: Failed to migrate keyword index {self._legacy_path}: {e}")
+
+    def _load(self):
+        """Load indexed documents from disk and rebuild postings in memory."""
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT doc_id, text, metadata FROM docs").fetchall()
+            for doc_id, text, metadata in rows:
+                self._index(doc_id, text, json.loads(metadata))
+        except Exception as e:
+            print(f"Warning: Failed to load keyword index {self.path}: {e}")
+            self._docs = {}
+            self._postings = defaultdict(dict)
+            self._doc_lengths = {}
+            self._total_length = 0
+
+    def _write(self, upserts: List[Tuple[str, str, Dict[str, Any]]], deletes: List[str]):
+        """Write only the changed documents, in one transaction."""
+        try:
+            with self._lock, self._conn:
+                if deletes:
+                    self._conn.executemany("DELETE FROM docs WHERE doc_id = ?", [(doc_id,) for doc_id in deletes])
+                if upserts:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO docs VALUES (?, ?, ?)",
+                        [(doc_id, text or "", json.dumps(metadata or {})) for doc_id, text, metadata in upserts]
+                    )
+        except Exception as e:
+            print(f"Warning: Failed to save keyword index {self.path}: {e}")
+
+    def add_listener(self, callback: Callable[[List[Tuple[str, str, Dict[str, Any]]], List[str]], None]):
+        """
+        Call callback(upserted, removed) after every change, with the (id, text, metadata)
+        triples written and the ids removed. It is called once right away with every
+        indexed document, so the listener never misses a change in between.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            callback(self.items(), [])
+
+    def _notify(self, upserts: List[Tuple[str, str, Dict[str, Any]]], deletes: List[str]):
+        for callback in self._listeners:
+            try:
+                callback(upserts, deletes)
+            except Exception as e:
+                print(f"Warning: Keyword index listener failed: {e}")
+
+    def _index(self, doc_id: str, text: str, metadata: Dict[str, Any]):
+        if doc_id in self._docs:
+            self._unindex(doc_id)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings[term][doc_id] = tf
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        self._docs[doc_id] = {"text": text, "metadata": metadata or {}}
+
+    def _unindex(self, doc_id: str):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for term in set(tokenize(entry["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def add(self, doc_id: str, text: str, metadata: Dict[str, Any] = None):
+        """Index (or re-index) a single document."""
+        self.add_many([(doc_id, text, metadata)])
+
+    def add_many(self, items: List[Tuple[str, str, Dict[str, Any]]]):
+        """Index several (id, text, metadata) documents with a single write."""
+        if not items:
+            return
+        with self._lock:
+            for doc_id, text, metadata in items:
+                self._index(doc_id, text, metadata)
+            self._write(items, [])
+            self._notify(items, [])
+
+    def remove(self, doc_ids: List[str]):
+        """Remove documents from the index."""
+        with self._lock:
+            removed = [doc_id for doc_id in doc_ids if doc_id in self._docs]
+            for doc_id in removed:
+                self._unindex(doc_id)
+            if removed:
+                self._write([], removed)
+                self._notify([], removed)
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        """Return an indexed document by id, without touching the vector store."""
+        entry = self._docs.get(doc_id)
+        if entry is None:
+            return None
+        return Document(id=doc_id, page_content=entry["text"], metadata=dict(entry["metadata"]))
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._docs.keys())
+
+    def items(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Snapshot of all indexed (id, text, metadata) triples."""
+        with self._lock:
+            return [(doc_id, entry["text"], entry["metadata"]) for doc_id, entry in self._docs.items()]
+
+    def search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Return up to k (doc_id, bm25_score) pairs, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+            if where:
+                scores = {d: s for d, s in scores.items() if _matches(self._docs[d]["metadata"], where)}
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def sync(self, collection, keep: Optional[List[str]] = None):
+        """
+        Reconcile the index with a Chroma collection.
+        Indexes documents missing from the index and drops ids the collection no longer has,
+        except those in `keep` (e.g. documents still waiting in an ingest queue).
+        """
+        try:
+            collection_ids = set(collection.get(include=[]).get("ids", []))
+        except Exception as e:
+            print(f"Warning: Failed to sync keyword index: {e}")
+            return
+
+        with self._lock:
+            indexed_ids = set(self._docs.keys())
+            missing = list(collection_ids - indexed_ids)
+            stale = indexed_ids - collection_ids - set(keep or [])
+
+            for doc_id in stale:
+                self._unindex(doc_id)
+
+            added = []
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                data = collection.get(ids=batch, include=["documents", "metadatas"])
+                for doc_id, text, meta in zip(data.get("ids", []), data.get("documents", []), data.get("metadatas", [])):
+                    self._index(doc_id, text or "", meta or {})
+                    added.append((doc_id, text or "", meta or {}))
+
+            if added or stale:
+                self._write(added, list(stale))
+                self._notify(added, list(stale))
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists into one, scoring each id by sum(1 / (k + rank))."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def hybrid_search(
+    vectorstore,
+    index: Optional[KeywordIndex],
+    query: str,
+    k: int = 5,
+    mode: str = "hybrid",
+    where: Optional[Dict[str, Any]] = None,
+    embedding: Optional[List[float]] = None,
+    quantized=None
+) -> List[Document]:
+    """
+    Search a collection by keyword, by vector similarity, or both fused with RRF.
+
+    Args:
+        vectorstore: The LangChain Chroma store (may be None in keyword mode).
+        index: The collection's KeywordIndex (may be None in semantic mode).
+        query: The search query.
+        k: Maximum number of results.
+        mode: "hybrid", "keyword" (no embedding call) or "semantic".
+        where: Optional flat metadata equality filter.
+        embedding: Optional precomputed query embedding, to avoid re-embedding the query.
+        quantized: Optional QuantizedIndex scanned instead of the HNSW query (unfiltered queries only).
+
+    Returns:
+        A list of Documents, best match first.
+    """
+    mode = (mode or "hybrid").lower()
+    if mode not in SEARCH_MODES:
+        mode = "hybrid"
+    if vectorstore is None:
+        mode = "keyword"
+    if index is None:
+        mode = "semantic"
+    if vectorstore is None and index is None:
+        return []
+
+    start = time.perf_counter()
+    name = index.collection_name if index is not None else vectorstore._collection.name
+    try:
+        return _hybrid_search(vectorstore, index, query, k, mode, where, embedding, quantized)
+    finally:
+        record_query(name, (time.perf_counter() - start) * 1000)
+
+
+def _hybrid_search(vectorstore, index, query, k, mode, where, embedding, quantized=None) -> List[Document]:
+    # Over-fetch on each side so fusion has something to work with
+    fetch_k = k if mode != "hybrid" else max(k * 3, 10)
+
+    keyword_hits: List[Tuple[str, float]] = []
+    if mode in ("hybrid", "keyword"):
+        keyword_hits = index.search(query, k=fetch_k, where=where)
+        if mode == "keyword":
+            return [index.get(doc_id) for doc_id, _ in keyword_hits if doc_id in index]
+
+    vector_docs: List[Document] = []
+    use_quantized = quantized is not None and not where
+    if use_quantized:
+        # Populates the copy on first use and applies writes made since the last search
+        quantized.refresh(vectorstore._collection)
+        use_quantized = len(quantized) > 0
+    if use_quantized:
+        if embedding is None:
+            embedding = vectorstore.embeddings.embed_query(query)
+        vector_docs = quantized.search(vectorstore._collection, embedding, k=fetch_k)
+    elif embedding is not None:
+        vector_docs = vectorstore.similarity_search_by_vector(embedding, k=fetch_k, filter=chroma_filter(where))
+    else:
+        vector_docs = vectorstore.similarity_search(query, k=fetch_k, filter=chroma_filter(where))
+
+    if mode == "semantic":
+        return vector_docs[:k]
+
+    by_id: Dict[str, Document] = {}
+    vector_ranking = []
+    for doc in vector_docs:
+        doc_id = doc.id or doc.page_content
+        by_id.setdefault(doc_id, doc)
+        vector_ranking.append(doc_id)
+
+    keyword_ranking = [doc_id for doc_id, _ in keyword_hits]
+    fused = reciprocal_rank_fusion([vector_ranking, keyword_ranking])
+
+    results = []
+    for doc_id, _ in fused[:k]:
+        doc = by_id.get(doc_id) or index.get(doc_id)
+        if doc is not None:
+            results.append(doc)
+    return results
@@ -9,6 +9,7 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from agent import agent
+from core.vector_maintenance import all_stats, rebuild_collection, tune_collection, verify_collection
 
 load_dotenv()
 
@@ -26,6 +27,14 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
 
+class RebuildRequest(BaseModel):
+    M: int | None = None
+    ef_search: int | None = None
+    ef_construction: int | None = None
+
+class VerifyRequest(BaseModel):
+    repair: bool = False
+
 class ChatResponse(BaseModel):
     response: str
     action: str | None = None
@@ -51,3 +60,27 @@ def chat_endpoint(request: ChatRequest):
         completion_tokens=result.get("completion_tokens"),
         total_tokens=result.get("total_tokens")
     )
+
+@app.get("/api/vectors")
+def vector_stats():
+    return {"collections": all_stats()}
+
+@app.post("/api/vectors/{name}/rebuild")
+def vector_rebuild(name: str, request: RebuildRequest):
+    try:
+        if request.M is None and request.ef_construction is None and request.ef_search is not None:
+            return tune_collection(name, ef_search=request.ef_search)
+        return rebuild_collection(name, M=request.M, ef_search=request.ef_search, ef_construction=request.ef_construction)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/vectors/{name}/verify")
+def vector_verify(name: str, request: VerifyRequest):
+    try:
+        return verify_collection(name, repair=request.repair)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
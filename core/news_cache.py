@@ -1,14 +1,75 @@
 """
 News Cache Management System
 
-Stores and retrieves cached news searches for easy access.
+Stores and retrieves cached news searches for easy access, and keeps a
+short-lived cache of raw search results so repeated queries skip the network.
+
+Saved searches live in SQLite (news_cache/news_searches.db), indexed by id and
+time. Listings load only the summary columns a page at a time; an entry's news
+items are read when first accessed. A retention policy (max entries, max age)
+prunes old searches; searches saved explicitly are pinned and kept.
+
+The same database holds the prefetched text of news articles, zlib-compressed
+and keyed by normalized URL, so results can be read offline, and the feed
+subscriptions with the items their fetcher has collected.
 """
 
 import os
+import re
 import json
+import time
+import uuid
+import zlib
+import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from core.paths import paths
+from core.vector_store import normalize_url
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    cache_id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    news_items TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS searches_timestamp ON searches (timestamp);
+CREATE TABLE IF NOT EXISTS articles (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    text BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_fetched_at ON articles (fetched_at);
+CREATE TABLE IF NOT EXISTS feeds (
+    url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    interval REAL NOT NULL,
+    last_checked REAL NOT NULL DEFAULT 0,
+    last_status TEXT
+);
+CREATE TABLE IF NOT EXISTS feed_items (
+    item_key TEXT PRIMARY KEY,
+    feed_url TEXT NOT NULL,
+    title TEXT,
+    url TEXT,
+    body TEXT,
+    source TEXT,
+    published REAL NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feed_items_published ON feed_items (feed_url, published);
+"""
+
+_SUMMARY_COLUMNS = "cache_id, query, timestamp, item_count, pinned"
+
+DEFAULT_RETENTION = {"max_entries": 50, "max_age_days": 0, "max_articles": 500, "feed_item_days": 30}
 
 
 class NewsCacheEntry:
@@ -17,18 +78,46 @@ class NewsCacheEntry:
     def __init__(
         self,
         query: str,
-        news_items: List[Dict[str, Any]],
+        news_items: List[Dict[str, Any]] = None,
         timestamp: str = None,
-        cache_id: str = None
+        cache_id: str = None,
+        item_count: int = None,
+        pinned: bool = False,
+        loader: Callable[[str], List[Dict[str, Any]]] = None
     ):
+        """
+        Args:
+            query: The search query.
+            news_items: The news items; may be omitted when a loader is given.
+            timestamp: ISO time of the search (default: now).
+            cache_id: Entry id (default: a new unique id).
+            item_count: Number of items, known without loading them.
+            pinned: Whether retention keeps this entry regardless of age and count.
+            loader: Loads the news items by cache id on first access.
+        """
         self.query = query
-        self.news_items = news_items
+        self._news_items = news_items
+        self._loader = loader
         self.timestamp = timestamp or datetime.now().isoformat()
         self.cache_id = cache_id or self._generate_id()
+        self.item_count = len(news_items) if item_count is None and news_items is not None else (item_count or 0)
+        self.pinned = pinned
 
     def _generate_id(self) -> str:
         """Generate a unique ID for this cache entry."""
-        return f"news_{int(datetime.now().timestamp())}"
+        # The random suffix keeps ids unique for searches within the same second
+        return f"news_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
+
+    @property
+    def news_items(self) -> List[Dict[str, Any]]:
+        if self._news_items is None:
+            self._news_items = self._loader(self.cache_id) if self._loader else []
+        return self._news_items
+
+    @news_items.setter
+    def news_items(self, value: List[Dict[str, Any]]):
+        self._news_items = value
+        self.item_count = len(value)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
@@ -36,6 +125,7 @@ class NewsCacheEntry:
             "cache_id": self.cache_id,
             "query": self.query,
             "timestamp": self.timestamp,
+            "pinned": self.pinned,
             "news_items": self.news_items
         }
 
@@ -46,7 +136,8 @@ class NewsCacheEntry:
             query=data["query"],
             news_items=data["news_items"],
             timestamp=data["timestamp"],
-            cache_id=data["cache_id"]
+            cache_id=data["cache_id"],
+            pinned=data.get("pinned", False)
         )
 
     def get_display_title(self) -> str:
@@ -59,92 +150,446 @@ class NewsCacheEntry:
 class NewsCacheManager:
     """Manages cached news searches."""
 
-    def __init__(self):
-        self.cache_dir = paths.get_skill_data_dir("news_cache")
+    def __init__(self, cache_dir: str = None, retention_file: str = None):
+        """
+        Args:
+            cache_dir: Directory of the search database (default: the news_cache data dir).
+            retention_file: JSON retention policy (default: retention.json in the news config dir).
+        """
+        self.cache_dir = cache_dir or paths.get_skill_data_dir("news_cache")
         os.makedirs(self.cache_dir, exist_ok=True)
-        self._cache_file = os.path.join(self.cache_dir, "news_searches.json")
-        self._cached_entries: List[NewsCacheEntry] = []
-        self._load_cache()
+        self._legacy_file = os.path.join(self.cache_dir, "news_searches.json")
+        self._db_file = os.path.join(self.cache_dir, "news_searches.db")
+        self.retention_file = retention_file or os.path.join(paths.get_skill_config_dir("news"), "retention.json")
+        self.retention = self._load_retention()
 
-    def _load_cache(self):
-        """Load cached entries from disk."""
-        if os.path.exists(self._cache_file):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self._migrate_json()
+
+    def _load_retention(self) -> Dict[str, Any]:
+        retention = dict(DEFAULT_RETENTION)
+        if os.path.exists(self.retention_file):
             try:
-                with open(self._cache_file, "r") as f:
-                    data = json.load(f)
-                    self._cached_entries = [
-                        NewsCacheEntry.from_dict(entry)
-                        for entry in data
-                    ]
-            except Exception:
-                self._cached_entries = []
-
-    def _save_cache(self):
-        """Save cached entries to disk."""
+                with open(self.retention_file, "r") as f:
+                    retention.update(json.load(f))
+            except Exception as e:
+                print(f"Warning: Failed to load news retention policy: {e}")
+        return retention
+
+    def set_retention(self, max_entries: int = None, max_age_days: float = None, max_articles: int = None) -> Dict[str, Any]:
+        """Update the retention policy; None leaves a limit unchanged, 0 disables it."""
+        if max_entries is not None:
+            self.retention["max_entries"] = max(0, int(max_entries))
+        if max_age_days is not None:
+            self.retention["max_age_days"] = max(0, max_age_days)
+        if max_articles is not None:
+            self.retention["max_articles"] = max(0, int(max_articles))
+        os.makedirs(os.path.dirname(self.retention_file), exist_ok=True)
+        with open(self.retention_file, "w") as f:
+            json.dump(self.retention, f, indent=2)
+        self.apply_retention()
+        return dict(self.retention)
+
+    def _migrate_json(self):
+        """Import news_searches.json from older versions once, then set it aside."""
+        if not os.path.exists(self._legacy_file):
+            return
         try:
-            data = [entry.to_dict() for entry in self._cached_entries]
-            with open(self._cache_file, "w") as f:
-                json.dump(data, f, indent=2)
+            with open(self._legacy_file, "r") as f:
+                entries = [NewsCacheEntry.from_dict(entry) for entry in json.load(f)]
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO searches VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row(entry) for entry in entries]
+                )
+            os.replace(self._legacy_file, self._legacy_file + ".migrated")
         except Exception as e:
-            print(f"[dim]Warning: Failed to save news cache: {e}[/dim]")
+            print(f"Warning: Failed to migrate news cache: {e}")
+
+    @staticmethod
+    def _row(entry: NewsCacheEntry) -> tuple:
+        items = entry.news_items
+        return (
+            entry.cache_id, entry.query, entry.timestamp, len(items), int(entry.pinned),
+            json.dumps(items, separators=(",", ":"))
+        )
+
+    def _load_items(self, cache_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT news_items FROM searches WHERE cache_id = ?", (cache_id,)).fetchone()
+        return json.loads(row["news_items"]) if row else []
+
+    def _entry(self, row: sqlite3.Row) -> NewsCacheEntry:
+        return NewsCacheEntry(
+            query=row["query"],
+            timestamp=row["timestamp"],
+            cache_id=row["cache_id"],
+            item_count=row["item_count"],
+            pinned=bool(row["pinned"]),
+            loader=self._load_items
+        )
 
-    def save_search(self, query: str, news_items: List[Dict[str, Any]]) -> str:
+    def apply_retention(self) -> int:
+        """Delete unpinned searches beyond the policy limits. Returns the number deleted."""
+        deleted = 0
+        with self._lock, self._conn:
+            max_age_days = self.retention.get("max_age_days") or 0
+            if max_age_days > 0:
+                cutoff = datetime.fromtimestamp(time.time() - max_age_days * 86400).isoformat()
+                deleted += self._conn.execute(
+                    "DELETE FROM searches WHERE pinned = 0 AND timestamp < ?", (cutoff,)
+                ).rowcount
+            max_entries = self.retention.get("max_entries") or 0
+            if max_entries > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM searches WHERE pinned = 0 AND cache_id NOT IN "
+                    "(SELECT cache_id FROM searches WHERE pinned = 0 ORDER BY timestamp DESC LIMIT ?)",
+                    (max_entries,)
+                ).rowcount
+            max_articles = self.retention.get("max_articles") or 0
+            if max_articles > 0:
+                self._conn.execute(
+                    "DELETE FROM articles WHERE url_key NOT IN "
+                    "(SELECT url_key FROM articles ORDER BY fetched_at DESC LIMIT ?)",
+                    (max_articles,)
+                )
+            if max_age_days > 0:
+                self._conn.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - max_age_days * 86400,))
+            feed_item_days = self.retention.get("feed_item_days") or 0
+            if feed_item_days > 0:
+                self._conn.execute("DELETE FROM feed_items WHERE published < ?", (time.time() - feed_item_days * 86400,))
+        return deleted
+
+    def save_search(self, query: str, news_items: List[Dict[str, Any]], pinned: bool = False) -> str:
         """
         Save a news search to cache.
 
         Args:
             query: The search query
             news_items: List of news items
+            pinned: Keep the search regardless of the retention policy
 
         Returns:
             The cache ID of the saved entry
         """
-        entry = NewsCacheEntry(query=query, news_items=news_items)
-        self._cached_entries.insert(0, entry)  # Add to beginning (most recent first)
+        entry = NewsCacheEntry(query=query, news_items=news_items, pinned=pinned)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO searches VALUES (?, ?, ?, ?, ?, ?)", self._row(entry))
+            self.apply_retention()
+        except Exception as e:
+            print(f"Warning: Failed to save news cache: {e}")
+        return entry.cache_id
 
-        # Keep only the last 50 searches
-        if len(self._cached_entries) > 50:
-            self._cached_entries = self._cached_entries[:50]
+    def pin_search(self, cache_id: str, pinned: bool = True) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE searches SET pinned = ? WHERE cache_id = ?", (int(pinned), cache_id)
+            ).rowcount > 0
 
-        self._save_cache()
-        return entry.cache_id
+    def count_searches(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+
+    def list_searches(self, offset: int = 0, limit: int = 20) -> List[NewsCacheEntry]:
+        """
+        A page of cached searches, most recent first. News items are loaded lazily.
+
+        Args:
+            offset: Entries to skip.
+            limit: Page size.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM searches ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [self._entry(row) for row in rows]
 
     def get_all_searches(self) -> List[NewsCacheEntry]:
-        """Get all cached searches."""
-        return self._cached_entries.copy()
+        """Get all cached searches (news items are loaded lazily)."""
+        return self.list_searches(0, -1)
 
     def get_search(self, cache_id: str) -> Optional[NewsCacheEntry]:
         """Get a specific cached search by ID."""
-        for entry in self._cached_entries:
-            if entry.cache_id == cache_id:
-                return entry
-        return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM searches WHERE cache_id = ?", (cache_id,)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def get_search_at(self, index: int) -> Optional[NewsCacheEntry]:
+        """Get the cached search at a 0-based position in the most-recent-first listing."""
+        if index < 0:
+            return None
+        entries = self.list_searches(index, 1)
+        return entries[0] if entries else None
 
     def get_most_recent(self) -> Optional[NewsCacheEntry]:
         """Get the most recent cached search."""
-        if self._cached_entries:
-            return self._cached_entries[0]
-        return None
+        return self.get_search_at(0)
 
     def delete_search(self, cache_id: str) -> bool:
         """Delete a cached search."""
-        for i, entry in enumerate(self._cached_entries):
-            if entry.cache_id == cache_id:
-                del self._cached_entries[i]
-                self._save_cache()
-                return True
-        return False
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM searches WHERE cache_id = ?", (cache_id,)).rowcount > 0
 
     def clear_all(self) -> int:
-        """Clear all cached searches. Returns number cleared."""
-        count = len(self._cached_entries)
-        self._cached_entries = []
-        self._save_cache()
-        return count
+        """Clear all cached searches and articles. Returns number of searches cleared."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles")
+            return self._conn.execute("DELETE FROM searches").rowcount
+
+    def put_article(self, url: str, text: Optional[str] = None, error: Optional[str] = None):
+        """Store an article's extracted text, or the error that prevented fetching it."""
+        blob = zlib.compress(text.encode("utf-8")) if text else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), url, time.time(), blob, error)
+            )
+
+    def get_article(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a prefetched article.
+
+        Returns:
+            {"url", "fetched_at", "text", "error"} (text is None if fetching failed), or None if never fetched.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE url_key = ?", (normalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return {
+            "url": row["url"],
+            "fetched_at": row["fetched_at"],
+            "text": zlib.decompress(row["text"]).decode("utf-8") if row["text"] else None,
+            "error": row["error"]
+        }
+
+    def add_feed(self, url: str, name: str, interval: float = 1800) -> None:
+        """Subscribe to a feed (re-subscribing updates its name and interval)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO feeds (url, name, interval) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET name = excluded.name, interval = excluded.interval",
+                (url, name, interval)
+            )
+
+    def remove_feed(self, url: str) -> bool:
+        """Unsubscribe from a feed and drop its items."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM feed_items WHERE feed_url = ?", (url,))
+            return self._conn.execute("DELETE FROM feeds WHERE url = ?", (url,)).rowcount > 0
 
+    def list_feeds(self) -> List[Dict[str, Any]]:
+        """Subscribed feeds with their fetch state and item count."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT f.*, (SELECT COUNT(*) FROM feed_items i WHERE i.feed_url = f.url) AS items "
+                "FROM feeds f ORDER BY f.name COLLATE NOCASE"
+            ).fetchall()
+        return [dict(row) for row in rows]
 
-# Global instance
+    def update_feed(self, url: str, **state):
+        """Record fetch state: any of name, etag, last_modified, last_checked, last_status."""
+        columns = [k for k in ("name", "etag", "last_modified", "last_checked", "last_status") if k in state]
+        if not columns:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE feeds SET {', '.join(f'{c} = ?' for c in columns)} WHERE url = ?",
+                [state[c] for c in columns] + [url]
+            )
+
+    def add_feed_items(self, feed_url: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Store feed entries not seen before.
+
+        Args:
+            feed_url: The feed the entries came from.
+            items: Dicts with key (entry id), title, url, body, source and published (epoch seconds).
+
+        Returns:
+            Number of new entries.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO feed_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (item["key"], feed_url, item.get("title"), item.get("url"), item.get("body"),
+                     item.get("source"), item.get("published") or now, now)
+                    for item in items
+                ]
+            )
+            return self._conn.total_changes - before
+
+    def feed_items(self, feed_urls: List[str] = None, since: float = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Stored feed entries, newest first, in the search result format (title, body, url, source, date).
+
+        Args:
+            feed_urls: Only these feeds (default: all).
+            since: Only entries published after this epoch time.
+            limit: Maximum entries.
+        """
+        conditions, params = [], []
+        if feed_urls is not None:
+            if not feed_urls:
+                return []
+            conditions.append(f"feed_url IN ({','.join('?' * len(feed_urls))})")
+            params.extend(feed_urls)
+        if since is not None:
+            conditions.append("published >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT title, url, body, source, published FROM feed_items {where} ORDER BY published DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [
+            {
+                "title": row["title"] or "No Title",
+                "body": row["body"] or "",
+                "url": row["url"] or "",
+                "source": row["source"] or "",
+                "date": datetime.fromtimestamp(row["published"]).isoformat(timespec="minutes")
+            }
+            for row in rows
+        ]
+
+    def article_status(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch time and error (no text) of the stored articles among urls, keyed by url."""
+        keys = {normalize_url(url): url for url in urls if url}
+        status = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(keys)[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url_key, fetched_at, error, text IS NOT NULL AS has_text FROM articles "
+                    f"WHERE url_key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for row in rows:
+                    status[keys[row["url_key"]]] = {
+                        "fetched_at": row["fetched_at"], "error": row["error"], "has_text": bool(row["has_text"])
+                    }
+        return status
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", (query or "")).strip().casefold()
+
+
+class NewsQueryCache:
+    """
+    TTL cache of news search results keyed by normalized query and region.
+
+    Persisted to disk so it is shared across sessions; the file is re-read when
+    another process has written it since it was last loaded.
+    """
+
+    def __init__(self, cache_file: str = None, ttl: float = 15 * 60, max_entries: int = 200):
+        """
+        Args:
+            cache_file: JSON file holding the entries (default: news_cache/query_cache.json).
+            ttl: Seconds a result stays fresh.
+            max_entries: Entries kept; the oldest are dropped first.
+        """
+        if cache_file is None:
+            cache_dir = paths.get_skill_data_dir("news_cache")
+            os.makedirs(cache_dir, exist_ok=True)
+            cache_file = os.path.join(cache_dir, "query_cache.json")
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[int] = None
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(query: str, region: str) -> str:
+        return f"{(region or '').lower()}|{normalize_query(query)}"
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.cache_file).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                self._entries = json.load(f)
+        except Exception:
+            self._entries = {}
+        self._mtime = mtime
+
+    def _save(self):
+        now = time.time()
+        entries = {k: v for k, v in self._entries.items() if now - v["fetched_at"] < self.ttl}
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda kv: kv[1]["fetched_at"], reverse=True)
+            entries = dict(newest[:self.max_entries])
+        self._entries = entries
+        try:
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_file, self.cache_file)
+            self._mtime = os.stat(self.cache_file).st_mtime_ns
+        except Exception as e:
+            print(f"Warning: Failed to save news query cache: {e}")
+
+    def get(self, query: str, region: str, max_age: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Get fresh cached results.
+
+        Args:
+            query: The search query.
+            region: The search region (e.g. "us-en").
+            max_age: Seconds a result may be old; defaults to the cache TTL.
+
+        Returns:
+            {"results": [...], "fetched_at": epoch seconds}, or None on a miss.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            self._load()
+            entry = self._entries.get(self.key(query, region))
+            if entry is None or time.time() - entry["fetched_at"] >= max_age:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, query: str, region: str, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._load()
+            self._entries[self.key(query, region)] = {"query": query, "results": results, "fetched_at": time.time()}
+            self._save()
+
+    def clear(self) -> int:
+        with self._lock:
+            self._load()
+            count = len(self._entries)
+            self._entries = {}
+            self._save()
+            return count
+
+
+# Global instances
 _news_cache_manager: Optional[NewsCacheManager] = None
+_news_query_cache: Optional[NewsQueryCache] = None
 
 
 def get_news_cache_manager() -> NewsCacheManager:
@@ -153,3 +598,11 @@ def get_news_cache_manager() -> NewsCacheManager:
     if _news_cache_manager is None:
         _news_cache_manager = NewsCacheManager()
     return _news_cache_manager
+
+
+def get_news_query_cache() -> NewsQueryCache:
+    """Get the global news query result cache."""
+    global _news_query_cache
+    if _news_query_cache is None:
+        _news_query_cache = NewsQueryCache()
+    return _news_query_cache
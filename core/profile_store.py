@@ -0,0 +1,153 @@
+"""
+Profile Store
+
+Exact key-value table for personal profile facts, with alias resolution.
+Reads and upserts are O(1) dict operations backed by a small JSON file, so
+other components can use the profile without any embedding call.
+"""
+
+import os
+import re
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+from core.paths import paths
+
+# Common ways of asking for the same attribute -> canonical key (applied on lookup only)
+KEY_ALIASES: Dict[str, str] = {
+    "address": "location",
+    "home": "location",
+    "home_address": "location",
+    "live": "location",
+    "city": "location",
+    "suburb": "location",
+    "full_name": "name",
+    "first_name": "name",
+    "birthday": "date_of_birth",
+    "dob": "date_of_birth",
+    "birth_date": "date_of_birth",
+    "email_address": "email",
+    "e_mail": "email",
+    "phone_number": "phone",
+    "mobile": "phone",
+    "mobile_number": "phone",
+    "job": "occupation",
+    "job_title": "occupation",
+    "work": "occupation",
+    "husband": "spouse",
+    "wife": "spouse",
+    "partner": "spouse",
+}
+
+# Question scaffolding stripped before resolving a query to a key
+_QUESTION_RE = re.compile(
+    r"^(what('s| is| are)|where('s| is| do i)|who('s| is)|when('s| is)|do you know|tell me|show me|get)\s+",
+    re.IGNORECASE
+)
+_OWNER_RE = re.compile(r"^(my|the user's|user's|users)\s+", re.IGNORECASE)
+
+
+def normalize_key(text: str) -> str:
+    """Normalize a key or short query, e.g. "What is my Home Address?" -> "home_address"."""
+    text = (text or "").strip().rstrip("?.!").strip()
+    text = _QUESTION_RE.sub("", text)
+    text = _OWNER_RE.sub("", text)
+    text = re.sub(r"'s\b", "", text.lower())
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+class ProfileStore:
+    """Persistent key -> {value, category, timestamp} table."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(paths.get_skill_data_dir("personal_profile"), "profile.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load profile: {e}")
+            self._entries = {}
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Resolve a key, alias or short question to a stored key, or None."""
+        key = normalize_key(query)
+        candidates = [key]
+        # "wife's name" -> "wife"
+        if key.endswith("_name"):
+            candidates.append(key[:-len("_name")])
+
+        for candidate in candidates:
+            if candidate in self._entries:
+                return candidate
+            alias = KEY_ALIASES.get(candidate)
+            if alias and alias in self._entries:
+                return alias
+            # Reverse alias: asked for the canonical name of something stored under an alias
+            for stored in self._entries:
+                if KEY_ALIASES.get(stored) == candidate:
+                    return stored
+        return None
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for a key/alias (with its resolved "key"), or None."""
+        key = self.resolve(query)
+        if key is None:
+            return None
+        return dict(self._entries[key], key=key)
+
+    def set(self, key: str, value: str, category: str = "general", timestamp: Optional[str] = None) -> str:
+        """Upsert an attribute under its own normalized key (aliases are not applied). Returns the key."""
+        key = normalize_key(key) or key
+        with self._lock:
+            self._entries[key] = {
+                "value": value,
+                "category": category,
+                "timestamp": timestamp or datetime.now().isoformat()
+            }
+            self._save()
+        return key
+
+    def import_entries(self, entries: Dict[str, Dict[str, Any]]):
+        """Bulk-load entries (used for migration), keeping newer existing values."""
+        with self._lock:
+            for key, entry in entries.items():
+                current = self._entries.get(key)
+                if current is None or current.get("timestamp", "") < entry.get("timestamp", ""):
+                    self._entries[key] = entry
+            self._save()
+
+    def as_dict(self) -> Dict[str, str]:
+        """The whole profile as a plain key -> value dict."""
+        return {key: entry["value"] for key, entry in self._entries.items()}
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return {key: dict(entry) for key, entry in self._entries.items()}
+
+
+# Global instance
+_profile_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Get the global profile store instance."""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore()
+    return _profile_store
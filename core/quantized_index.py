@@ -0,0 +1,241 @@
+"""
+Quantized Vector Index
+
+An optional re-rank cache, off by default (EMBEDDING_QUANTIZATION=none): a
+float16 or int8 copy of a collection's embeddings that unfiltered searches scan
+linearly for candidates, which are then re-ranked against the full-precision
+embeddings held by Chroma.
+
+The copy is kept in addition to Chroma's float32 vectors and HNSW graph, so it
+adds memory and disk (1/2 or 1/4 of the float32 vectors) rather than saving
+any, and a search that uses it is an exact linear scan instead of an HNSW
+query. Only a reduced EMBEDDING_DIMENSIONS shrinks what Chroma stores.
+skills/email/benchmark_embeddings.py measures the extra bytes, the scan
+latency and the recall against HNSW, to decide whether it pays off for a
+given archive.
+
+The copy follows the collection through core.vector_store write notifications:
+ids written or deleted are re-quantized or dropped on the next search.
+"""
+
+import os
+import threading
+from typing import List, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from langchain_core.documents import Document
+from core.vector_store import add_write_listener
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+_SCAN_CHUNK = 4096
+
+
+def quantize(vectors, dtype: str) -> Tuple[Any, Any]:
+    """
+    Quantize a float matrix. Returns (values, scales); scales is None for float16.
+    int8 uses a symmetric per-vector scale so each row keeps its own range.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    peak = np.abs(vectors).max(axis=1)
+    peak[peak == 0] = 1.0
+    scales = (peak / 127.0).astype(np.float32)
+    values = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return values, scales
+
+
+class QuantizedIndex:
+    """Quantized embedding matrix for one Chroma collection, persisted as .npz."""
+
+    def __init__(self, persist_directory: str, collection_name: str, dtype: str = "int8"):
+        if np is None:
+            raise ImportError("numpy is required for quantized vector search.")
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantization '{dtype}'. Use float16 or int8.")
+        self.dtype = dtype
+        self.collection_name = collection_name
+        self.path = os.path.join(persist_directory, f"{collection_name}_{dtype}.npz")
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._values = None
+        self._scales = None
+        # Ids written (True) or deleted (False) since the last refresh
+        self._changes: Dict[str, bool] = {}
+        # Reconcile with the whole collection on first use, in case it changed while we were not running
+        self._needs_sync = True
+        self._load()
+        add_write_listener(collection_name, self._on_write)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            self._ids = [str(i) for i in data["ids"]]
+            self._values = data["values"]
+            self._scales = data["scales"] if self.dtype == "int8" else None
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        except Exception as e:
+            print(f"Warning: Failed to load quantized index {self.path}: {e}")
+            self._ids, self._positions, self._values, self._scales = [], {}, None, None
+
+    def _save(self):
+        tmp_path = self.path + ".tmp.npz"
+        try:
+            arrays = {"ids": np.array(self._ids, dtype=str), "values": self._values}
+            if self._scales is not None:
+                arrays["scales"] = self._scales
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Failed to save quantized index {self.path}: {e}")
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the quantized matrix (and int8 scales)."""
+        if self._values is None:
+            return 0
+        return self._values.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def sync(self, collection, batch_size: int = 500):
+        """
+        Reconcile with the Chroma collection: quantize embeddings for new ids and drop
+        ids the collection no longer has. Embeddings overwritten under an existing id
+        are only picked up through write notifications; re-ranking always uses the
+        stored full precision.
+        """
+        try:
+            collection_ids = collection.get(include=[]).get("ids", [])
+        except Exception as e:
+            print(f"Warning: Failed to sync quantized index: {e}")
+            return
+
+        with self._lock:
+            wanted = set(collection_ids)
+            missing = [doc_id for doc_id in collection_ids if doc_id not in self._positions]
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id in wanted]
+            if not missing and len(keep) == len(self._ids):
+                return
+
+            ids = [self._ids[i] for i in keep]
+            values = [self._values[keep]] if self._values is not None and keep else []
+            scales = [self._scales[keep]] if self._scales is not None and keep else []
+
+            for start in range(0, len(missing), batch_size):
+                data = collection.get(ids=missing[start:start + batch_size], include=["embeddings"])
+                embeddings = data.get("embeddings")
+                if embeddings is None or len(embeddings) == 0:
+                    continue
+                q_values, q_scales = quantize(embeddings, self.dtype)
+                ids.extend(data["ids"])
+                values.append(q_values)
+                if q_scales is not None:
+                    scales.append(q_scales)
+
+            self._ids = ids
+            self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+            self._values = np.concatenate(values) if values else None
+            self._scales = np.concatenate(scales) if scales else None
+            self._save()
+
+    def _on_write(self, written, deleted):
+        """Write listener: remember which ids changed (written=None: the whole collection)."""
+        with self._lock:
+            if written is None:
+                self._needs_sync = True
+                return
+            for doc_id in deleted:
+                self._changes[doc_id] = False
+            for doc_id in written:
+                self._changes[doc_id] = True
+
+    def _apply(self, collection, changes: Dict[str, bool], batch_size: int = 500):
+        """Re-quantize written ids and drop deleted ones; the rest of the matrix is kept."""
+        written = [doc_id for doc_id, was_written in changes.items() if was_written]
+        fetched_ids, fetched_values, fetched_scales = [], [], []
+        for start in range(0, len(written), batch_size):
+            data = collection.get(ids=written[start:start + batch_size], include=["embeddings"])
+            embeddings = data.get("embeddings")
+            if embeddings is None or len(embeddings) == 0:
+                continue
+            q_values, q_scales = quantize(embeddings, self.dtype)
+            fetched_ids.extend(data["ids"])
+            fetched_values.append(q_values)
+            if q_scales is not None:
+                fetched_scales.append(q_scales)
+
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in changes]
+            ids = [self._ids[i] for i in keep] + fetched_ids
+            values = ([self._values[keep]] if self._values is not None and keep else []) + fetched_values
+            scales = ([self._scales[keep]] if self._scales is not None and keep else []) + fetched_scales
+            self._ids = ids
+            self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+            self._values = np.concatenate(values) if values else None
+            self._scales = np.concatenate(scales) if scales else None
+            self._save()
+
+    def refresh(self, collection):
+        """Bring the matrix up to date with the writes notified since the last refresh."""
+        with self._lock:
+            needs_sync, changes = self._needs_sync, self._changes
+            self._needs_sync, self._changes = False, {}
+        try:
+            if needs_sync:
+                self.sync(collection)
+            elif changes:
+                self._apply(collection, changes)
+        except Exception as e:
+            print(f"Warning: Failed to refresh quantized index: {e}")
+            with self._lock:
+                self._needs_sync = True
+
+    def candidates(self, query_embedding: List[float], k: int) -> List[str]:
+        """Scan the quantized matrix and return the ids of the k best approximate matches."""
+        with self._lock:
+            values, scales, ids = self._values, self._scales, self._ids
+        if values is None or not ids:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = np.empty(len(ids), dtype=np.float32)
+        # Chunked so only a slice of the matrix is ever upcast to float32
+        for start in range(0, len(ids), _SCAN_CHUNK):
+            chunk = values[start:start + _SCAN_CHUNK].astype(np.float32) @ query
+            if scales is not None:
+                chunk *= scales[start:start + _SCAN_CHUNK]
+            scores[start:start + _SCAN_CHUNK] = chunk
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [ids[i] for i in top]
+
+    def search(self, collection, query_embedding: List[float], k: int = 5, rerank_factor: int = 4) -> List[Document]:
+        """
+        Approximate scan on quantized vectors, then exact re-ranking of the top
+        k * rerank_factor candidates using full-precision embeddings from Chroma.
+        OpenAI embeddings are unit length, so the dot product ranks like cosine.
+        """
+        candidate_ids = self.candidates(query_embedding, max(k * rerank_factor, 20))
+        if not candidate_ids:
+            return []
+
+        data = collection.get(ids=candidate_ids, include=["embeddings", "documents", "metadatas"])
+        if not data.get("ids"):
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        exact = np.asarray(data["embeddings"], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:k]
+        return [
+            Document(id=data["ids"][i], page_content=data["documents"][i] or "", metadata=data["metadatas"][i] or {})
+            for i in order
+        ]
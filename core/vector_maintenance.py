@@ -0,0 +1,310 @@
+"""
+Vector Store Maintenance
+
+Statistics, HNSW tuning, rebuild/compaction and consistency checks for the
+Chroma collections registered in core.vector_store. Used by the /vectors CLI
+command and the /api/vectors endpoints.
+"""
+
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+from core.vector_store import (
+    registered_stores, latency_percentiles, notify_writes, use_collection, REBUILD_COPY, REBUILD_PREVIOUS
+)
+
+BATCH_SIZE = 500
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _get_store(name: str) -> Dict[str, Any]:
+    stores = registered_stores()
+    if name not in stores:
+        raise KeyError(f"Unknown collection '{name}'. Known: {', '.join(sorted(stores)) or 'none'}.")
+    return stores[name]
+
+
+def _hnsw_config(collection) -> Dict[str, Any]:
+    """Read HNSW parameters from the collection configuration or legacy metadata."""
+    config: Dict[str, Any] = {}
+    try:
+        hnsw = (collection.configuration or {}).get("hnsw") or {}
+        config = {
+            "space": hnsw.get("space"),
+            "M": hnsw.get("max_neighbors"),
+            "ef_construction": hnsw.get("ef_construction"),
+            "ef_search": hnsw.get("ef_search"),
+        }
+    except Exception:
+        pass
+    metadata = collection.metadata or {}
+    config.setdefault("space", metadata.get("hnsw:space"))
+    for key, legacy in (("M", "hnsw:M"), ("ef_construction", "hnsw:construction_ef"), ("ef_search", "hnsw:search_ef")):
+        if config.get(key) is None:
+            config[key] = metadata.get(legacy)
+    return config
+
+
+def collection_stats(name: str) -> Dict[str, Any]:
+    """Item count, disk size, query latency and HNSW parameters of one collection."""
+    store = _get_store(name)
+    stats: Dict[str, Any] = {
+        "name": name,
+        "initialized": False,
+        "count": None,
+        "disk_bytes": _dir_size(store["persist_directory"]),
+        "latency_ms": latency_percentiles(name),
+        "hnsw": {},
+        "keyword_index": len(store["keyword_index"]) if store["keyword_index"] is not None else None,
+    }
+    vectorstore = store["get_vectorstore"]()
+    if vectorstore is None:
+        return stats
+    collection = vectorstore._collection
+    stats["initialized"] = True
+    stats["collection"] = collection.name
+    stats["count"] = collection.count()
+    stats["hnsw"] = _hnsw_config(collection)
+    return stats
+
+
+def all_stats() -> List[Dict[str, Any]]:
+    results = []
+    for name in sorted(registered_stores()):
+        try:
+            results.append(collection_stats(name))
+        except Exception as e:
+            results.append({"name": name, "error": str(e)})
+    return results
+
+
+def _create_collection(client, name: str, hnsw: Dict[str, Any], metadata: Optional[Dict[str, Any]]):
+    """Create a collection with explicit HNSW parameters (new configuration API, legacy metadata fallback)."""
+    hnsw = {k: v for k, v in hnsw.items() if v is not None}
+    try:
+        configuration = {"hnsw": {
+            "space": hnsw.get("space") or "l2",
+            **({"max_neighbors": hnsw["M"]} if "M" in hnsw else {}),
+            **({"ef_construction": hnsw["ef_construction"]} if "ef_construction" in hnsw else {}),
+            **({"ef_search": hnsw["ef_search"]} if "ef_search" in hnsw else {}),
+        }}
+        return client.create_collection(name=name, configuration=configuration, metadata=metadata or None)
+    except TypeError:
+        legacy = dict(metadata or {})
+        legacy["hnsw:space"] = hnsw.get("space") or "l2"
+        for key, meta_key in (("M", "hnsw:M"), ("ef_construction", "hnsw:construction_ef"), ("ef_search", "hnsw:search_ef")):
+            if key in hnsw:
+                legacy[meta_key] = hnsw[key]
+        return client.create_collection(name=name, metadata=legacy)
+
+
+def rebuild_collection(
+    name: str,
+    M: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    ef_construction: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Rebuild a collection into a fresh HNSW index, optionally with new parameters.
+
+    Every item is copied with its stored embedding (no embedding calls) into a new
+    collection, which then replaces the original. This also compacts the index,
+    dropping space held by deleted items. The original is renamed aside and only
+    deleted once the copy is in place; a swap interrupted by a crash is recovered
+    at the next start (core.vector_store.recover_rebuild).
+    """
+    store = _get_store(name)
+    vectorstore = store["get_vectorstore"]()
+    if vectorstore is None:
+        raise RuntimeError(f"Collection '{name}' is not initialized.")
+
+    start = time.time()
+    client = vectorstore._client
+    old = vectorstore._collection
+    size_before = _dir_size(store["persist_directory"])
+
+    hnsw = _hnsw_config(old)
+    for key, value in (("M", M), ("ef_search", ef_search), ("ef_construction", ef_construction)):
+        if value is not None:
+            hnsw[key] = value
+    metadata = {k: v for k, v in (old.metadata or {}).items() if not k.startswith("hnsw:")}
+
+    # The registry name is logical; the Chroma collection may carry a dimension suffix
+    collection_name = old.name
+    tmp_name = f"{collection_name}{REBUILD_COPY}"
+    backup_name = f"{collection_name}{REBUILD_PREVIOUS}"
+    for leftover in (tmp_name, backup_name):
+        try:
+            client.delete_collection(leftover)
+        except Exception:
+            pass
+    new = _create_collection(client, tmp_name, hnsw, metadata)
+
+    total = old.count()
+    for offset in range(0, total, BATCH_SIZE):
+        data = old.get(limit=BATCH_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not data.get("ids"):
+            break
+        new.add(
+            ids=data["ids"],
+            embeddings=data["embeddings"],
+            documents=data["documents"],
+            metadatas=data["metadatas"]
+        )
+
+    if new.count() != total:
+        client.delete_collection(tmp_name)
+        raise RuntimeError(f"Rebuild copied {new.count()} of {total} items; original left untouched.")
+
+    # Move the original aside before the copy takes its name, so the data always
+    # exists under a name recover_rebuild knows
+    try:
+        old.modify(name=backup_name)
+    except Exception as e:
+        client.delete_collection(tmp_name)
+        raise RuntimeError(f"Cannot rename collections with this Chroma version ({e}); original left untouched.")
+    try:
+        new.modify(name=collection_name)
+    except Exception:
+        old.modify(name=collection_name)
+        client.delete_collection(tmp_name)
+        raise
+    client.delete_collection(backup_name)
+    rebuilt = client.get_collection(collection_name)
+    # Point the LangChain wrapper at the new collection
+    use_collection(vectorstore, rebuilt)
+    # Indexes derived from the collection (e.g. a quantized copy) re-sync on next use
+    notify_writes(collection_name, written=None)
+
+    return {
+        "name": name,
+        "count": rebuilt.count(),
+        "hnsw": _hnsw_config(rebuilt),
+        "disk_bytes_before": size_before,
+        "disk_bytes_after": _dir_size(store["persist_directory"]),
+        "seconds": time.time() - start,
+    }
+
+
+def tune_collection(name: str, ef_search: Optional[int] = None, M: Optional[int] = None, ef_construction: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Change HNSW parameters. ef_search can be changed in place; M and
+    ef_construction are fixed at index build time and require a rebuild.
+    """
+    if M is None and ef_construction is None and ef_search is not None:
+        store = _get_store(name)
+        vectorstore = store["get_vectorstore"]()
+        if vectorstore is None:
+            raise RuntimeError(f"Collection '{name}' is not initialized.")
+        try:
+            vectorstore._collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+            return {"name": name, "hnsw": _hnsw_config(vectorstore._collection), "rebuilt": False}
+        except Exception:
+            # Older Chroma versions cannot modify HNSW settings in place
+            pass
+    result = rebuild_collection(name, M=M, ef_search=ef_search, ef_construction=ef_construction)
+    result["rebuilt"] = True
+    return result
+
+
+def verify_collection(name: str, repair: bool = False) -> Dict[str, Any]:
+    """
+    Check that every item has a document and an embedding of the expected
+    dimension, and that the keyword index mirrors the collection. Documents
+    still waiting in the collection's ingest queue are expected to be in the
+    keyword index only and are not counted as stale.
+
+    With repair=True, items missing an embedding are re-embedded from their
+    document, items with neither are deleted, and the keyword index is resynced.
+    """
+    store = _get_store(name)
+    vectorstore = store["get_vectorstore"]()
+    if vectorstore is None:
+        raise RuntimeError(f"Collection '{name}' is not initialized.")
+    collection = vectorstore._collection
+    keyword_index = store["keyword_index"]
+    queued = set(store["ingest_queue"].pending_ids()) if store.get("ingest_queue") is not None else set()
+
+    missing_embedding: List[str] = []
+    missing_document: List[str] = []
+    wrong_dimension: List[str] = []
+    documents: Dict[str, Any] = {}
+    dimension = None
+    all_ids = set()
+
+    total = collection.count()
+    for offset in range(0, total, BATCH_SIZE):
+        data = collection.get(limit=BATCH_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+        embeddings = data.get("embeddings")
+        if embeddings is None:
+            embeddings = [None] * len(data["ids"])
+        for doc_id, emb, doc, meta in zip(data["ids"], embeddings, data["documents"], data["metadatas"]):
+            all_ids.add(doc_id)
+            if doc is None:
+                missing_document.append(doc_id)
+            if emb is None or len(emb) == 0:
+                missing_embedding.append(doc_id)
+                documents[doc_id] = (doc, meta)
+                continue
+            if dimension is None:
+                dimension = len(emb)
+            elif len(emb) != dimension:
+                wrong_dimension.append(doc_id)
+                documents[doc_id] = (doc, meta)
+
+    index_missing: List[str] = []
+    index_stale: List[str] = []
+    if keyword_index is not None:
+        indexed = set(keyword_index.ids())
+        index_missing = sorted(all_ids - indexed)
+        index_stale = sorted(indexed - all_ids - queued)
+
+    result = {
+        "name": name,
+        "count": total,
+        "dimension": dimension,
+        "missing_embedding": len(missing_embedding),
+        "missing_document": len(missing_document),
+        "wrong_dimension": len(wrong_dimension),
+        "keyword_index_missing": len(index_missing),
+        "keyword_index_stale": len(index_stale),
+        "repaired": 0,
+        "deleted": 0,
+    }
+    result["ok"] = not any(result[k] for k in (
+        "missing_embedding", "missing_document", "wrong_dimension", "keyword_index_missing", "keyword_index_stale"
+    ))
+
+    if repair and not result["ok"]:
+        from langchain_core.documents import Document
+
+        broken = set(missing_embedding) | set(wrong_dimension)
+        to_delete = [i for i in broken if documents[i][0] is None]
+        to_reembed = [i for i in broken if documents[i][0] is not None]
+        if to_delete:
+            collection.delete(ids=to_delete)
+            notify_writes(collection.name, deleted=to_delete)
+        for start in range(0, len(to_reembed), BATCH_SIZE):
+            batch = to_reembed[start:start + BATCH_SIZE]
+            vectorstore.add_documents(
+                [Document(page_content=documents[i][0], metadata=documents[i][1] or {}) for i in batch],
+                ids=batch
+            )
+            notify_writes(collection.name, written=batch)
+        if keyword_index is not None:
+            keyword_index.sync(collection, keep=list(queued))
+        result["repaired"] = len(to_reembed)
+        result["deleted"] = len(to_delete)
+
+    return result
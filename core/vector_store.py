@@ -0,0 +1,409 @@
+"""
+Vector Store Helpers
+
+Shared helpers for the Chroma-backed skills: deterministic content-addressed ids,
+idempotent upserts that skip the embedding call for documents already stored,
+a one-off dedupe pass for stores created before ids were deterministic, a
+registry of collections with per-collection query latency samples, write
+notifications for indexes derived from a collection, and the embedding
+dimension/quantization settings for the large archives.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from core.paths import paths
+
+# Query parameters that only track the click and never change the page
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+
+
+# Collection name -> {"get_vectorstore", "persist_directory", "keyword_index", "ingest_queue"}
+_registry: Dict[str, Dict[str, Any]] = {}
+# Collection name -> recent query latencies in milliseconds
+_latencies: Dict[str, deque] = {}
+_latency_lock = threading.Lock()
+LATENCY_SAMPLES = 500
+# Chroma collection name -> callbacks(written_ids, deleted_ids) of derived indexes
+_write_listeners: Dict[str, List[Callable[[Optional[List[str]], List[str]], None]]] = {}
+
+# Suffixes of the collections a rebuild swaps through (see recover_rebuild)
+REBUILD_COPY = "_rebuild"
+REBUILD_PREVIOUS = "_previous"
+
+# Model used when a reduced dimension is configured (ada-002 cannot shorten its vectors)
+REDUCED_DIMENSION_MODEL = "text-embedding-3-small"
+FULL_DIMENSIONS = 1536
+
+
+def register_store(
+    name: str,
+    get_vectorstore: Callable[[], Any],
+    persist_directory: str,
+    keyword_index=None,
+    ingest_queue=None
+):
+    """Register a collection so maintenance commands can find it."""
+    _registry[name] = {
+        "get_vectorstore": get_vectorstore,
+        "persist_directory": persist_directory,
+        "keyword_index": keyword_index,
+        "ingest_queue": ingest_queue
+    }
+
+
+def registered_stores() -> Dict[str, Dict[str, Any]]:
+    return dict(_registry)
+
+
+def record_query(name: str, elapsed_ms: float):
+    """Record the latency of one query against a collection."""
+    with _latency_lock:
+        _latencies.setdefault(name, deque(maxlen=LATENCY_SAMPLES)).append(elapsed_ms)
+
+
+def latency_percentiles(name: str) -> Dict[str, Optional[float]]:
+    """p50/p95 of the recent query latencies for a collection."""
+    with _latency_lock:
+        samples = sorted(_latencies.get(name, []))
+    if not samples:
+        return {"p50": None, "p95": None, "samples": 0}
+
+    def pct(p):
+        return samples[min(len(samples) - 1, int(round(p * (len(samples) - 1))))]
+
+    return {"p50": pct(0.50), "p95": pct(0.95), "samples": len(samples)}
+
+
+def add_write_listener(collection_name: str, callback: Callable[[Optional[List[str]], List[str]], None]):
+    """
+    Call callback(written_ids, deleted_ids) after documents of a Chroma collection
+    are written or deleted through these helpers. written_ids is None when the
+    whole collection was replaced (e.g. rebuilt).
+    """
+    _write_listeners.setdefault(collection_name, []).append(callback)
+
+
+def notify_writes(collection_name: str, written: Optional[List[str]] = (), deleted: List[str] = ()):
+    """Tell the listeners of a collection which ids changed (written=None: all of them)."""
+    for callback in _write_listeners.get(collection_name, []):
+        try:
+            callback(None if written is None else list(written), list(deleted))
+        except Exception as e:
+            print(f"Warning: Write listener for {collection_name} failed: {e}")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings of the same page compare equal.
+
+    Lowercases scheme and host, drops default ports, trailing slashes, fragments
+    and tracking parameters, and sorts the query. As a deliberate dedupe rule,
+    http:// and https:// URLs of the same host and path are treated as one page
+    (stored ids depend on this), even though a server could serve different
+    content on each. A URL that cannot be parsed (e.g. a non-numeric port) is
+    returned stripped, as given.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    raw = url
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return raw
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    # Intentional: http and https variants share one id (see docstring)
+    if scheme in ("http", "https"):
+        scheme = "https"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so re-saving the same text hashes identically."""
+    return re.sub(r"\s+", " ", (text or "")).strip().casefold()
+
+
+def content_id(prefix: str, *parts: str) -> str:
+    """Derive a deterministic document id from normalized content parts."""
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return f"{prefix}_{digest[:32]}"
+
+
+def upsert_documents(
+    vectorstore,
+    documents: List[Any],
+    ids: List[str],
+    keyword_index=None,
+    overwrite: bool = True
+) -> Tuple[List[str], List[str]]:
+    """
+    Idempotently insert documents under deterministic ids.
+
+    Documents whose id already exists with identical text are skipped without an
+    embedding call; new or changed documents are embedded and upserted. With
+    overwrite=False any existing id is skipped, even if its text changed.
+
+    Returns:
+        (written_ids, skipped_ids)
+    """
+    # Collapse duplicates within the batch itself, last one wins
+    pending: Dict[str, Any] = {}
+    for doc_id, doc in zip(ids, documents):
+        pending[doc_id] = doc
+
+    existing = vectorstore._collection.get(ids=list(pending.keys()), include=["documents"])
+    existing_text = dict(zip(existing.get("ids", []), existing.get("documents", [])))
+
+    def is_stored(doc_id, doc):
+        if doc_id not in existing_text:
+            return False
+        return not overwrite or existing_text[doc_id] == doc.page_content
+
+    to_write = [(doc_id, doc) for doc_id, doc in pending.items() if not is_stored(doc_id, doc)]
+    skipped = [doc_id for doc_id, doc in pending.items() if is_stored(doc_id, doc)]
+
+    if to_write:
+        vectorstore.add_documents([doc for _, doc in to_write], ids=[doc_id for doc_id, _ in to_write])
+        if keyword_index is not None:
+            keyword_index.add_many([(doc_id, doc.page_content, doc.metadata) for doc_id, doc in to_write])
+        notify_writes(vectorstore._collection.name, written=[doc_id for doc_id, _ in to_write])
+
+    return [doc_id for doc_id, _ in to_write], skipped
+
+
+def delete_documents(vectorstore, ids: List[str], keyword_index=None):
+    """Delete documents from a collection (and its keyword index) by id."""
+    if not ids:
+        return
+    vectorstore.delete(ids=ids)
+    if keyword_index is not None:
+        keyword_index.remove(ids)
+    notify_writes(vectorstore._collection.name, deleted=ids)
+
+
+def dedupe_collection(
+    vectorstore,
+    id_fn: Callable[[str, Dict[str, Any]], str],
+    keyword_index=None,
+    batch_size: int = 500
+) -> Dict[str, int]:
+    """
+    Collapse duplicate documents and move survivors to their content-addressed ids.
+
+    Items are grouped by id_fn(text, metadata). The most recent item of each group
+    (by metadata timestamp) is kept; if it is stored under a legacy random id it is
+    re-inserted under the deterministic id reusing its stored embedding, so no
+    embedding calls are made.
+
+    Returns:
+        Counts of scanned, removed (duplicates) and rekeyed items.
+    """
+    collection = vectorstore._collection
+    data = collection.get(include=["documents", "metadatas", "embeddings"])
+    ids = data.get("ids", [])
+    docs = data.get("documents", [])
+    metas = data.get("metadatas", [])
+    embeddings = data.get("embeddings")
+    if embeddings is None:
+        embeddings = [None] * len(ids)
+
+    groups: Dict[str, List[int]] = {}
+    for i, (text, meta) in enumerate(zip(docs, metas)):
+        groups.setdefault(id_fn(text or "", meta or {}), []).append(i)
+
+    to_delete: List[str] = []
+    to_add = []
+    removed = 0
+    for key, members in groups.items():
+        removed += len(members) - 1
+        members.sort(key=lambda i: (metas[i] or {}).get("timestamp", ""), reverse=True)
+        keep = members[0]
+        to_delete.extend(ids[i] for i in members[1:] if ids[i] != key)
+        if ids[keep] != key:
+            to_add.append((key, keep))
+            to_delete.append(ids[keep])
+
+    for start in range(0, len(to_add), batch_size):
+        batch = to_add[start:start + batch_size]
+        collection.upsert(
+            ids=[key for key, _ in batch],
+            embeddings=[embeddings[i] for _, i in batch],
+            documents=[docs[i] for _, i in batch],
+            metadatas=[metas[i] for _, i in batch]
+        )
+
+    # Never delete an id we just (re)wrote as a survivor
+    survivors = {key for key, _ in to_add}
+    to_delete = [doc_id for doc_id in to_delete if doc_id not in survivors]
+    for start in range(0, len(to_delete), batch_size):
+        collection.delete(ids=to_delete[start:start + batch_size])
+
+    if keyword_index is not None:
+        keyword_index.remove(to_delete)
+        keyword_index.add_many([(key, docs[i] or "", metas[i] or {}) for key, i in to_add])
+    if to_add or to_delete:
+        notify_writes(collection.name, written=list(survivors), deleted=to_delete)
+
+    return {
+        "scanned": len(ids),
+        "removed": removed,
+        "rekeyed": len(to_add)
+    }
+
+
+def embedding_settings() -> Dict[str, Any]:
+    """
+    Embedding dimensions and quantization for the email archive and content cache,
+    from EMBEDDING_DIMENSIONS / EMBEDDING_QUANTIZATION in config.json or the environment.
+    """
+    config = {}
+    try:
+        with open(paths.global_config_file, "r") as f:
+            config = json.load(f)
+    except Exception:
+        pass
+
+    dimensions = config.get("EMBEDDING_DIMENSIONS") or os.getenv("EMBEDDING_DIMENSIONS") or FULL_DIMENSIONS
+    try:
+        dimensions = int(dimensions)
+    except (TypeError, ValueError):
+        print(f"Warning: Invalid EMBEDDING_DIMENSIONS '{dimensions}', using {FULL_DIMENSIONS}.")
+        dimensions = FULL_DIMENSIONS
+    if dimensions <= 0 or dimensions > FULL_DIMENSIONS:
+        dimensions = FULL_DIMENSIONS
+
+    quantization = (config.get("EMBEDDING_QUANTIZATION") or os.getenv("EMBEDDING_QUANTIZATION") or "none").lower()
+    if quantization not in ("none", "float16", "int8"):
+        print(f"Warning: Invalid EMBEDDING_QUANTIZATION '{quantization}', using none.")
+        quantization = "none"
+
+    return {"dimensions": dimensions, "quantization": quantization}
+
+
+def embedding_kwargs(dimensions: int) -> Dict[str, Any]:
+    """Extra OpenAIEmbeddings arguments for a dimension (empty for the default full-size model)."""
+    if dimensions >= FULL_DIMENSIONS:
+        return {}
+    return {"model": REDUCED_DIMENSION_MODEL, "dimensions": dimensions}
+
+
+def dimensioned_collection_name(base: str, dimensions: int) -> str:
+    """Vectors of different sizes cannot share a collection, so reduced sizes get their own."""
+    if dimensions >= FULL_DIMENSIONS:
+        return base
+    return f"{base}_d{dimensions}"
+
+
+def use_collection(vectorstore, collection):
+    """Point a LangChain Chroma wrapper at another Chroma collection object."""
+    if hasattr(vectorstore, "_chroma_collection"):
+        vectorstore._chroma_collection = collection
+    else:
+        vectorstore._collection = collection
+
+
+def recover_rebuild(vectorstore, batch_size: int = 500) -> int:
+    """
+    Recover from a rebuild (core.vector_maintenance) that stopped mid-swap.
+
+    The rebuild keeps the original under <name>_previous and the copy under
+    <name>_rebuild while it swaps them. If the collection opened at startup is
+    empty and one of those still holds the data (the original first), its items
+    are copied back with their stored embeddings; leftovers are then dropped.
+    Returns the number of items recovered.
+    """
+    client = vectorstore._client
+    target = vectorstore._collection
+    names = {getattr(c, "name", c) for c in client.list_collections()}
+    leftovers = [n for n in (f"{target.name}{REBUILD_PREVIOUS}", f"{target.name}{REBUILD_COPY}") if n in names]
+    if not leftovers:
+        return 0
+
+    recovered = 0
+    if target.count() == 0:
+        for source_name in leftovers:
+            source = client.get_collection(source_name)
+            total = source.count()
+            if not total:
+                continue
+            for offset in range(0, total, batch_size):
+                data = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+                if not data.get("ids"):
+                    break
+                target.add(
+                    ids=data["ids"],
+                    embeddings=data["embeddings"],
+                    documents=data["documents"],
+                    metadatas=data["metadatas"]
+                )
+            if target.count() != total:
+                # Keep every leftover so nothing is lost; the next start tries again
+                print(f"Warning: Recovered only {target.count()} of {total} items of {target.name} from {source_name}.")
+                return target.count()
+            recovered = total
+            print(f"Recovered {total} items of {target.name} from an interrupted rebuild ({source_name}).")
+            notify_writes(target.name, written=None)
+            break
+
+    if target.count() > 0:
+        for source_name in leftovers:
+            client.delete_collection(source_name)
+    return recovered
+
+
+def migrate_collection(vectorstore, base: str, batch_size: int = 100) -> int:
+    """
+    Populate a collection from sibling collections of another dimension
+    (e.g. email_archive -> email_archive_d512), re-embedding the stored documents
+    with the new model, then drop the old collection. Ids already present are
+    skipped, so an interrupted migration resumes where it stopped. Returns the
+    number of items re-embedded.
+    """
+    recover_rebuild(vectorstore)
+    client = vectorstore._client
+    target = vectorstore._collection
+
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    sources = [n for n in names if n != target.name and (n == base or re.fullmatch(re.escape(base) + r"_d\d+", n))]
+    if not sources:
+        return 0
+
+    from langchain_core.documents import Document
+
+    migrated = 0
+    for source_name in sources:
+        source = client.get_collection(source_name)
+        total = source.count()
+        if total:
+            print(f"Re-embedding {total} items from {source_name} into {target.name}...")
+        for offset in range(0, total, batch_size):
+            data = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            rows = [(i, d, m) for i, d, m in zip(data["ids"], data["documents"], data["metadatas"]) if d]
+            if rows:
+                written, _ = upsert_documents(
+                    vectorstore,
+                    [Document(page_content=d, metadata=m or {}) for _, d, m in rows],
+                    [i for i, _, _ in rows],
+                    overwrite=False
+                )
+                migrated += len(written)
+        client.delete_collection(source_name)
+    return migrated
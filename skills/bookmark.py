@@ -4,6 +4,11 @@ import datetime
 from langchain_core.tools import tool, BaseTool
 from .base import Skill
 from core.paths import paths
+from core.keyword_index import KeywordIndex, hybrid_search
+from core.vector_store import (
+    content_id, normalize_url, dedupe_collection, delete_documents, register_store, recover_rebuild
+)
+from core.ingest_queue import IngestQueue
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -20,6 +25,11 @@ class BookmarkSkill(Skill):
         # Use centralized data directory
         self.persist_directory = paths.get_skill_data_dir("bookmarks")
         self.last_retrieved_ids = [] # To store IDs of listed bookmarks for deletion by index
+        self.keyword_index = KeywordIndex(self.persist_directory, "user_bookmarks")
+        self.ingest_queue = IngestQueue(self.persist_directory, "user_bookmarks", lambda: self.vectorstore, self.keyword_index)
+        register_store(
+            "user_bookmarks", lambda: self.vectorstore, self.persist_directory, self.keyword_index, self.ingest_queue
+        )
 
         # Ensure data directory exists
         # os.makedirs(self.persist_directory, exist_ok=True) # Handled by paths
@@ -50,6 +60,10 @@ class BookmarkSkill(Skill):
                     embedding_function=self.embeddings,
                     collection_name="user_bookmarks"
                 )
+                recover_rebuild(self.vectorstore)
+                self.keyword_index.sync(self.vectorstore._collection, keep=self.ingest_queue.pending_ids())
+                if len(self.ingest_queue):
+                    self.ingest_queue.start()
             except Exception as e:
                 print(f"Failed to initialize Chroma for bookmarks: {e}")
 
@@ -57,6 +71,18 @@ class BookmarkSkill(Skill):
     def required_config(self) -> List[str]:
         return ["OPENAI_API_KEY"]
 
+    def _document_id(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Bookmarks are content-addressed by their normalized URL."""
+        return content_id("bookmark", normalize_url(metadata.get("url", "")))
+
+    def dedupe(self) -> Dict[str, int]:
+        """Collapse duplicate bookmarks and move legacy random ids to content ids."""
+        if not self.vectorstore:
+            return {}
+        if not self.ingest_queue.flush():
+            raise RuntimeError(f"{len(self.ingest_queue)} queued bookmark(s) are not embedded yet; try again later.")
+        return dedupe_collection(self.vectorstore, self._document_id, self.keyword_index)
+
     def get_tools(self) -> List[BaseTool]:
 
         @tool
@@ -81,7 +107,13 @@ class BookmarkSkill(Skill):
             # Create content for semantic search: combination of desc, tags, and url
             search_content = f"URL: {url}\nDescription: {description}\nTags: {tags}"
             
-            self.vectorstore.add_documents([Document(page_content=search_content, metadata=meta)])
+            doc_id = self._document_id(search_content, meta)
+            existing = self.keyword_index.get(doc_id)
+            if existing and existing.page_content == search_content:
+                return f"✅ Bookmark already saved: {url}"
+
+            # Embedding and the Chroma write happen in the background
+            self.ingest_queue.enqueue([Document(page_content=search_content, metadata=meta)], [doc_id])
             return f"✅ Bookmark saved: {url}"
 
         @tool
@@ -103,6 +135,10 @@ class BookmarkSkill(Skill):
                 combined = []
                 for d, m, i in zip(docs, metas, ids):
                     combined.append({"content": d, "metadata": m, "id": i})
+                # Include bookmarks still waiting to be embedded
+                for doc in self.ingest_queue.pending():
+                    if doc.id not in ids:
+                        combined.append({"content": doc.page_content, "metadata": doc.metadata, "id": doc.id})
 
                 # Sort by timestamp descending
                 combined.sort(key=lambda x: x["metadata"].get("timestamp", ""), reverse=True)
@@ -141,16 +177,17 @@ class BookmarkSkill(Skill):
                 return f"Error listing bookmarks: {e}"
 
         @tool
-        def search_bookmarks(query: str) -> str:
+        def search_bookmarks(query: str, mode: str = "hybrid") -> str:
             """
-            Search for bookmarks by semantic similarity.
+            Search for bookmarks by keyword and semantic similarity.
             Args:
                 query: The search query (e.g., "python tutorials").
+                mode: "hybrid" (default), "keyword" for exact terms such as URLs or names (no embedding call), or "semantic".
             """
-            if not self.vectorstore:
+            if not self.vectorstore and mode != "keyword":
                 return "Bookmark system not initialized."
 
-            results = self.vectorstore.similarity_search(query, k=5)
+            results = hybrid_search(self.vectorstore, self.keyword_index, query, k=5, mode=mode)
             
             if not results:
                 return "No matching bookmarks found."
@@ -191,7 +228,8 @@ class BookmarkSkill(Skill):
             if not ids_to_delete:
                 return "No valid indices provided."
 
-            self.vectorstore.delete(ids=ids_to_delete)
+            self.ingest_queue.discard(ids_to_delete)
+            delete_documents(self.vectorstore, ids_to_delete, self.keyword_index)
             return f"Deleted bookmarks at indices: {deleted_indices}"
 
         @tool
@@ -5,6 +5,13 @@ import json
 from langchain_core.tools import tool, BaseTool
 from .base import Skill
 from core.paths import paths
+from core.keyword_index import KeywordIndex, hybrid_search
+from core.vector_store import (
+    content_id, normalize_url, normalize_text, dedupe_collection, delete_documents, register_store,
+    embedding_settings, embedding_kwargs, dimensioned_collection_name, migrate_collection
+)
+from core.ingest_queue import IngestQueue
+from core.cache_eviction import CacheEvictor
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -20,6 +27,18 @@ class CacheSkill(Skill):
         self.vectorstore = None
         self.persist_directory = paths.get_skill_data_dir("cache")
         self.last_retrieved_ids = []
+        self.keyword_index = KeywordIndex(self.persist_directory, "user_cache")
+        self.quantized_index = None
+        self.ingest_queue = IngestQueue(self.persist_directory, "user_cache", lambda: self.vectorstore, self.keyword_index)
+        register_store(
+            "user_cache", lambda: self.vectorstore, self.persist_directory, self.keyword_index, self.ingest_queue
+        )
+        self.evictor = CacheEvictor(
+            self.keyword_index,
+            self._evict,
+            policy_file=os.path.join(paths.get_skill_config_dir("cache"), "eviction.json"),
+            access_file=os.path.join(self.persist_directory, "access.json")
+        )
 
         self._initialize_store()
 
@@ -39,19 +58,60 @@ class CacheSkill(Skill):
 
         if Chroma and not self.vectorstore:
             try:
-                self.embeddings = OpenAIEmbeddings(api_key=api_key)
+                settings = embedding_settings()
+                self.embeddings = OpenAIEmbeddings(api_key=api_key, **embedding_kwargs(settings["dimensions"]))
                 self.vectorstore = Chroma(
                     persist_directory=self.persist_directory,
                     embedding_function=self.embeddings,
-                    collection_name="user_cache"
+                    collection_name=dimensioned_collection_name("user_cache", settings["dimensions"])
                 )
+                migrate_collection(self.vectorstore, "user_cache")
+                if settings["quantization"] != "none":
+                    try:
+                        from core.quantized_index import QuantizedIndex
+                        self.quantized_index = QuantizedIndex(
+                            self.persist_directory, self.vectorstore._collection.name, settings["quantization"]
+                        )
+                    except ImportError as e:
+                        print(f"Warning: Quantized cache search disabled: {e}")
+                self.keyword_index.sync(self.vectorstore._collection, keep=self.ingest_queue.pending_ids())
+                if len(self.ingest_queue):
+                    self.ingest_queue.start()
+                # No-op until set_cache_policy configures a limit
+                self.evictor.start()
             except Exception as e:
                 print(f"Failed to initialize Chroma for cache: {e}")
 
+    def _evict(self, ids: List[str]):
+        """Delete evicted items from the vector store and the keyword index."""
+        self.ingest_queue.discard(ids)
+        delete_documents(self.vectorstore, ids, self.keyword_index)
+
     @property
     def required_config(self) -> List[str]:
         return ["OPENAI_API_KEY"]
 
+    def _document_id(self, content: str, metadata: Dict[str, Any]) -> str:
+        """
+        Cached items are content-addressed by normalized URL, falling back to
+        title + source, and finally to the text itself.
+        """
+        url = normalize_url(metadata.get("url", ""))
+        if url:
+            return content_id("cache", url)
+        title = normalize_text(metadata.get("title", ""))
+        if title:
+            return content_id("cache", title, normalize_text(metadata.get("source", "")))
+        return content_id("cache", normalize_text(content))
+
+    def dedupe(self) -> Dict[str, int]:
+        """Collapse duplicate cached items and move legacy random ids to content ids."""
+        if not self.vectorstore:
+            return {}
+        if not self.ingest_queue.flush():
+            raise RuntimeError(f"{len(self.ingest_queue)} queued item(s) are not embedded yet; try again later.")
+        return dedupe_collection(self.vectorstore, self._document_id, self.keyword_index)
+
     def get_tools(self) -> List[BaseTool]:
 
         @tool
@@ -91,7 +151,13 @@ class CacheSkill(Skill):
 
             search_content = f"Title: {title}\nContent: {content}\nSource: {source}\nTags: {tags}\nQuery: {original_query}"
 
-            self.vectorstore.add_documents([Document(page_content=search_content, metadata=meta)])
+            doc_id = self._document_id(search_content, meta)
+            existing = self.keyword_index.get(doc_id)
+            if existing and existing.page_content == search_content:
+                return f"✅ Content already cached (Type: {content_type})"
+
+            # Embedding and the Chroma write happen in the background
+            self.ingest_queue.enqueue([Document(page_content=search_content, metadata=meta)], [doc_id])
 
             return f"✅ Content cached successfully (Type: {content_type})"
 
@@ -116,7 +182,7 @@ class CacheSkill(Skill):
                 if not isinstance(items, list):
                     items = [items]
 
-                cached_count = 0
+                documents = []
                 for item in items:
                     title = item.get('title', '')
                     body = item.get('body', '')
@@ -137,10 +203,27 @@ class CacheSkill(Skill):
 
                     search_content = f"Title: {title}\nContent: {body}\nSource: {source}\nDate: {date}\nQuery: {query}"
 
-                    self.vectorstore.add_documents([Document(page_content=search_content, metadata=meta)])
-                    cached_count += 1
+                    documents.append(Document(page_content=search_content, metadata=meta))
+
+                if not documents:
+                    return "✅ Successfully cached 0 news articles."
+
+                new_docs, new_ids, skipped = [], [], 0
+                for doc in documents:
+                    doc_id = self._document_id(doc.page_content, doc.metadata)
+                    # An article already cached under the same URL is not re-embedded just because the query differs
+                    if doc_id in self.keyword_index or doc_id in new_ids:
+                        skipped += 1
+                        continue
+                    new_docs.append(doc)
+                    new_ids.append(doc_id)
 
-                return f"✅ Successfully cached {cached_count} news articles."
+                if new_docs:
+                    self.ingest_queue.enqueue(new_docs, new_ids, overwrite=False)
+
+                if skipped:
+                    return f"✅ Successfully cached {len(new_docs)} news articles ({skipped} already cached)."
+                return f"✅ Successfully cached {len(new_docs)} news articles."
 
             except json.JSONDecodeError:
                 return "Invalid JSON format. Please provide news items as a valid JSON array."
@@ -174,6 +257,10 @@ class CacheSkill(Skill):
                 combined = []
                 for d, m, i in zip(docs, metas, ids):
                     combined.append({"content": d, "metadata": m, "id": i})
+                # Include items still waiting to be embedded
+                for doc in self.ingest_queue.pending():
+                    if doc.id not in ids and all(doc.metadata.get(k) == v for k, v in where_clause.items()):
+                        combined.append({"content": doc.page_content, "metadata": doc.metadata, "id": doc.id})
 
                 combined.sort(key=lambda x: x["metadata"].get("timestamp", ""), reverse=True)
                 recent = combined[:limit]
@@ -203,38 +290,30 @@ class CacheSkill(Skill):
                 return f"Error listing cache: {str(e)}"
 
         @tool
-        def search_cache(query: str, content_type: str = "", k: int = 5) -> str:
+        def search_cache(query: str, content_type: str = "", k: int = 5, mode: str = "hybrid") -> str:
             """
-            Search cached items by semantic similarity.
+            Search cached items by keyword and semantic similarity.
             Args:
                 query: The search query.
                 content_type: Filter by content type (e.g., "news"). Leave empty for all types.
                 k: Maximum number of results to return (default: 5).
+                mode: "hybrid" (default), "keyword" for exact terms such as titles or URLs (no embedding call), or "semantic".
             """
-            if not self.vectorstore:
+            if not self.vectorstore and mode != "keyword":
                 return "Cache system not initialized."
 
             try:
-                if content_type:
-                    collection = self.vectorstore._collection
-                    data = collection.get(where={"content_type": content_type}, include=["documents", "metadatas", "ids"])
-
-                    if not data.get("ids"):
-                        return f"No cached items found for type: {content_type}"
-
-                    docs = []
-                    for doc, meta in zip(data["documents"], data["metadatas"]):
-                        docs.append(Document(page_content=doc, metadata=meta))
-
-                    from langchain_community.vectorstores import Chroma as LCChroma
-                    temp_store = LCChroma.from_documents(docs, self.embeddings)
-                    results = temp_store.similarity_search(query, k=min(k, len(docs)))
-                else:
-                    results = self.vectorstore.similarity_search(query, k=k)
+                where = {"content_type": content_type} if content_type else None
+                results = hybrid_search(
+                    self.vectorstore, self.keyword_index, query, k=k, mode=mode, where=where,
+                    quantized=self.quantized_index
+                )
 
                 if not results:
                     return "No matching cached items found."
 
+                self.evictor.touch([doc.id for doc in results if doc.id])
+
                 output = [f"Found {len(results)} matches for '{query}':"]
                 for idx, doc in enumerate(results, 1):
                     meta = doc.metadata
@@ -272,11 +351,20 @@ class CacheSkill(Skill):
                 item_id = self.last_retrieved_ids[index - 1]
                 data = collection.get(ids=[item_id], include=["documents", "metadatas"])
 
-                if not data.get("ids"):
-                    return "Item not found."
+                if data.get("ids"):
+                    doc = data["documents"][0]
+                    meta = data["metadatas"][0]
+                else:
+                    # Listed items may still be waiting in the ingest queue, which keeps a keyword-index copy
+                    queued = self.keyword_index.get(item_id) or next(
+                        (d for d in self.ingest_queue.pending() if d.id == item_id), None
+                    )
+                    if queued is None:
+                        return "Item not found."
+                    doc = queued.page_content
+                    meta = queued.metadata
 
-                doc = data["documents"][0]
-                meta = data["metadatas"][0]
+                self.evictor.touch([item_id])
 
                 title = meta.get("title", "No Title")
                 source = meta.get("source", "")
@@ -328,7 +416,9 @@ class CacheSkill(Skill):
                 return "No valid indices provided."
 
             try:
-                self.vectorstore.delete(ids=ids_to_delete)
+                self.ingest_queue.discard(ids_to_delete)
+                delete_documents(self.vectorstore, ids_to_delete, self.keyword_index)
+                self.evictor.tracker.forget(ids_to_delete)
                 return f"✅ Deleted cached items at indices: {deleted_indices}"
             except Exception as e:
                 return f"Error deleting cache items: {str(e)}"
@@ -350,22 +440,100 @@ class CacheSkill(Skill):
                 if content_type:
                     where_clause["content_type"] = content_type
 
+                # Discard queued items first, so none is committed after the listing below
+                queued = [
+                    doc.id for doc in self.ingest_queue.pending()
+                    if not content_type or doc.metadata.get("content_type") == content_type
+                ]
+                self.ingest_queue.discard(queued)
+
                 data = collection.get(where=where_clause, include=["ids"])
                 ids = data.get("ids", [])
 
-                if not ids:
+                if not ids and not queued:
                     if content_type:
                         return f"No cached items found for type: {content_type}"
                     return "No cached items found."
 
-                self.vectorstore.delete(ids=ids)
+                delete_documents(self.vectorstore, ids, self.keyword_index)
+                self.keyword_index.remove([i for i in queued if i not in ids])
+                self.evictor.tracker.forget(ids)
 
+                cleared = len(set(ids) | set(queued))
                 if content_type:
-                    return f"✅ Cleared all cached items of type: {content_type} ({len(ids)} items)"
-                return f"✅ Cleared all cached items ({len(ids)} items)"
+                    return f"✅ Cleared all cached items of type: {content_type} ({cleared} items)"
+                return f"✅ Cleared all cached items ({cleared} items)"
             except Exception as e:
                 return f"Error clearing cache: {str(e)}"
 
+        @tool
+        def set_cache_policy(
+            content_type: str = "default",
+            max_age_days: Optional[int] = None,
+            max_items: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            strategy: Optional[str] = None
+        ) -> str:
+            """
+            Configure automatic cache eviction for a content type. Nothing is evicted until a limit is set.
+            Args:
+                content_type: Content type the policy applies to (e.g., "news"), or "default" for all other types.
+                max_age_days: Evict items older than this many days (0 disables).
+                max_items: Keep at most this many items of this type (0 disables).
+                max_bytes: Keep at most this many bytes of content of this type (0 disables).
+                strategy: Which items go first when over the limits: "lru" (least recently used) or "lfu" (least frequently used).
+            """
+            try:
+                policy = self.evictor.set_policy(
+                    content_type,
+                    max_age_days=max_age_days,
+                    max_items=max_items,
+                    max_bytes=max_bytes,
+                    strategy=strategy
+                )
+            except ValueError as e:
+                return f"❌ {e}"
+            # The sweeper only runs once some limit is configured
+            if self.vectorstore:
+                self.evictor.start()
+
+            return (
+                f"✅ Cache policy for '{content_type}': max age {policy['max_age_days'] or '∞'} days, "
+                f"max {policy['max_items'] or '∞'} items, max {policy['max_bytes'] or '∞'} bytes, {policy['strategy'].upper()}."
+            )
+
+        @tool
+        def cache_stats(run_sweep: bool = False) -> str:
+            """
+            Show cache size per content type, eviction policies and eviction statistics.
+            Args:
+                run_sweep: Run an eviction sweep now before reporting (default: False).
+            """
+            evicted_now = self.evictor.sweep() if run_sweep and self.vectorstore else 0
+            stats = self.evictor.stats
+            usage = self.evictor.usage()
+
+            output = ["Cache usage:"]
+            if not usage:
+                output.append("  (empty)")
+            for content_type, entry in sorted(usage.items()):
+                policy = self.evictor.get_policy(content_type)
+                output.append(
+                    f"  - {content_type}: {entry['items']} items, {entry['bytes'] / 1024:.1f} KB "
+                    f"(limits: {policy['max_items'] or '∞'} items, {(policy['max_bytes'] or 0) / 1024 / 1024:.0f} MB, "
+                    f"{policy['max_age_days'] or '∞'} days, {policy['strategy'].upper()})"
+                )
+
+            output.append("\nEviction:")
+            if run_sweep:
+                output.append(f"  Evicted just now: {evicted_now}")
+            output.append(f"  Sweeps: {stats['sweeps']} (last: {stats['last_sweep'] or 'never'}, {stats['last_sweep_ms']:.1f} ms)")
+            output.append(
+                f"  Evicted by age: {stats['evicted_age']}, by count: {stats['evicted_count']}, "
+                f"by size: {stats['evicted_bytes']} ({stats['bytes_freed'] / 1024:.1f} KB freed)"
+            )
+            return "\n".join(output)
+
         return [
             cache_content,
             cache_news_list,
@@ -373,5 +541,7 @@ class CacheSkill(Skill):
             search_cache,
             get_cache_item,
             delete_cache,
-            clear_cache
+            clear_cache,
+            set_cache_policy,
+            cache_stats
         ]
@@ -1,13 +1,29 @@
 from typing import List, Optional, Dict, Any
-import imaplib
-import smtplib
 import email
 from email.header import decode_header
 from langchain_core.tools import tool, BaseTool
 from ..base import Skill
 import os
 from core.paths import paths
+from core.keyword_index import KeywordIndex, hybrid_search
+from core.vector_store import (
+    upsert_documents, delete_documents, register_store, embedding_settings, embedding_kwargs,
+    dimensioned_collection_name, migrate_collection
+)
 import datetime
+import time
+import threading
+from .sync import (
+    SyncState, sync_folder, select_folder, search_uids, fetch_headers, uid_fetch, parse_message, query_uids
+)
+from .pool import get_imap_pool
+from .idle import get_watcher, start_watcher, stop_watcher
+from .sync_all import sync_accounts
+from .chunking import chunk_document, chunk_id, split_content
+from .store import EmailStore
+from .accounts import AccountRegistry, account_file_name
+from .smtp import build_message, SECURITY_MODES
+from .outbox import Outbox
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -24,10 +40,20 @@ class EmailSkill(Skill):
         # Use a specific config file for email
         self.config_dir = paths.get_skill_config_dir("email")
         self.config_file = os.path.join(self.config_dir, "config.json")
+        self.accounts = AccountRegistry(self.config_dir)
 
         # Vector Store Init
         self.vectorstore = None
         self.persist_directory = paths.get_skill_data_dir("emails")
+        self.keyword_index = KeywordIndex(self.persist_directory, "email_archive")
+        self.quantized_index = None
+        self.sync_state = SyncState(os.path.join(self.persist_directory, "sync_state.db"))
+        # Full message text; the vector store only holds chunks
+        self.email_store = EmailStore(os.path.join(self.persist_directory, "emails.db"))
+        self._sync_locks: Dict[str, threading.Lock] = {}
+        # Outgoing mail, sent in the background by the outbox worker
+        self.outbox = Outbox(os.path.join(self.persist_directory, "outbox.jsonl"), self._sender_config)
+        register_store("email_archive", lambda: self._get_vectorstore(), self.persist_directory, self.keyword_index)
         self._initialize_store()
 
     def _initialize_store(self):
@@ -55,17 +81,122 @@ class EmailSkill(Skill):
 
         if api_key and Chroma:
             try:
-                self.embeddings = OpenAIEmbeddings(api_key=api_key)
+                settings = embedding_settings()
+                self.embeddings = OpenAIEmbeddings(api_key=api_key, **embedding_kwargs(settings["dimensions"]))
                 self.vectorstore = Chroma(
                     persist_directory=self.persist_directory,
                     embedding_function=self.embeddings,
-                    collection_name="email_archive"
+                    collection_name=dimensioned_collection_name("email_archive", settings["dimensions"])
                 )
+                migrate_collection(self.vectorstore, "email_archive")
+                self.keyword_index.sync(self.vectorstore._collection)
+                self._migrate_to_chunks(self.vectorstore)
+                if settings["quantization"] != "none":
+                    try:
+                        from core.quantized_index import QuantizedIndex
+                        self.quantized_index = QuantizedIndex(
+                            self.persist_directory, self.vectorstore._collection.name, settings["quantization"]
+                        )
+                    except ImportError as e:
+                        print(f"Warning: Quantized email search disabled: {e}")
                 return self.vectorstore
             except Exception as e:
                 print(f"Failed to initialize Chroma for emails: {e}")
         return None
 
+    def _archive_documents(self, documents: List):
+        """Embed new emails as chunks and keep their full text in the email store."""
+        chunks = []
+        chunk_counts = {}
+        for doc in documents:
+            doc_chunks = chunk_document(doc)
+            chunk_counts[doc.id] = len(doc_chunks)
+            chunks.extend(doc_chunks)
+        # Emails already archived under their Message-ID are not re-embedded
+        upsert_documents(self.vectorstore, chunks, [c.id for c in chunks], self.keyword_index, overwrite=False)
+        self.email_store.put_many(documents, chunk_counts)
+
+    def _delete_documents(self, doc_ids: List[str]):
+        """Remove emails (all their chunks and the stored text) from the archive."""
+        counts = self.email_store.chunk_counts(doc_ids)
+        # Bare ids cover whole-message documents archived before chunking
+        ids = list(doc_ids) + [chunk_id(doc_id, i) for doc_id, n in counts.items() for i in range(n)]
+        delete_documents(self.vectorstore, ids, self.keyword_index)
+        self.email_store.delete(doc_ids)
+
+    def _migrate_to_chunks(self, vs, batch_size: int = 100):
+        """One-time split of whole-message documents from older archives into chunks."""
+        if self.email_store.get_meta("chunked") == "1":
+            return
+        collection = vs._collection
+        legacy = []
+        total = collection.count()
+        for offset in range(0, total, 1000):
+            data = collection.get(limit=1000, offset=offset, include=["metadatas"])
+            legacy.extend(i for i, m in zip(data["ids"], data["metadatas"]) if "chunk" not in (m or {}))
+        if legacy:
+            print(f"Splitting {len(legacy)} archived emails into chunks...")
+        for start in range(0, len(legacy), batch_size):
+            ids = legacy[start:start + batch_size]
+            data = collection.get(ids=ids, include=["documents", "metadatas"])
+            documents = [
+                Document(page_content=d, metadata=m or {}, id=i)
+                for i, d, m in zip(data["ids"], data["documents"], data["metadatas"]) if d
+            ]
+            self._archive_documents(documents)
+            delete_documents(vs, ids, self.keyword_index)
+        self.email_store.set_meta("chunked", "1")
+
+    def _search_messages(self, vs, query: str, limit: int = 5, mode: str = "hybrid") -> List:
+        """
+        Search the chunks and collapse hits per email.
+
+        Returns:
+            [(message id, best matching chunk Document)], best first.
+        """
+        # Several chunks of one long email can rank together; over-fetch before collapsing
+        results = hybrid_search(vs, self.keyword_index, query, k=limit * 4, mode=mode, quantized=self.quantized_index)
+        best = {}
+        for doc in results:
+            message_id = doc.metadata.get("message_id") if "chunk" in doc.metadata else doc.id
+            if message_id not in best:
+                best[message_id] = doc
+                if len(best) >= limit:
+                    break
+        return list(best.items())
+
+    def _sync_mailbox(self, mail, account_config: Dict, folder: str = "inbox", limit: int = 20, full_resync: bool = False) -> Dict:
+        """Incrementally archive one folder over an open connection."""
+        if not self._get_vectorstore():
+            raise RuntimeError("Vector store not initialized. Check OPENAI_API_KEY.")
+
+        address = account_config.get("EMAIL_ADDRESS")
+        # The IDLE watcher and tool calls may sync the same account concurrently
+        with self._sync_locks.setdefault(address, threading.Lock()):
+            return sync_folder(
+                mail, address, folder, self.sync_state, self._archive_documents, self._delete_documents,
+                limit=limit, full_resync=full_resync
+            )
+
+    def _sender_config(self, address: str) -> Optional[Dict]:
+        """Account config of a sending address (an account file or the global config)."""
+        account_config = self.accounts.by_address(address)
+        if account_config is None and (self.config.get("EMAIL_ADDRESS") or "").lower() == address.lower():
+            account_config = self.accounts.resolve(address, fallback=self.config)
+        return account_config
+
+    def _account_configs(self) -> List[Dict]:
+        """Every configured account with complete IMAP settings, one per address."""
+        return self.accounts.accounts()
+
+    def _archive_new_mail(self, mail, account_config: Dict):
+        """IDLE callback: archive newly arrived mail if the vector store is available."""
+        if self._get_vectorstore() is None:
+            return
+        result = self._sync_mailbox(mail, account_config, "inbox", limit=100)
+        while result["remaining"]:
+            result = self._sync_mailbox(mail, account_config, "inbox", limit=100)
+
     @property
     def name(self) -> str:
         return "Email Manager"
@@ -80,83 +211,30 @@ class EmailSkill(Skill):
         return []
 
     def get_tools(self) -> List[BaseTool]:
+        # Resume sending mail queued before the last exit, now that the config is loaded
+        if len(self.outbox):
+            self.outbox.start()
 
         def _get_account_file(account_name: str) -> str:
             """Returns the file path for a specific account config."""
-            # Use URL encoding for email addresses or names
-            import urllib.parse
-            safe_name = urllib.parse.quote(account_name, safe='')
-            return os.path.join(self.config_dir, f"{safe_name}.json")
+            return os.path.join(self.config_dir, account_file_name(account_name))
 
         def _get_account_config(config: Dict, account_name: Optional[str] = None) -> Dict:
             """Helper to resolve the correct account configuration."""
-
-            # Debugging
-            print(f"DEBUG: _get_account_config called with account_name='{account_name}'")
-
-            # If account_name is not provided, try "default"
-            target_account = account_name or "default"
-            print(f"DEBUG: target_account='{target_account}'")
-
-            # 1. Check if specific account file exists (e.g., 'default.json', 'work.json')
-            account_file = _get_account_file(target_account)
-            print(f"DEBUG: Checking specific file: {account_file}")
-            if os.path.exists(account_file):
-                 try:
-                    import json
-                    with open(account_file, "r") as f:
-                        print(f"DEBUG: Found specific file {account_file}")
-                        return json.load(f)
-                 except Exception as e:
-                     print(f"DEBUG: Failed to load {account_file}: {e}")
-                     pass
-
-            # 2. If requesting "default" and it doesn't exist, check if there are ANY files in the dir
-            if target_account == "default":
-                # Ensure directory exists before listing
-                if not os.path.exists(self.config_dir):
-                    os.makedirs(self.config_dir, exist_ok=True)
-
-                files = [f for f in os.listdir(self.config_dir) if f.endswith(".json")]
-                print(f"DEBUG: No specific 'default' file found. Scanning {self.config_dir}. Files: {files}")
-
-                if len(files) > 0:
-                     import urllib.parse
-
-                     # Check for specific priority names
-                     for priority in ["default.json", "main.json", "personal.json", "work.json"]:
-                         if priority in files:
-                             try:
-                                with open(os.path.join(self.config_dir, priority), "r") as f:
-                                    print(f"DEBUG: Found priority file {priority}")
-                                    return json.load(f)
-                             except:
-                                 pass
-
-                     # Fallback: Just pick the first one in the list (which is usually arbitrary but works)
-                     try:
-                        import json
-                        first_file = files[0]
-                        print(f"DEBUG: Fallback to first available file: {first_file}")
-                        with open(os.path.join(self.config_dir, first_file), "r") as f:
-                            return json.load(f)
-                     except Exception as e:
-                        print(f"DEBUG: Failed to load fallback {first_file}: {e}")
-                        pass
-
-            # 3. Fallback to global config (legacy env vars or config.json passed in)
-            if config.get("EMAIL_ADDRESS"):
-                return {
-                    "EMAIL_ADDRESS": config.get("EMAIL_ADDRESS"),
-                    "EMAIL_PASSWORD": config.get("EMAIL_PASSWORD"),
-                    "IMAP_SERVER": config.get("IMAP_SERVER"),
-                    "SMTP_SERVER": config.get("SMTP_SERVER")
-                }
-
-            return None
+            return self.accounts.resolve(account_name, fallback=config)
 
         @tool
-        def setup_email(email_address: str, password: str, imap_server: str, smtp_server: str, account_name: str = "default") -> str:
+        def setup_email(
+            email_address: str,
+            password: str,
+            imap_server: str,
+            smtp_server: str,
+            account_name: str = "default",
+            imap_port: int = None,
+            imap_ssl: bool = True,
+            smtp_port: int = None,
+            smtp_security: str = "starttls"
+        ) -> str:
             """
             Configure email settings for the user.
             Args:
@@ -165,7 +243,13 @@ class EmailSkill(Skill):
                 imap_server: IMAP server address (e.g., imap.gmail.com).
                 smtp_server: SMTP server address (e.g., smtp.gmail.com).
                 account_name: Optional name/alias for this account (default: "default").
+                imap_port: Optional IMAP port (default: 993 with SSL, 143 without).
+                imap_ssl: Whether to connect to IMAP over SSL (default: True).
+                smtp_port: Optional SMTP port (default: 587 for starttls, 465 for ssl, 25 for none).
+                smtp_security: "starttls" (default), "ssl" for implicit TLS, or "none".
             """
+            if smtp_security not in SECURITY_MODES:
+                return f"❌ smtp_security must be one of: {', '.join(SECURITY_MODES)}."
             import json
             try:
                 # IMPORTANT: If account_name is "default", we should check if there is ALREADY an existing single account
@@ -220,30 +304,26 @@ class EmailSkill(Skill):
                     "EMAIL_ADDRESS": email_address,
                     "EMAIL_PASSWORD": password,
                     "IMAP_SERVER": imap_server,
-                    "SMTP_SERVER": smtp_server
+                    "SMTP_SERVER": smtp_server,
+                    "IMAP_SSL": imap_ssl
                 }
+                if imap_port:
+                    account_data["IMAP_PORT"] = imap_port
+                account_data["SMTP_SECURITY"] = smtp_security
+                if smtp_port:
+                    account_data["SMTP_PORT"] = smtp_port
 
                 # Save to specific account file
                 account_file = _get_account_file(target_file_name)
                 with open(account_file, "w") as f:
                     json.dump(account_data, f, indent=2)
+                # Rewriting an existing file leaves the directory mtime unchanged
+                self.accounts.invalidate()
 
                 return f"✅ Email configuration saved for account '{target_file_name}' to {account_file}."
             except Exception as e:
                 return f"Failed to save configuration: {e}"
 
-        def _connect_imap(account_config):
-            email_user = account_config.get("EMAIL_ADDRESS")
-            email_pass = account_config.get("EMAIL_PASSWORD")
-            imap_server = account_config.get("IMAP_SERVER")
-
-            if not all([email_user, email_pass, imap_server]):
-                raise ValueError("Incomplete email configuration.")
-
-            mail = imaplib.IMAP4_SSL(imap_server)
-            mail.login(email_user, email_pass)
-            return mail
-
         @tool
         def check_inbox(limit: int = 5, account_name: str = None) -> str:
             """
@@ -263,41 +343,97 @@ class EmailSkill(Skill):
             if not account_config:
                 return f"No email configuration found for account '{account_name or 'default'}'. Please use 'setup_email' tool."
 
+            # A running IDLE watcher already holds the newest headers
+            watcher = get_watcher(account_config.get("EMAIL_ADDRESS"))
+            if watcher is not None and watcher.ready and len(watcher.headers(limit)) >= limit:
+                output = [f"Inbox for {account_config.get('EMAIL_ADDRESS')} (live):"]
+                for h in watcher.headers(limit):
+                    output.append(f"- [{h['uid']}] From: {h['from']} | Subject: {h['subject']}")
+                return "\n".join(output)
+
             try:
-                mail = _connect_imap(account_config)
-                mail.select("inbox")
+                with get_imap_pool(account_config).connection() as mail:
+                    select_folder(mail, "inbox")
+                    latest_uids = search_uids(mail, "ALL")[-limit:]
+                    # Headers only: bodies and attachments stay on the server
+                    headers = fetch_headers(mail, latest_uids)
 
-                status, messages = mail.search(None, "ALL")
-                if status != "OK":
+                if not headers:
                     return "No messages found."
 
-                email_ids = messages[0].split()
-                latest_ids = email_ids[-limit:]
-
                 output = [f"Inbox for {account_config.get('EMAIL_ADDRESS')}:"]
-                for e_id in reversed(latest_ids):
-                    status, msg_data = mail.fetch(e_id, "(RFC822)")
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-                            subject, encoding = decode_header(msg["Subject"])[0]
-                            if isinstance(subject, bytes):
-                                subject = subject.decode(encoding if encoding else "utf-8")
-                            from_ = msg.get("From")
-                            output.append(f"- [{e_id.decode()}] From: {from_} | Subject: {subject}")
-
-                mail.close()
-                mail.logout()
+                for h in reversed(headers):
+                    output.append(f"- [{h['uid']}] From: {h['from']} | Subject: {h['subject']}")
                 return "\n".join(output)
             except Exception as e:
                 return f"Error checking inbox: {str(e)}"
 
+        @tool
+        def query_emails(
+            sender: str = None,
+            subject: str = None,
+            since: str = None,
+            before: str = None,
+            days: int = None,
+            unread_only: bool = False,
+            limit: int = 20,
+            account_name: str = None,
+            folder: str = "inbox"
+        ) -> str:
+            """
+            Find emails on the mail server by sender, subject, date range or unread status.
+            The filters run on the server, so every matching email is found without downloading or embedding anything.
+            Prefer this over search_emails for filterable questions like "emails from MYOB since last week".
+            Args:
+                sender: Text contained in the From header (name or address, e.g. "myob.com").
+                subject: Text contained in the subject.
+                since: Only emails on or after this date (YYYY-MM-DD).
+                before: Only emails before this date (YYYY-MM-DD).
+                days: Only emails from the last N days (alternative to since).
+                unread_only: Only unread emails (default: False).
+                limit: Maximum number of emails listed, newest first (default: 20).
+                account_name: Optional account alias to use.
+                folder: Mailbox folder to search (default: "inbox").
+            """
+            account_config = _get_account_config(self.config, account_name)
+            if not account_config:
+                return "Missing email configuration. Please use 'setup_email' tool."
+
+            try:
+                since_date = datetime.date.fromisoformat(since) if since else None
+                before_date = datetime.date.fromisoformat(before) if before else None
+            except ValueError:
+                return "❌ Dates must be in YYYY-MM-DD format."
+            if days:
+                since_date = max(filter(None, [since_date, datetime.date.today() - datetime.timedelta(days=days)]))
+
+            try:
+                with get_imap_pool(account_config).connection() as mail:
+                    select_folder(mail, folder)
+                    uids = query_uids(
+                        mail, sender=sender, subject=subject, since=since_date, before=before_date, unread=unread_only
+                    )
+                    # Headers of the newest matches only
+                    headers = fetch_headers(mail, uids[-limit:]) if uids else []
+            except ValueError as e:
+                return f"❌ {e}"
+            except Exception as e:
+                return f"Error querying emails: {e}"
+
+            if not uids:
+                return f"No emails in {folder} match these filters."
+            output = [f"{len(uids)} emails in {folder} match; newest {len(headers)}:"]
+            for h in reversed(headers):
+                output.append(f"- [{h['uid']}] {h['date']} | From: {h['from']} | Subject: {h['subject']}")
+            return "\n".join(output)
+
         @tool
         def send_email(to: str, subject: str, body: str, account_name: str = None) -> str:
             """
-            Send an email.
+            Send an email. The message is queued and sent in the background, with retries
+            if the mail server is unreachable; use check_outbox to see delivery status.
             Args:
-                to: Recipient email address.
+                to: Recipient email address (several may be given, comma-separated).
                 subject: Email subject.
                 body: Email body content.
                 account_name: Optional account alias to use.
@@ -307,40 +443,52 @@ class EmailSkill(Skill):
                 return "Missing email configuration. Please use 'setup_email' tool."
 
             email_user = account_config.get("EMAIL_ADDRESS")
-            email_pass = account_config.get("EMAIL_PASSWORD")
-            smtp_server = account_config.get("SMTP_SERVER")
-
-            if not all([email_user, email_pass, smtp_server]):
+            if not account_config.get("SMTP_SERVER") or not account_config.get("EMAIL_PASSWORD"):
                 return "Missing SMTP configuration for this account."
-
             try:
-                server = smtplib.SMTP(smtp_server, 587)
-                server.starttls()
-                server.login(email_user, email_pass)
-
-                from email.mime.text import MIMEText
-                from email.utils import formatdate
-
-                # Create a proper MIME message
-                msg = MIMEText(body)
-                msg["Subject"] = subject
-                msg["From"] = email_user
-                msg["To"] = to
-                msg["Date"] = formatdate(localtime=True)
-
-                server.sendmail(email_user, to, msg.as_string())
-                server.quit()
-                return f"✅ Email sent to {to} from {email_user}"
+                msg = build_message(email_user, to, subject, body)
+                queue_id = self.outbox.enqueue(email_user, to, msg.as_string(), subject=subject)
+                return f"✅ Email to {to} from {email_user} queued (ID {queue_id}); it is being sent in the background."
+            except ValueError as e:
+                return f"❌ {e}"
             except Exception as e:
-                return f"Error sending email: {str(e)}"
+                return f"Error queueing email: {str(e)}"
 
         @tool
-        def download_emails(limit: int = 20, account_name: str = None) -> str:
+        def check_outbox() -> str:
+            """
+            Show outgoing emails that are still waiting to be sent or could not be delivered.
             """
-            Download recent emails and save them to the local vector database for semantic search.
+            pending = self.outbox.pending()
+            failed = self.outbox.failed()
+            if not pending and not failed:
+                return "✅ Outbox is empty; all emails have been sent."
+
+            output = []
+            if pending:
+                output.append(f"{len(pending)} email(s) waiting to be sent:")
+                for message in pending:
+                    line = f"- [{message['id']}] To: {', '.join(message['to'])} | Subject: {message['subject']}"
+                    if message["attempts"]:
+                        retry_at = datetime.datetime.fromtimestamp(message["next_attempt"]).strftime("%H:%M:%S")
+                        line += f" | {message['attempts']} failed attempt(s), retrying at {retry_at}: {message['last_error']}"
+                    output.append(line)
+            if failed:
+                output.append(f"❌ {len(failed)} email(s) could not be delivered:")
+                for message in failed:
+                    output.append(f"- [{message['id']}] To: {', '.join(message['to'])} | Subject: {message['subject']} | {message['last_error']}")
+            return "\n".join(output)
+
+        @tool
+        def download_emails(limit: int = 20, account_name: str = None, folder: str = "inbox", full_resync: bool = False) -> str:
+            """
+            Download new emails and save them to the local vector database for semantic search.
+            Only messages that arrived since the last download are fetched.
             Args:
-                limit: Number of emails to download (default: 20).
+                limit: Maximum number of new emails to download in this call (default: 20).
                 account_name: Optional account alias to use.
+                folder: Mailbox folder to sync (default: "inbox").
+                full_resync: Forget the sync state and re-scan the most recent messages (default: False).
             """
             vs = self._get_vectorstore()
             if not vs:
@@ -351,148 +499,207 @@ class EmailSkill(Skill):
                 return "Missing email configuration."
 
             try:
-                mail = _connect_imap(account_config)
-                mail.select("inbox")
-
-                status, messages = mail.search(None, "ALL")
-                if status != "OK":
-                    return "No messages found."
-
-                email_ids = messages[0].split()
-                latest_ids = email_ids[-limit:]
-
-                count = 0
-                documents = []
-
-                for e_id in reversed(latest_ids):
-                    # Fetch full message
-                    status, msg_data = mail.fetch(e_id, "(RFC822)")
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-
-                            # Extract Header Info
-                            subject, encoding = decode_header(msg["Subject"])[0]
-                            if isinstance(subject, bytes):
-                                subject = subject.decode(encoding if encoding else "utf-8")
-
-                            sender = msg.get("From")
-                            date_str = msg.get("Date")
-                            message_id = msg.get("Message-ID", "").strip()
-
-                            # Use Message-ID as unique ID for vector store if available
-                            doc_id = message_id if message_id else f"{account_config.get('EMAIL_ADDRESS')}_{e_id.decode()}"
-
-                            # Extract Body
-                            body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    content_type = part.get_content_type()
-                                    content_disposition = str(part.get("Content-Disposition"))
-
-                                    if "attachment" not in content_disposition:
-                                        try:
-                                            payload = part.get_payload(decode=True).decode()
-                                            if content_type == "text/plain":
-                                                body += payload
-                                            elif content_type == "text/html" and not body:
-                                                # Use HTML if no text/plain found yet
-                                                # Ideally strip tags but for now store raw HTML
-                                                body = payload
-                                        except: pass
-                            else:
-                                try:
-                                    body = msg.get_payload(decode=True).decode()
-                                except: pass
-
-                            if not body:
-                                body = "[No Text Content]"
-
-                            # Create Document
-                            full_content = f"Subject: {subject}\nFrom: {sender}\nDate: {date_str}\n\n{body}"
-                            meta = {
-                                "subject": subject,
-                                "sender": sender,
-                                "date": date_str,
-                                "message_id": message_id,
-                                "account": account_config.get("EMAIL_ADDRESS"),
-                                "timestamp": datetime.datetime.now().isoformat()
-                            }
-
-                            documents.append(Document(page_content=full_content, metadata=meta, id=doc_id))
-                            count += 1
-
-                if documents:
-                    vs.add_documents(documents)
-
-                mail.close()
-                mail.logout()
-                return f"✅ Downloaded and archived {count} emails."
+                with get_imap_pool(account_config).connection() as mail:
+                    result = self._sync_mailbox(mail, account_config, folder, limit=limit, full_resync=full_resync)
+
+                if result["fetched"] == 0 and not result["removed"]:
+                    return f"✅ {folder} is up to date, no new emails."
+                message = f"✅ Downloaded and archived {result['fetched']} new emails from {folder}."
+                if result["removed"]:
+                    message += f" Removed {result['removed']} deleted on the server."
+                if result["remaining"]:
+                    message += f" {result['remaining']} more new emails are waiting; run download_emails again."
+                return message
             except Exception as e:
                 return f"Error downloading emails: {e}"
 
         @tool
-        def search_emails(query: str, limit: int = 5) -> str:
+        def sync_all_emails(limit_per_account: int = 100, max_parallel: int = 4) -> str:
             """
-            Search for emails using semantic search (requires previously downloaded emails).
+            Download new emails from ALL configured accounts at once and archive them for search.
             Args:
-                query: Natural language query (e.g. "invoice from HostPapa").
-                limit: Number of results.
+                limit_per_account: Maximum new emails per account in this call (default: 100).
+                max_parallel: Number of accounts synced at the same time (default: 4).
             """
             vs = self._get_vectorstore()
             if not vs:
+                return "Vector store not initialized. Check OPENAI_API_KEY."
+            accounts = self._account_configs()
+            if not accounts:
+                return "No email accounts configured. Please use 'setup_email' tool."
+
+            start = time.perf_counter()
+            results = sync_accounts(
+                accounts,
+                self.sync_state,
+                self._archive_documents,
+                self._delete_documents,
+                limit=limit_per_account,
+                max_workers=max_parallel,
+                account_lock=lambda address: self._sync_locks.setdefault(address, threading.Lock())
+            )
+            elapsed = time.perf_counter() - start
+
+            total = sum(r["fetched"] for r in results)
+            output = [f"Synced {len(results)} accounts: {total} new emails in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} msg/s overall)."]
+            for r in results:
+                if r["error"]:
+                    output.append(f"❌ {r['account']}: {r['error']}")
+                    continue
+                line = f"✅ {r['account']}: {r['fetched']} new, {r['rate']:.1f} msg/s download+parse ({r['seconds']:.1f}s)"
+                if r["removed"]:
+                    line += f", {r['removed']} removed"
+                if r["remaining"]:
+                    line += f", {r['remaining']} more waiting"
+                output.append(line)
+            return "\n".join(output)
+
+        @tool
+        def watch_inbox(enable: bool = True, account_name: str = None) -> str:
+            """
+            Start or stop live inbox monitoring (IMAP IDLE). While on, new mail is archived
+            automatically and check_inbox answers instantly from local state.
+            Args:
+                enable: True to start watching, False to stop (default: True).
+                account_name: Optional account alias to use.
+            """
+            account_config = _get_account_config(self.config, account_name)
+            if not account_config:
+                return "Missing email configuration. Please use 'setup_email' tool."
+            address = account_config.get("EMAIL_ADDRESS")
+
+            if not enable:
+                if stop_watcher(address):
+                    return f"✅ Stopped watching {address}."
+                return f"{address} was not being watched."
+
+            watcher = start_watcher(account_config, on_new_mail=lambda mail: self._archive_new_mail(mail, account_config))
+            # Give the listener a moment to connect so configuration errors surface here
+            deadline = time.time() + 10
+            while time.time() < deadline and watcher.last_update is None and watcher.last_error is None:
+                time.sleep(0.1)
+            if watcher.last_error:
+                stop_watcher(address)
+                return f"❌ Could not watch {address}: {watcher.last_error}"
+            return f"✅ Watching {address} for new mail."
+
+        @tool
+        def search_emails(query: str, limit: int = 5, mode: str = "hybrid") -> str:
+            """
+            Search for emails using keyword and semantic search (requires previously downloaded emails).
+            Args:
+                query: Natural language query (e.g. "invoice from HostPapa").
+                limit: Number of results.
+                mode: "hybrid" (default), "keyword" for exact terms such as invoice numbers or names (no embedding call), or "semantic".
+            """
+            vs = self._get_vectorstore() if mode != "keyword" else self.vectorstore
+            if not vs and mode != "keyword":
                 return "Vector store not initialized. Please run 'download_emails' first."
 
             try:
-                results = vs.similarity_search(query, k=limit)
+                results = self._search_messages(vs, query, limit, mode)
                 if not results:
                     return "No matching emails found in local database. Try running 'download_emails' to fetch recent messages."
 
                 output = [f"Found {len(results)} relevant emails:"]
-                for i, doc in enumerate(results, 1):
+                for i, (message_id, doc) in enumerate(results, 1):
                     meta = doc.metadata
                     output.append(f"{i}. From: {meta.get('sender')} | Subject: {meta.get('subject')} | Date: {meta.get('date')}")
-                    output.append(f"   Summary: {doc.page_content[:200]}...")
+                    output.append(f"   ID: {message_id}")
+                    # The best matching passage rather than the start of the email
+                    snippet = " ".join(split_content(doc.page_content)[1].split())
+                    output.append(f"   Match: {snippet[:250]}{'...' if len(snippet) > 250 else ''}")
 
                 return "\n".join(output)
             except Exception as e:
                 return f"Error searching emails: {e}"
 
+        def _format_email(email: Dict, max_chars: int = None) -> str:
+            content = email["content"]
+            if max_chars and len(content) > max_chars:
+                content = content[:max_chars] + "\n[...]"
+            return f"**Subject:** {email.get('subject')}\n**From:** {email.get('sender')}\n**Date:** {email.get('date')}\n**ID:** {email.get('id')}\n\n{content}"
+
+        def _find_email(email_id: str = None, search_query: str = None) -> Optional[Dict]:
+            """Resolve an email by id (direct index lookup) or by the best search match."""
+            if email_id:
+                return self.email_store.lookup(email_id)
+            if search_query:
+                vs = self._get_vectorstore()
+                results = self._search_messages(vs, search_query, limit=1) if vs else []
+                if results:
+                    message_id, doc = results[0]
+                    # Only now load the complete message
+                    stored = self.email_store.get(message_id)
+                    if stored:
+                        return stored
+                    # Full text missing from the email store: the matching chunk is all we have
+                    meta = doc.metadata
+                    return {"id": message_id, "subject": meta.get("subject"), "sender": meta.get("sender"),
+                            "date": meta.get("date"), "content": doc.page_content}
+            return None
+
         @tool
-        def read_email(email_id: str = None, search_query: str = None) -> str:
+        def read_email(email_id: str = None, search_query: str = None, uid: int = None, account_name: str = None, folder: str = "inbox") -> str:
             """
             Read the full content of a specific email.
             Args:
-                email_id: Optional ID of the email to read (if known from search/list).
+                email_id: Optional ID of the email to read (the ID shown by search_emails, or its Message-ID).
                 search_query: Optional query to find the best matching email to read if ID is unknown.
+                uid: Optional IMAP UID, as shown in brackets by check_inbox.
+                account_name: Optional account alias the UID belongs to.
+                folder: Folder the UID belongs to (default: "inbox").
             """
-            vs = self._get_vectorstore()
-            if not vs:
-                return "Vector store not initialized."
-
-            target_doc = None
-
-            # If ID is provided, try to find it (this is a bit tricky with vector store unless we query by metadata)
-            # Chroma doesn't have a simple "get by ID" in LangChain interface usually, but we can filter.
-            # For simplicity, if search_query is provided, use that.
+            if uid is not None:
+                account_config = _get_account_config(self.config, account_name)
+                if not account_config:
+                    return "Missing email configuration. Please use 'setup_email' tool."
+                address = account_config.get("EMAIL_ADDRESS")
+                stored = self.email_store.get_by_uid(address, folder, uid)
+                if stored:
+                    return _format_email(stored)
+                # Not archived yet: fetch just this message
+                try:
+                    with get_imap_pool(account_config).connection() as mail:
+                        select_folder(mail, folder)
+                        item = uid_fetch(mail, [uid], "BODY.PEEK[]").get(uid)
+                except Exception as e:
+                    return f"Error reading email: {e}"
+                if not item or not item["data"]:
+                    return f"No email with UID {uid} in {folder}."
+                parsed = parse_message(item["data"], address, folder, uid)
+                return _format_email(dict(parsed["metadata"], id=parsed["id"], content=parsed["content"]))
+
+            if not email_id and not search_query:
+                return "Please provide an email ID, a UID or a search query (e.g., 'read email from MYOB')."
+
+            email = _find_email(email_id, search_query)
+            if email is None:
+                return "Email not found." if not email_id else f"No archived email with ID {email_id}. Use search_emails to find its ID."
+            return _format_email(email)
 
-            if search_query:
-                results = vs.similarity_search(search_query, k=1)
-                if results:
-                    target_doc = results[0]
-            elif email_id:
-                # Fallback: if user says "read email 1", we might need context of the last search.
-                # But since we are stateless here, "1" is meaningless unless we cached the last search.
-                # If email_id is a Message-ID (unlikely user types that), we could search.
-                # Let's assume user provides a search query like "read email from MYOB".
-                return "Please provide a search query to identify the email (e.g., 'read email from MYOB')."
-
-            if target_doc:
-                meta = target_doc.metadata
-                # Return FULL content (or at least a large chunk)
-                # We stored full content in page_content.
-                return f"**Subject:** {meta.get('subject')}\n**From:** {meta.get('sender')}\n**Date:** {meta.get('date')}\n\n{target_doc.page_content}"
-
-            return "Email not found."
-
-        return [setup_email, check_inbox, send_email, download_emails, search_emails, read_email]
+        @tool
+        def read_thread(email_id: str = None, search_query: str = None, max_chars_per_email: int = 2000) -> str:
+            """
+            Read a whole email conversation (all archived replies), oldest first.
+            Args:
+                email_id: ID of any email in the thread (as shown by search_emails).
+                search_query: Optional query to find an email of the thread if the ID is unknown.
+                max_chars_per_email: Characters shown per email (default: 2000).
+            """
+            if not email_id and not search_query:
+                return "Please provide an email ID or a search query."
+            email = _find_email(email_id, search_query)
+            if email is None:
+                return "Email not found."
+
+            thread = self.email_store.thread(email["id"])
+            if not thread:
+                return _format_email(email, max_chars_per_email)
+            output = [f"Thread with {len(thread)} emails:"]
+            for i, message in enumerate(thread, 1):
+                output.append(f"\n--- {i}/{len(thread)} ---")
+                output.append(_format_email(message, max_chars_per_email))
+            return "\n".join(output)
+
+        return [setup_email, check_inbox, query_emails, send_email, check_outbox, download_emails, sync_all_emails, watch_inbox, search_emails, read_email, read_thread]
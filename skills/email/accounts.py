@@ -0,0 +1,133 @@
+"""
+Email account registry.
+
+Account configs live as one JSON file per account in the email config
+directory. The registry reads them once, indexes them by alias and email
+address, and re-reads only when the directory's mtime changes (a file was
+added, removed or atomically replaced) or after invalidate().
+"""
+
+import os
+import json
+import logging
+import threading
+import urllib.parse
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Aliases tried, in order, when no account is named and there is no default.json
+PRIORITY_NAMES = ["default", "main", "personal", "work"]
+# Skill-level settings file in the same directory; not an account
+SETTINGS_FILE = "config.json"
+
+
+def account_file_name(account_name: str) -> str:
+    """File name of an account alias (aliases may be email addresses)."""
+    return urllib.parse.quote(account_name, safe="") + ".json"
+
+
+class AccountRegistry:
+    """Cached, mtime-invalidated view of the email account config files."""
+
+    def __init__(self, config_dir: str):
+        self.config_dir = config_dir
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_address: Dict[str, Dict[str, Any]] = {}
+
+    def invalidate(self):
+        """Force a reload on next use (in-place rewrites do not change the directory mtime)."""
+        with self._lock:
+            self._mtime = None
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.config_dir).st_mtime_ns
+        except FileNotFoundError:
+            os.makedirs(self.config_dir, exist_ok=True)
+            mtime = os.stat(self.config_dir).st_mtime_ns
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            by_name, by_address = {}, {}
+            for fname in sorted(os.listdir(self.config_dir)):
+                if not fname.endswith(".json") or fname == SETTINGS_FILE:
+                    continue
+                try:
+                    with open(os.path.join(self.config_dir, fname), "r") as f:
+                        data = json.load(f)
+                except Exception as e:
+                    logger.warning("Failed to load email account %s: %s", fname, e)
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                by_name[urllib.parse.unquote(fname[:-len(".json")])] = data
+                address = (data.get("EMAIL_ADDRESS") or "").lower()
+                if address:
+                    by_address.setdefault(address, data)
+            self._by_name, self._by_address, self._mtime = by_name, by_address, mtime
+            logger.debug("Loaded %d email accounts from %s", len(by_name), self.config_dir)
+
+    def names(self) -> List[str]:
+        self._refresh()
+        return list(self._by_name)
+
+    def by_address(self, address: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        data = self._by_address.get((address or "").lower())
+        return dict(data) if data else None
+
+    def accounts(self) -> List[Dict[str, Any]]:
+        """Every account with complete IMAP settings, one per address."""
+        self._refresh()
+        return [
+            dict(data) for data in self._by_address.values()
+            if data.get("EMAIL_PASSWORD") and data.get("IMAP_SERVER")
+        ]
+
+    def resolve(self, account_name: Optional[str] = None, fallback: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Resolve the config of an account.
+
+        Args:
+            account_name: Alias or email address; None (or "default") picks the primary account.
+            fallback: Global config used when no account file matches (legacy EMAIL_* settings).
+
+        Returns:
+            A copy of the account config, or None.
+        """
+        self._refresh()
+        target = account_name or "default"
+
+        data = self._by_name.get(target) or self._by_address.get(target.lower())
+        if data is not None:
+            logger.debug("Email account '%s' resolved from its config file", target)
+            return dict(data)
+
+        if target == "default" and self._by_name:
+            for name in PRIORITY_NAMES:
+                if name in self._by_name:
+                    logger.debug("Default email account resolved to '%s'", name)
+                    return dict(self._by_name[name])
+            # Any configured account will do
+            name = next((n for n, d in self._by_name.items() if d.get("EMAIL_ADDRESS")), next(iter(self._by_name)))
+            logger.debug("Default email account falling back to '%s'", name)
+            return dict(self._by_name[name])
+
+        if fallback and fallback.get("EMAIL_ADDRESS"):
+            logger.debug("Email account '%s' resolved from the global config", target)
+            return {
+                "EMAIL_ADDRESS": fallback.get("EMAIL_ADDRESS"),
+                "EMAIL_PASSWORD": fallback.get("EMAIL_PASSWORD"),
+                "IMAP_SERVER": fallback.get("IMAP_SERVER"),
+                "SMTP_SERVER": fallback.get("SMTP_SERVER"),
+                "IMAP_PORT": fallback.get("IMAP_PORT"),
+                "IMAP_SSL": fallback.get("IMAP_SSL", True),
+                "SMTP_PORT": fallback.get("SMTP_PORT"),
+                "SMTP_SECURITY": fallback.get("SMTP_SECURITY")
+            }
+
+        logger.debug("No email account found for '%s'", target)
+        return None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Email Throughput Benchmark
+Measures the IMAP/SMTP work behind check_inbox, download_emails and send_email
+against the local fake servers: time per operation, throughput, round trips
+(commands answered by the server) and bytes transferred. Runs offline, so
+results are reproducible and can be compared across changes.
+
+download_emails is measured up to the archive call; embedding is excluded
+since it depends on the embedding API rather than on the mail protocol.
+
+Usage:
+    python skills/email/benchmark_email.py [--messages 500] [--latency 0.02] [--limit 50] [--sends 20]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from skills.email.fake_server import FakeImapServer, FakeSmtpServer, generate_mailbox, account_config
+from skills.email.pool import ImapPool, connect_imap, _close
+from skills.email.smtp import SmtpPool, connect_smtp, build_message
+from skills.email.outbox import Outbox
+from skills.email.sync import SyncState, sync_folder, select_folder, search_uids, fetch_headers, fetch_documents
+
+
+def report(label, servers, elapsed, operations, unit="op"):
+    trips = sum(s.round_trips for s in servers)
+    sent = sum(s.bytes_sent + s.bytes_received for s in servers)
+    print(
+        f"  {label:<38} {elapsed / operations * 1000:>8.1f} ms/{unit} {operations / elapsed:>8.1f} {unit}/s "
+        f"{trips / operations:>6.1f} trips/{unit} {sent / operations / 1024:>9.1f} KB/{unit}"
+    )
+
+
+def list_inbox(mail, limit):
+    select_folder(mail, "inbox")
+    return fetch_headers(mail, search_uids(mail, "ALL")[-limit:])
+
+
+def bench_check_inbox(imap, config, limit, repeat):
+    print(f"check_inbox ({limit} newest headers):")
+    imap.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        mail = connect_imap(config)
+        list_inbox(mail, limit)
+        _close(mail)
+    report("new connection per call", [imap], time.perf_counter() - start, repeat, "call")
+
+    pool = ImapPool(config)
+    with pool.connection():
+        pass
+    imap.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with pool.connection() as mail:
+            list_inbox(mail, limit)
+    report("pooled connection", [imap], time.perf_counter() - start, repeat, "call")
+    pool.close()
+
+
+def bench_download(imap, config, limit, new_messages):
+    print("download_emails (archive step excluded):")
+    state_dir = tempfile.mkdtemp(prefix="email-bench-")
+    try:
+        state = SyncState(os.path.join(state_dir, "sync_state.db"))
+        mail = connect_imap(config)
+        archived = []
+
+        imap.reset_counters()
+        start = time.perf_counter()
+        result = sync_folder(mail, config["EMAIL_ADDRESS"], "inbox", state, archived.extend, lambda ids: None,
+                             limit=limit, fetch=fetch_documents)
+        report(f"first sync, {result['fetched']} messages", [imap], time.perf_counter() - start, result["fetched"], "msg")
+
+        for raw in generate_mailbox(new_messages, seed=1):
+            imap.add_message(raw)
+        imap.reset_counters()
+        start = time.perf_counter()
+        result = sync_folder(mail, config["EMAIL_ADDRESS"], "inbox", state, archived.extend, lambda ids: None,
+                             limit=new_messages, fetch=fetch_documents)
+        report(f"incremental sync, {result['fetched']} new", [imap], time.perf_counter() - start, result["fetched"], "msg")
+
+        imap.reset_counters()
+        start = time.perf_counter()
+        sync_folder(mail, config["EMAIL_ADDRESS"], "inbox", state, archived.extend, lambda ids: None, limit=limit)
+        elapsed = time.perf_counter() - start
+        print(f"  {'up-to-date check':<38} {elapsed * 1000:>8.1f} ms      {imap.round_trips:>6d} trips")
+        _close(mail)
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def bench_send(smtp, config, sends):
+    print(f"send_email ({sends} messages):")
+    user = config["EMAIL_ADDRESS"]
+    smtp.reset_counters()
+    start = time.perf_counter()
+    for i in range(sends):
+        server = connect_smtp(config)
+        server.sendmail(user, "friend@example.com", build_message(user, "friend@example.com", f"Note {i}", "Hello " * 50).as_string())
+        server.quit()
+    report("new session per message", [smtp], time.perf_counter() - start, sends, "msg")
+
+    pool = SmtpPool(config)
+    smtp.reset_counters()
+    start = time.perf_counter()
+    for i in range(sends):
+        with pool.connection() as server:
+            server.sendmail(user, "friend@example.com", build_message(user, "friend@example.com", f"Note {i}", "Hello " * 50).as_string())
+    report("pooled session", [smtp], time.perf_counter() - start, sends, "msg")
+    pool.close()
+
+    # What the send_email tool waits for now: building the message and a durable enqueue
+    state_dir = tempfile.mkdtemp(prefix="email-bench-")
+    try:
+        outbox = Outbox(os.path.join(state_dir, "outbox.jsonl"), lambda address: config)
+        smtp.reset_counters()
+        start = time.perf_counter()
+        for i in range(sends):
+            outbox.enqueue(user, "friend@example.com", build_message(user, "friend@example.com", f"Note {i}", "Hello " * 50).as_string())
+        queued = time.perf_counter() - start
+        outbox.flush(timeout=60)
+        drained = time.perf_counter() - start
+        print(f"  {'queued (tool latency)':<38} {queued / sends * 1000:>8.1f} ms/msg")
+        report("queued (until all delivered)", [smtp], drained, sends, "msg")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email tool throughput against fake IMAP/SMTP servers")
+    parser.add_argument("--messages", type=int, default=500, help="Messages in the fake inbox")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated latency per command (s)")
+    parser.add_argument("--limit", type=int, default=50, help="Messages listed/downloaded per call")
+    parser.add_argument("--sends", type=int, default=20, help="Messages sent")
+    parser.add_argument("--repeat", type=int, default=5, help="check_inbox calls")
+    args = parser.parse_args()
+
+    imap = FakeImapServer(generate_mailbox(args.messages), latency=args.latency)
+    smtp = FakeSmtpServer(latency=args.latency)
+    imap.start()
+    smtp.start()
+    config = account_config(imap, smtp)
+    try:
+        print(f"{args.messages} messages, {args.latency * 1000:.0f} ms latency per command\n")
+        bench_check_inbox(imap, config, args.limit, args.repeat)
+        print()
+        bench_download(imap, config, args.limit, args.limit)
+        print()
+        bench_send(smtp, config, args.sends)
+    finally:
+        smtp.stop()
+        imap.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Embedding Size Benchmark
+Measures recall@k against storage for reduced-dimension embeddings and for the
+optional quantized copy, using the documents already in the local email archive
+(or the content cache with --collection user_cache).
+
+Chroma always stores float32 vectors plus its HNSW graph. Reducing dimensions
+shrinks that; a float16/int8 copy (EMBEDDING_QUANTIZATION) is stored on top of
+it, so its bytes are reported as extra, and its linear scan is compared with a
+Chroma HNSW query over the same vectors when chromadb is installed.
+
+text-embedding-3-small vectors can be shortened by truncating and re-normalizing,
+so every document is embedded once at full size and each smaller size is derived
+from that, which matches what the API returns for `dimensions=N`.
+
+Usage:
+    python skills/email/benchmark_embeddings.py [--collection email_archive] [--queries 50] [--k 10]
+    python skills/email/benchmark_embeddings.py --synthetic 5000   # no API key or archive needed
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from core.paths import paths
+from core.quantized_index import quantize
+
+DIMENSIONS = [1536, 1024, 512, 256]
+QUANTIZATIONS = ["float32", "float16", "int8"]
+MODEL = "text-embedding-3-small"
+
+
+def load_documents(collection_name, limit):
+    import chromadb
+    data_dir = {"email_archive": "emails", "user_cache": "cache"}.get(collection_name, collection_name)
+    client = chromadb.PersistentClient(path=paths.get_skill_data_dir(data_dir))
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    # Any dimension of the collection will do, only the stored text is used
+    name = next((n for n in names if n == collection_name or n.startswith(collection_name + "_d")), None)
+    if name is None:
+        print(f"Error: No '{collection_name}' collection found. Run download_emails first.")
+        sys.exit(1)
+    data = client.get_collection(name).get(limit=limit, include=["documents", "metadatas"])
+    return [(d, m or {}) for d, m in zip(data["documents"], data["metadatas"]) if d]
+
+
+def embed(texts, batch_size=100):
+    from langchain_openai import OpenAIEmbeddings
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        try:
+            with open(paths.global_config_file, "r") as f:
+                api_key = json.load(f).get("OPENAI_API_KEY")
+        except Exception:
+            pass
+    if not api_key:
+        print("Error: OPENAI_API_KEY not set.")
+        sys.exit(1)
+    model = OpenAIEmbeddings(api_key=api_key, model=MODEL)
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(model.embed_documents([t[:8000] for t in texts[start:start + batch_size]]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def shorten(vectors, dimensions):
+    short = vectors[:, :dimensions]
+    return short / np.linalg.norm(short, axis=1, keepdims=True)
+
+
+def top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def hnsw_search(vectors, queries, k):
+    """Recall inputs and per-query latency of a Chroma HNSW query, or None without chromadb."""
+    try:
+        import chromadb
+    except ImportError:
+        return None
+    client = chromadb.EphemeralClient()
+    name = f"benchmark_{vectors.shape[1]}"
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    collection = client.create_collection(name=name, metadata={"hnsw:space": "ip"})
+    for start in range(0, len(vectors), 5000):
+        chunk = vectors[start:start + 5000]
+        collection.add(ids=[str(i) for i in range(start, start + len(chunk))], embeddings=chunk.tolist())
+    start = time.perf_counter()
+    found = [
+        [int(i) for i in collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])["ids"][0]]
+        for q in queries
+    ]
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    client.delete_collection(name)
+    return found, elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs memory for compact embeddings")
+    parser.add_argument("--collection", default="email_archive", help="email_archive or user_cache")
+    parser.add_argument("--limit", type=int, default=2000, help="Max documents to load")
+    parser.add_argument("--queries", type=int, default=50, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    parser.add_argument("--rerank", type=int, default=4, help="Re-rank factor for quantized scans")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random unit vectors instead of real data")
+    args = parser.parse_args()
+
+    random.seed(0)
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        doc_vectors = rng.normal(size=(args.synthetic, DIMENSIONS[0])).astype(np.float32)
+        doc_vectors /= np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+        # Queries are perturbed documents, so each has genuine near neighbours
+        picks = rng.choice(len(doc_vectors), size=args.queries, replace=False)
+        query_vectors = doc_vectors[picks] + rng.normal(scale=0.03, size=(args.queries, DIMENSIONS[0])).astype(np.float32)
+        query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    else:
+        documents = load_documents(args.collection, args.limit)
+        print(f"Loaded {len(documents)} documents from {args.collection}.")
+        # Subjects/titles make realistic short queries over our own data
+        query_texts = [m.get("subject") or m.get("title") for _, m in documents]
+        query_texts = [q for q in query_texts if q]
+        query_texts = random.sample(query_texts, min(args.queries, len(query_texts)))
+        start = time.time()
+        doc_vectors = embed([d for d, _ in documents])
+        query_vectors = embed(query_texts)
+        print(f"Embedded {len(documents)} documents and {len(query_texts)} queries in {time.time() - start:.1f}s.")
+
+    n, k = len(doc_vectors), min(args.k, len(doc_vectors))
+    truth = top_k(doc_vectors, query_vectors, k)
+    baseline_bytes = doc_vectors.nbytes
+
+    print(
+        f"\n{'dims':>5} {'search':>14} {'chroma MB':>10} {'extra MB':>9} {'vs 1536':>8} "
+        f"{f'recall@{k}':>10} {'+rerank':>8} {'ms/query':>9}"
+    )
+    for dimensions in DIMENSIONS:
+        vectors = shorten(doc_vectors, dimensions)
+        queries = shorten(query_vectors, dimensions)
+        # What Chroma keeps at this size, whatever the quantization setting
+        chroma_bytes = vectors.nbytes
+        hnsw = hnsw_search(vectors, queries, k)
+        if hnsw is not None:
+            found, hnsw_ms = hnsw
+            print(
+                f"{dimensions:>5} {'hnsw':>14} {chroma_bytes / 1e6:>10.2f} {0:>9.2f} "
+                f"{chroma_bytes / baseline_bytes - 1:>+8.0%} {recall(found, truth):>10.3f} {'-':>8} {hnsw_ms:>9.2f}"
+            )
+        for storage in QUANTIZATIONS:
+            if storage == "float32":
+                values, scales, extra = vectors, None, 0
+            else:
+                values, scales = quantize(vectors, storage)
+                extra = values.nbytes + (scales.nbytes if scales is not None else 0)
+
+            start = time.perf_counter()
+            scores = queries @ values.astype(np.float32).T
+            if scales is not None:
+                scores *= scales[None, :]
+            order = np.argsort(-scores, axis=1)
+            scan_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+            plain = recall(order[:, :k], truth)
+            # Re-rank the wider candidate set with the float32 vectors Chroma keeps at this size
+            candidates = order[:, :k * args.rerank]
+            reranked = [
+                c[np.argsort(-(vectors[c] @ q))][:k] for c, q in zip(candidates, queries)
+            ]
+            print(
+                f"{dimensions:>5} {'scan ' + storage:>14} {chroma_bytes / 1e6:>10.2f} {extra / 1e6:>9.2f} "
+                f"{(chroma_bytes + extra) / baseline_bytes - 1:>+8.0%} "
+                f"{plain:>10.3f} {recall(reranked, truth):>8.3f} {scan_ms:>9.2f}"
+            )
+
+    print(
+        f"\n{n} documents, {len(query_vectors)} queries. 'extra' is the quantized copy kept next to Chroma's "
+        f"float32 vectors; 'vs 1536' compares the total with 1536-dim float32 (HNSW graph not included)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+IMAP Fetch Benchmark
+Compares the old per-message RFC822 fetches with batched UID FETCH against the
+local fake IMAP server: inbox listing (full messages vs header fields only) and
+archiving (one round trip per message vs batched BODY.PEEK[]).
+
+Usage:
+    python skills/email/benchmark_fetch.py [--messages 500] [--limit 50] [--latency 0.02]
+"""
+
+import os
+import sys
+import time
+import email
+import imaplib
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from skills.email.fake_server import FakeImapServer, generate_mailbox
+from skills.email.sync import select_folder, search_uids, fetch_headers, uid_fetch
+
+USER, PASSWORD = "me@example.com", "secret"
+
+
+def connect(server):
+    host, port = server.address
+    mail = imaplib.IMAP4(host, port)
+    mail.login(USER, PASSWORD)
+    return mail
+
+
+def legacy_list(mail, limit):
+    """check_inbox before: SEARCH ALL, then one FETCH (RFC822) per message."""
+    mail.select("inbox")
+    _, messages = mail.search(None, "ALL")
+    rows = []
+    for e_id in reversed(messages[0].split()[-limit:]):
+        _, msg_data = mail.fetch(e_id, "(RFC822)")
+        for part in msg_data:
+            if isinstance(part, tuple):
+                msg = email.message_from_bytes(part[1])
+                rows.append((msg.get("From"), msg.get("Subject")))
+    return rows
+
+
+def batched_list(mail, limit):
+    select_folder(mail, "inbox")
+    return fetch_headers(mail, search_uids(mail, "ALL")[-limit:])
+
+
+def legacy_archive(mail, limit):
+    mail.select("inbox")
+    _, messages = mail.search(None, "ALL")
+    raws = []
+    for e_id in messages[0].split()[-limit:]:
+        _, msg_data = mail.fetch(e_id, "(RFC822)")
+        raws.extend(part[1] for part in msg_data if isinstance(part, tuple))
+    return raws
+
+
+def batched_archive(mail, limit):
+    select_folder(mail, "inbox")
+    items = uid_fetch(mail, search_uids(mail, "ALL")[-limit:], "BODY.PEEK[]")
+    return [item["data"] for item in items.values()]
+
+
+def measure(server, label, fn, limit, repeat):
+    mail = connect(server)
+    server.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(mail, limit)
+    elapsed = (time.perf_counter() - start) / repeat
+    commands = sum(server.commands.values()) / repeat
+    sent = server.bytes_sent / repeat
+    mail.logout()
+    print(f"  {label:<34} {elapsed * 1000:>9.1f} ms {commands:>8.0f} cmds {sent / 1e6:>9.2f} MB  ({len(result)} msgs)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IMAP fetch strategies against a fake server")
+    parser.add_argument("--messages", type=int, default=500, help="Messages in the fake inbox")
+    parser.add_argument("--limit", type=int, default=50, help="Messages listed/archived per call")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated round-trip latency (s)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    server = FakeImapServer(generate_mailbox(args.messages), user=USER, password=PASSWORD, latency=args.latency)
+    server.start()
+    try:
+        print(f"{args.messages} messages, limit {args.limit}, {args.latency * 1000:.0f} ms latency per command\n")
+        print("check_inbox (listing):")
+        old = measure(server, "per-message FETCH (RFC822)", legacy_list, args.limit, args.repeat)
+        new = measure(server, "batched UID FETCH header fields", batched_list, args.limit, args.repeat)
+        print(f"  speed-up: {old / new:.1f}x\n")
+
+        print("download_emails (archiving):")
+        old = measure(server, "per-message FETCH (RFC822)", legacy_archive, args.limit, args.repeat)
+        new = measure(server, "batched UID FETCH BODY.PEEK[]", batched_archive, args.limit, args.repeat)
+        print(f"  speed-up: {old / new:.1f}x")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
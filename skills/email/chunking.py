@@ -0,0 +1,151 @@
+"""
+Email chunking.
+
+Archived emails are embedded as token-bounded chunks rather than one document
+per message, so long mails neither exceed the embedding limit nor get diluted
+into a single vector. Each chunk repeats the subject/sender/date header lines
+and carries its parent's id in metadata["message_id"]; the full text lives in
+the EmailStore and is only loaded when an email is read.
+"""
+
+from typing import List, Any, Dict
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    Document = None
+
+# Body tokens per chunk and tokens repeated from the previous chunk
+CHUNK_TOKENS = 400
+CHUNK_OVERLAP = 50
+CHUNK_SEPARATOR = "#chunk"
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding, tiktoken
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # e.g. the encoding file cannot be downloaded; estimate from now on
+            tiktoken = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the embedding models' encoding, or ~4 chars per token without tiktoken."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _split_long(paragraph: str, max_tokens: int) -> List[str]:
+    """Break a paragraph longer than max_tokens into word windows."""
+    pieces, current, current_tokens = [], [], 0
+    for word in paragraph.split(" "):
+        word_tokens = count_tokens(word + " ")
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_text(text: str, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, packing whole paragraphs where possible.
+
+    Args:
+        text: The text to split.
+        max_tokens: Token budget per chunk.
+        overlap: Tokens of trailing paragraphs repeated at the start of the next chunk.
+
+    Returns:
+        The chunks, in order; a single chunk for short text.
+    """
+    units = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens > max_tokens:
+            units.extend((piece, count_tokens(piece)) for piece in _split_long(paragraph, max_tokens))
+        else:
+            units.append((paragraph, tokens))
+
+    chunks: List[str] = []
+    current: List[tuple] = []
+    current_tokens = 0
+    for unit in units:
+        if current and current_tokens + unit[1] > max_tokens:
+            chunks.append("\n".join(u[0] for u in current))
+            # Carry trailing paragraphs over so context spanning the cut is searchable
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap or carried_tokens + previous[1] + unit[1] > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += unit[1]
+    if current:
+        chunks.append("\n".join(u[0] for u in current))
+    return chunks or [text.strip()]
+
+
+def chunk_id(parent_id: str, index: int) -> str:
+    return f"{parent_id}{CHUNK_SEPARATOR}{index}"
+
+
+def parent_id(doc_id: str) -> str:
+    """The message id a chunk id belongs to (legacy whole-message ids map to themselves)."""
+    return doc_id.split(CHUNK_SEPARATOR, 1)[0]
+
+
+def split_content(content: str):
+    """Split archived content into its header block and body."""
+    header, _, body = content.partition("\n\n")
+    return header, body
+
+
+def chunk_document(document: Any, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP) -> List[Any]:
+    """
+    Split an archived email Document into chunk Documents.
+
+    Args:
+        document: A Document built by sync.parse_message (id = the message's document id).
+        max_tokens: Body tokens per chunk.
+        overlap: Tokens repeated between consecutive chunks.
+
+    Returns:
+        Documents with ids "<message id>#chunk<N>" and metadata "message_id", "chunk" and "chunks".
+    """
+    header, body = split_content(document.page_content)
+    pieces = split_text(body, max_tokens, overlap) if body.strip() else [""]
+    chunks = []
+    for index, piece in enumerate(pieces):
+        metadata: Dict[str, Any] = dict(document.metadata)
+        # Thread links are kept in the EmailStore; a long References header would bloat every chunk
+        metadata.pop("references", None)
+        metadata.update({"message_id": document.id, "chunk": index, "chunks": len(pieces)})
+        chunks.append(Document(
+            page_content=f"{header}\n\n{piece}" if piece else header,
+            metadata=metadata,
+            id=chunk_id(document.id, index)
+        ))
+    return chunks
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Fake IMAP/SMTP Server
+Small in-process IMAP4rev1 and SMTP stand-ins for benchmarks and local testing
+of the email skill without a real mail account. Plaintext only (connect with
+IMAP_SSL=false and SMTP_SECURITY=none). Every command costs a configurable
+latency and is counted, so round trips can be measured.
+
+The IMAP server Supports LOGIN, SELECT/EXAMINE, STATUS, SEARCH (ALL, UID,
+FROM, TO, SUBJECT, SINCE, BEFORE, SEEN/UNSEEN, with literals), FETCH and their
+UID variants, IDLE, NOOP, CLOSE and LOGOUT. SINCE/BEFORE compare the Date
+header rather than the internal date. The SMTP server supports EHLO/HELO,
+AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP and QUIT, and can deliver what
+it receives into a fake IMAP inbox.
+
+Usage:
+    python skills/email/fake_server.py --messages 500 --latency 0.02
+"""
+
+import re
+import time
+import base64
+import random
+import argparse
+import threading
+import select
+import socketserver
+import datetime
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from email.utils import formatdate, make_msgid, parsedate_to_datetime
+from typing import List, Optional, Dict
+
+_HEADER_FIELDS_RE = re.compile(r"BODY(?:\.PEEK)?\[HEADER\.FIELDS \(([^)]*)\)\]", re.IGNORECASE)
+_LITERAL_RE = re.compile(rb"\{(\d+)\}\r?\n$")
+_TOKEN_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+
+
+def generate_mailbox(
+    count: int,
+    body_size: int = 2000,
+    attachment_every: int = 5,
+    attachment_size: int = 200_000,
+    seed: int = 0
+) -> List[bytes]:
+    """Build `count` raw RFC822 messages; every `attachment_every`-th carries a base64 attachment."""
+    rng = random.Random(seed)
+    words = ["invoice", "meeting", "project", "update", "report", "travel", "sydney", "budget",
+             "review", "schedule", "contract", "delivery", "payment", "team", "quarter", "launch"]
+    messages = []
+    for i in range(count):
+        subject = " ".join(rng.choice(words) for _ in range(4)).capitalize() + f" #{i}"
+        sender = f"sender{i % 37}@example.com"
+        body = " ".join(rng.choice(words) for _ in range(body_size // 7))
+        headers = (
+            f"From: {sender}\r\n"
+            f"To: me@example.com\r\n"
+            f"Subject: {subject}\r\n"
+            f"Date: {formatdate(time.time() - (count - i) * 3600)}\r\n"
+            f"Message-ID: {make_msgid(idstring=str(i), domain='fake.local')}\r\n"
+            f"MIME-Version: 1.0\r\n"
+        )
+        if attachment_every and i % attachment_every == 0:
+            blob = bytes(rng.getrandbits(8) for _ in range(min(attachment_size, 4096)))
+            blob = (blob * (attachment_size // len(blob) + 1))[:attachment_size]
+            encoded = base64.encodebytes(blob).decode().replace("\n", "\r\n")
+            raw = (
+                headers +
+                'Content-Type: multipart/mixed; boundary="BOUNDARY"\r\n\r\n'
+                "--BOUNDARY\r\nContent-Type: text/plain; charset=utf-8\r\n\r\n"
+                f"{body}\r\n"
+                "--BOUNDARY\r\nContent-Type: application/pdf\r\n"
+                'Content-Disposition: attachment; filename="file.pdf"\r\n'
+                "Content-Transfer-Encoding: base64\r\n\r\n"
+                f"{encoded}\r\n--BOUNDARY--\r\n"
+            )
+        else:
+            raw = headers + "Content-Type: text/plain; charset=utf-8\r\n\r\n" + body + "\r\n"
+        messages.append(raw.encode())
+    return messages
+
+
+def _parse_set(spec: str, max_value: int) -> List[int]:
+    """Parse an IMAP sequence set such as "1:5,7,9:*"."""
+    values = []
+    for part in spec.split(","):
+        if ":" in part:
+            lo, hi = part.split(":", 1)
+            lo = max_value if lo == "*" else int(lo)
+            hi = max_value if hi == "*" else int(hi)
+            lo, hi = min(lo, hi), max(lo, hi)
+            values.extend(range(lo, hi + 1))
+        else:
+            values.append(max_value if part == "*" else int(part))
+    return values
+
+
+def _header_text(raw: bytes, name: str) -> str:
+    value = message_from_bytes(raw.split(b"\r\n\r\n", 1)[0]).get(name) or ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+def _message_date(raw: bytes) -> Optional[datetime.date]:
+    try:
+        return parsedate_to_datetime(_header_text(raw, "Date")).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_fields(raw: bytes, names: List[str]) -> bytes:
+    head = raw.split(b"\r\n\r\n", 1)[0]
+    wanted = {n.lower() for n in names}
+    lines, keep = [], False
+    for line in head.split(b"\r\n"):
+        if line[:1] in (b" ", b"\t"):
+            if keep:
+                lines.append(line)
+            continue
+        keep = line.split(b":", 1)[0].decode(errors="replace").strip().lower() in wanted
+        if keep:
+            lines.append(line)
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Small responses must not wait on delayed ACKs, or latency numbers are meaningless
+    disable_nagle_algorithm = True
+
+    def send(self, data: bytes):
+        self.server.owner.bytes_sent += len(data)
+        self.wfile.write(data)
+
+    def handle(self):
+        owner = self.server.owner
+        self.selected: Optional[List[int]] = None
+        self.send(b"* OK [CAPABILITY IMAP4rev1] Fake IMAP ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            # Literal arguments: {n} at the end of the line, then n bytes after a continuation
+            while _LITERAL_RE.search(line):
+                size = int(_LITERAL_RE.search(line).group(1))
+                self.send(b"+ Ready for literal\r\n")
+                literal = self.rfile.read(size)
+                line = line[:_LITERAL_RE.search(line).start()] + b'"' + literal.replace(b'"', b'\\"') + b'"' + self.rfile.readline()
+            owner.bytes_received += len(line)
+            parts = line.decode(errors="replace").rstrip("\r\n").split(" ", 2)
+            if len(parts) < 2:
+                continue
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ""
+            owner.count_command(command)
+            if owner.latency:
+                time.sleep(owner.latency)
+            try:
+                if not self.dispatch(tag, command, args):
+                    return
+            except Exception as e:
+                self.send(f"{tag} BAD {e}\r\n".encode())
+
+    def dispatch(self, tag: str, command: str, args: str) -> bool:
+        owner = self.server.owner
+        if command == "CAPABILITY":
+            self.send(b"* CAPABILITY IMAP4rev1 IDLE\r\n" + f"{tag} OK CAPABILITY completed\r\n".encode())
+        elif command == "LOGIN":
+            user, password = [a.strip('"') for a in args.split(" ", 1)]
+            if user == owner.user and password == owner.password:
+                self.send(f"{tag} OK LOGIN completed\r\n".encode())
+            else:
+                self.send(f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials\r\n".encode())
+        elif command in ("SELECT", "EXAMINE"):
+            self.selected = owner.uids
+            mode = "READ-ONLY" if command == "EXAMINE" else "READ-WRITE"
+            self.send((
+                f"* {len(owner.uids)} EXISTS\r\n* 0 RECENT\r\n"
+                f"* OK [UIDVALIDITY {owner.uidvalidity}] UIDs valid\r\n"
+                f"* OK [UIDNEXT {(owner.uids[-1] if owner.uids else 0) + 1}] Predicted next UID\r\n"
+                f"{tag} OK [{mode}] {command} completed\r\n"
+            ).encode())
+        elif command == "STATUS":
+            mailbox = args.split(" ", 1)[0]
+            self.send((
+                f"* STATUS {mailbox} (MESSAGES {len(owner.uids)} UIDVALIDITY {owner.uidvalidity})\r\n"
+                f"{tag} OK STATUS completed\r\n"
+            ).encode())
+        elif command == "SEARCH":
+            self.search(tag, args, by_uid=False)
+        elif command == "FETCH":
+            self.fetch(tag, args, by_uid=False)
+        elif command == "UID":
+            sub, _, rest = args.partition(" ")
+            if sub.upper() == "SEARCH":
+                self.search(tag, rest, by_uid=True)
+            elif sub.upper() == "FETCH":
+                self.fetch(tag, rest, by_uid=True)
+            else:
+                self.send(f"{tag} BAD Unsupported UID command\r\n".encode())
+        elif command == "IDLE":
+            self.idle(tag)
+        elif command == "NOOP":
+            self.send(f"{tag} OK NOOP completed\r\n".encode())
+        elif command == "CLOSE":
+            self.selected = None
+            self.send(f"{tag} OK CLOSE completed\r\n".encode())
+        elif command == "LOGOUT":
+            self.send(b"* BYE Logging out\r\n" + f"{tag} OK LOGOUT completed\r\n".encode())
+            return False
+        else:
+            self.send(f"{tag} BAD Unknown command {command}\r\n".encode())
+        return True
+
+    def idle(self, tag: str):
+        """Push EXISTS/EXPUNGE while the client idles, until it sends DONE."""
+        owner = self.server.owner
+        self.send(b"+ idling\r\n")
+        seen = len(owner.uids)
+        while True:
+            readable, _, _ = select.select([self.connection], [], [], 0.05)
+            if readable:
+                line = self.rfile.readline()
+                if not line or line.strip().upper() == b"DONE":
+                    break
+            count = len(owner.uids)
+            if count > seen:
+                self.send(f"* {count} EXISTS\r\n".encode())
+            elif count < seen:
+                self.send(f"* {seen} EXPUNGE\r\n".encode())
+            seen = count
+        self.send(f"{tag} OK IDLE terminated\r\n".encode())
+
+    def search(self, tag: str, criteria: str, by_uid: bool):
+        owner = self.server.owner
+        uids = owner.uids
+        criteria = criteria.strip()
+        if criteria.upper().startswith("CHARSET"):
+            criteria = criteria.split(" ", 2)[2] if criteria.count(" ") >= 2 else "ALL"
+        tokens = [bare or quoted.replace('\\"', '"') for quoted, bare in _TOKEN_RE.findall(criteria)]
+        matched = list(uids)
+        i = 0
+        while i < len(tokens):
+            key = tokens[i].upper()
+            arg = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if key == "ALL":
+                i += 1
+                continue
+            if key in ("UNSEEN", "SEEN"):
+                matched = [u for u in matched if (u in owner.seen) == (key == "SEEN")]
+                i += 1
+                continue
+            if key == "UID":
+                wanted = set(_parse_set(arg, uids[-1] if uids else 0))
+                matched = [u for u in matched if u in wanted]
+            elif key in ("FROM", "TO", "SUBJECT"):
+                needle = arg.lower()
+                matched = [u for u in matched if needle in _header_text(owner.messages[u], key).lower()]
+            elif key in ("SINCE", "BEFORE"):
+                day = datetime.datetime.strptime(arg, "%d-%b-%Y").date()
+                dates = {u: _message_date(owner.messages[u]) for u in matched}
+                if key == "SINCE":
+                    matched = [u for u in matched if dates[u] and dates[u] >= day]
+                else:
+                    matched = [u for u in matched if dates[u] and dates[u] < day]
+            else:
+                raise ValueError(f"Unsupported search key {key}")
+            i += 2
+        if by_uid:
+            result = matched
+        else:
+            positions = {u: i + 1 for i, u in enumerate(uids)}
+            result = [positions[u] for u in matched]
+        self.send(f"* SEARCH {' '.join(map(str, result))}\r\n{tag} OK SEARCH completed\r\n".encode())
+
+    def fetch(self, tag: str, args: str, by_uid: bool):
+        owner = self.server.owner
+        spec, _, items = args.partition(" ")
+        items_upper = items.upper()
+        uids = owner.uids
+        if by_uid:
+            wanted = set(_parse_set(spec, uids[-1] if uids else 0))
+            targets = [(i + 1, u) for i, u in enumerate(uids) if u in wanted]
+        else:
+            targets = [(s, uids[s - 1]) for s in _parse_set(spec, len(uids)) if 1 <= s <= len(uids)]
+
+        fields_match = _HEADER_FIELDS_RE.search(items)
+        for seq, uid in targets:
+            raw = owner.messages[uid]
+            out = [f"UID {uid}"] if by_uid or "UID" in items_upper else []
+            if "RFC822.SIZE" in items_upper:
+                out.append(f"RFC822.SIZE {len(raw)}")
+            literal = None
+            if fields_match:
+                literal = _header_fields(raw, fields_match.group(1).split())
+                out.append(f"BODY[HEADER.FIELDS ({fields_match.group(1).upper()})] {{{len(literal)}}}")
+            elif "BODY.PEEK[]" in items_upper or "BODY[]" in items_upper:
+                literal = raw
+                if "BODY[]" in items_upper:
+                    owner.seen.add(uid)
+                out.append(f"BODY[] {{{len(literal)}}}")
+            elif re.search(r"\bRFC822\b(?!\.)", items_upper):
+                literal = raw
+                out.append(f"RFC822 {{{len(literal)}}}")
+            head = f"* {seq} FETCH (" + " ".join(out)
+            if literal is None:
+                self.send((head + ")\r\n").encode())
+            else:
+                self.send(head.encode() + b"\r\n" + literal + b")\r\n")
+        self.send(f"{tag} OK FETCH completed\r\n".encode())
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _FakeServer:
+    """Shared server thread, latency and round-trip accounting."""
+
+    handler = None
+
+    def __init__(self, user: str, password: str, latency: float, host: str, port: int):
+        self.user = user
+        self.password = password
+        self.latency = latency
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.commands: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = _TCPServer((host, port), self.handler)
+        self._server.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    @property
+    def round_trips(self) -> int:
+        """Commands answered since the last reset_counters()."""
+        return sum(self.commands.values())
+
+    def count_command(self, command: str):
+        with self._lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.commands = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{type(self).__name__}", daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeImapServer(_FakeServer):
+    """In-process IMAP stand-in serving a fixed INBOX."""
+
+    handler = _Handler
+
+    def __init__(
+        self,
+        messages: List[bytes],
+        user: str = "me@example.com",
+        password: str = "secret",
+        latency: float = 0.0,
+        uidvalidity: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        super().__init__(user, password, latency, host, port)
+        self.uidvalidity = uidvalidity
+        self.messages: Dict[int, bytes] = {i + 1: raw for i, raw in enumerate(messages)}
+        self.uids: List[int] = sorted(self.messages)
+        # UIDs with the \Seen flag (set by non-PEEK body fetches)
+        self.seen = set()
+
+    def add_message(self, raw: bytes) -> int:
+        uid = (self.uids[-1] if self.uids else 0) + 1
+        self.messages[uid] = raw
+        self.uids.append(uid)
+        return uid
+
+    def delete_message(self, uid: int):
+        self.messages.pop(uid, None)
+        self.uids = [u for u in self.uids if u != uid]
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def send(self, data: bytes):
+        self.server.owner.bytes_sent += len(data)
+        self.wfile.write(data)
+
+    def reply(self, text: str):
+        self.send(text.encode() + b"\r\n")
+
+    def readline(self) -> bytes:
+        line = self.rfile.readline()
+        self.server.owner.bytes_received += len(line)
+        return line
+
+    def handle(self):
+        owner = self.server.owner
+        self.authenticated = False
+        self.envelope = None
+        self.reply("220 fake.local ESMTP ready")
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            text = line.decode(errors="replace").rstrip("\r\n")
+            verb, _, args = text.partition(" ")
+            verb = verb.upper()
+            owner.count_command(verb)
+            if owner.latency:
+                time.sleep(owner.latency)
+            if not self.dispatch(verb, args):
+                return
+
+    def _check_login(self, user: str, password: str):
+        owner = self.server.owner
+        self.authenticated = user == owner.user and password == owner.password
+        self.reply("235 2.7.0 Authentication successful" if self.authenticated else "535 5.7.8 Invalid credentials")
+
+    def dispatch(self, verb: str, args: str) -> bool:
+        owner = self.server.owner
+        if verb == "EHLO":
+            self.reply("250-fake.local\r\n250-AUTH PLAIN LOGIN\r\n250-SIZE 52428800\r\n250 8BITMIME")
+        elif verb == "HELO":
+            self.reply("250 fake.local")
+        elif verb == "AUTH":
+            mechanism, _, initial = args.partition(" ")
+            if mechanism.upper() == "PLAIN":
+                if not initial:
+                    self.reply("334 ")
+                    initial = self.readline().decode().strip()
+                _, user, password = base64.b64decode(initial).decode(errors="replace").split("\0", 2)
+                self._check_login(user, password)
+            elif mechanism.upper() == "LOGIN":
+                self.reply("334 VXNlcm5hbWU6")
+                user = base64.b64decode(self.readline().strip()).decode(errors="replace")
+                self.reply("334 UGFzc3dvcmQ6")
+                password = base64.b64decode(self.readline().strip()).decode(errors="replace")
+                self._check_login(user, password)
+            else:
+                self.reply("504 5.5.4 Unrecognized authentication type")
+        elif verb == "MAIL":
+            if not self.authenticated:
+                self.reply("530 5.7.0 Authentication required")
+            else:
+                self.envelope = {"from": args.partition(":")[2].strip().strip("<>"), "to": []}
+                self.reply("250 2.1.0 OK")
+        elif verb == "RCPT":
+            if self.envelope is None:
+                self.reply("503 5.5.1 MAIL first")
+            else:
+                self.envelope["to"].append(args.partition(":")[2].strip().strip("<>"))
+                self.reply("250 2.1.5 OK")
+        elif verb == "DATA":
+            if not self.envelope or not self.envelope["to"]:
+                self.reply("503 5.5.1 RCPT first")
+                return True
+            if owner.fail_next > 0:
+                owner.fail_next -= 1
+                self.reply("451 4.3.0 Temporary failure, try again later")
+                self.envelope = None
+                return True
+            self.reply("354 End data with <CR><LF>.<CR><LF>")
+            lines = []
+            while True:
+                line = self.readline()
+                if not line or line in (b".\r\n", b".\n"):
+                    break
+                # Undo dot-stuffing
+                lines.append(line[1:] if line.startswith(b"..") else line)
+            owner.deliver(self.envelope["from"], self.envelope["to"], b"".join(lines))
+            self.envelope = None
+            self.reply("250 2.0.0 OK queued")
+        elif verb == "RSET":
+            self.envelope = None
+            self.reply("250 2.0.0 OK")
+        elif verb == "NOOP":
+            self.reply("250 2.0.0 OK")
+        elif verb == "QUIT":
+            self.reply("221 2.0.0 Bye")
+            return False
+        else:
+            self.reply(f"502 5.5.2 Command {verb} not implemented")
+        return True
+
+
+class FakeSmtpServer(_FakeServer):
+    """In-process SMTP stand-in that keeps every message it accepts."""
+
+    handler = _SmtpHandler
+
+    def __init__(
+        self,
+        user: str = "me@example.com",
+        password: str = "secret",
+        latency: float = 0.0,
+        deliver_to: Optional[FakeImapServer] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Args:
+            user: Accepted login.
+            password: Accepted password.
+            latency: Seconds added to every command.
+            deliver_to: Optional fake IMAP server whose inbox receives accepted messages.
+            host: Interface to listen on.
+            port: Port to listen on (0 = any free port).
+        """
+        super().__init__(user, password, latency, host, port)
+        self.deliver_to = deliver_to
+        self.received: List[Dict] = []
+        # Number of upcoming DATA commands answered with a temporary failure
+        self.fail_next = 0
+
+    def deliver(self, sender: str, recipients: List[str], data: bytes):
+        with self._lock:
+            self.received.append({"from": sender, "to": recipients, "data": data})
+        if self.deliver_to is not None:
+            self.deliver_to.add_message(data)
+
+
+def account_config(imap: Optional[FakeImapServer] = None, smtp: Optional[FakeSmtpServer] = None) -> Dict:
+    """Account settings that point the email skill at running fake servers."""
+    server = imap or smtp
+    config = {"EMAIL_ADDRESS": server.user, "EMAIL_PASSWORD": server.password}
+    if imap is not None:
+        config.update({"IMAP_SERVER": imap.address[0], "IMAP_PORT": imap.address[1], "IMAP_SSL": False})
+    if smtp is not None:
+        config.update({"SMTP_SERVER": smtp.address[0], "SMTP_PORT": smtp.address[1], "SMTP_SECURITY": "none"})
+    return config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fake IMAP and SMTP servers")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every command")
+    parser.add_argument("--port", type=int, default=1143, help="IMAP port")
+    parser.add_argument("--smtp-port", type=int, default=1025)
+    args = parser.parse_args()
+
+    server = FakeImapServer(generate_mailbox(args.messages), latency=args.latency, port=args.port)
+    smtp_server = FakeSmtpServer(latency=args.latency, deliver_to=server, port=args.smtp_port)
+    host, port = server.start()
+    _, smtp_port = smtp_server.start()
+    print(f"Fake IMAP listening on {host}:{port} (user me@example.com / secret, IMAP_SSL=false)")
+    print(f"Fake SMTP listening on {host}:{smtp_port} (SMTP_SECURITY=none); sent mail lands in the IMAP inbox")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        smtp_server.stop()
+        server.stop()
@@ -0,0 +1,218 @@
+"""
+IMAP IDLE watcher.
+
+Holds a dedicated connection in IDLE (RFC 2177) on one folder and keeps the
+newest message headers in memory, so check_inbox can answer from local state.
+New mail can also be handed to a callback, e.g. to archive it incrementally.
+imaplib has no IDLE support before Python 3.14, so the exchange is done on
+the raw socket.
+"""
+
+import re
+import time
+import select
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+from .pool import connect_imap, _close
+from .sync import select_folder, search_uids, fetch_headers
+
+# Servers drop IDLE after 30 minutes; re-issue it well before that
+IDLE_REFRESH = 25 * 60
+_UNTAGGED_RE = re.compile(rb"^\* (\d+) (EXISTS|EXPUNGE)", re.IGNORECASE)
+
+
+class IdleWatcher:
+    """Background IDLE listener for one account/folder."""
+
+    def __init__(
+        self,
+        account_config: Dict[str, Any],
+        folder: str = "inbox",
+        keep: int = 200,
+        on_new_mail: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Args:
+            account_config: The account settings.
+            folder: Folder to watch.
+            keep: Number of newest headers kept in memory.
+            on_new_mail: Optional callback run with the watcher's connection whenever
+                new messages arrive (the folder is selected read-only).
+        """
+        self.account_config = dict(account_config)
+        self.account = account_config.get("EMAIL_ADDRESS")
+        self.folder = folder
+        self.keep = keep
+        self.on_new_mail = on_new_mail
+
+        self._lock = threading.Lock()
+        self._headers: Dict[int, Dict[str, Any]] = {}
+        self._uidvalidity: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_update: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def ready(self) -> bool:
+        """True once headers are loaded and the listener is connected."""
+        return self.running and self.last_update is not None and self.last_error is None
+
+    def headers(self, limit: int) -> List[Dict[str, Any]]:
+        """Newest `limit` headers, newest first."""
+        with self._lock:
+            return [self._headers[uid] for uid in sorted(self._headers, reverse=True)[:limit]]
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"imap-idle-{self.account}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh(self, mail, full: bool = False) -> bool:
+        """
+        Load headers of messages not seen yet and drop expunged ones.
+        Returns True if messages newer than the last known state arrived, also
+        across a reconnect (full=True), but not on the very first load.
+        """
+        uidvalidity = select_folder(mail, self.folder)
+        uids = search_uids(mail, "ALL")
+        with self._lock:
+            # Highest UID seen before this call; None on the first load or a UIDVALIDITY change
+            high = max(self._headers, default=0) if uidvalidity == self._uidvalidity else None
+            if full or uidvalidity != self._uidvalidity:
+                self._headers = {}
+                self._uidvalidity = uidvalidity
+            known = set(self._headers)
+        newest = uids[-self.keep:]
+        new_uids = [uid for uid in newest if uid not in known]
+        fetched = fetch_headers(mail, new_uids) if new_uids else []
+
+        with self._lock:
+            present = set(newest)
+            for uid in list(self._headers):
+                if uid not in present:
+                    del self._headers[uid]
+            for header in fetched:
+                self._headers[header["uid"]] = header
+            self.last_update = time.time()
+        return high is not None and bool(uids) and uids[-1] > high
+
+    def _idle(self, mail) -> bool:
+        """
+        Enter IDLE and wait for EXISTS/EXPUNGE, a refresh timeout or stop().
+        Returns True if the mailbox changed.
+        """
+        sock = mail.sock
+        tag = mail._new_tag()
+        sock.sendall(tag + b" IDLE\r\n")
+
+        buffer = b""
+        changed = False
+        started = False
+        deadline = time.time() + IDLE_REFRESH
+        while not self._stop.is_set() and time.time() < deadline and not (started and changed):
+            pending = getattr(sock, "pending", lambda: 0)()
+            if not pending:
+                readable, _, _ = select.select([sock], [], [], 1.0)
+                if not readable:
+                    continue
+            data = sock.recv(65536)
+            if not data:
+                raise ConnectionError("Server closed the IDLE connection.")
+            buffer += data
+            while b"\r\n" in buffer:
+                line, buffer = buffer.split(b"\r\n", 1)
+                if line.startswith(b"+"):
+                    started = True
+                elif line.startswith(tag):
+                    raise ConnectionError(f"IDLE rejected: {line.decode(errors='replace')}")
+                elif _UNTAGGED_RE.match(line):
+                    changed = True
+
+        # Leave IDLE and consume everything up to the tagged completion
+        sock.sendall(b"DONE\r\n")
+        while not re.search(re.escape(tag) + rb" (OK|NO|BAD)[^\r\n]*\r\n", buffer):
+            readable, _, _ = select.select([sock], [], [], 30.0)
+            if not readable:
+                raise ConnectionError("Timed out leaving IDLE.")
+            data = sock.recv(65536)
+            if not data:
+                raise ConnectionError("Server closed the IDLE connection.")
+            buffer += data
+        # Changes reported between our DONE and the server's completion
+        if re.search(rb"\* \d+ (EXISTS|EXPUNGE)", buffer, re.IGNORECASE):
+            changed = True
+        mail.tagged_commands.pop(tag, None)
+        return changed
+
+    def _new_mail(self, mail):
+        if self.on_new_mail is None:
+            return
+        try:
+            self.on_new_mail(mail)
+        except Exception as e:
+            print(f"Warning: New-mail handler failed for {self.account}: {e}")
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            mail = None
+            try:
+                mail = connect_imap(self.account_config)
+                # After a reconnect this picks up mail that arrived while we were disconnected
+                had_new = self._refresh(mail, full=True)
+                self.last_error = None
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if had_new:
+                        self._new_mail(mail)
+                    if self._idle(mail):
+                        had_new = self._refresh(mail)
+                    else:
+                        had_new = False
+                        # Refresh timeout: NOOP keeps the session alive before re-entering IDLE
+                        mail.noop()
+            except Exception as e:
+                self.last_error = str(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 300.0)
+            finally:
+                if mail is not None:
+                    _close(mail)
+
+
+# Account address -> watcher
+_watchers: Dict[str, IdleWatcher] = {}
+
+
+def get_watcher(account: str) -> Optional[IdleWatcher]:
+    return _watchers.get(account)
+
+
+def start_watcher(account_config: Dict[str, Any], on_new_mail: Optional[Callable[[Any], None]] = None) -> IdleWatcher:
+    """Start (or return the running) watcher for an account."""
+    account = account_config.get("EMAIL_ADDRESS")
+    watcher = _watchers.get(account)
+    if watcher is None or not watcher.running:
+        watcher = IdleWatcher(account_config, on_new_mail=on_new_mail)
+        _watchers[account] = watcher
+        watcher.start()
+    return watcher
+
+
+def stop_watcher(account: str) -> bool:
+    watcher = _watchers.pop(account, None)
+    if watcher is None:
+        return False
+    watcher.stop()
+    return True
@@ -0,0 +1,166 @@
+"""
+Streaming MIME body extraction.
+
+Walks a raw RFC822 message part by part using byte offsets, without building
+the full email.message tree. Only text/plain and text/html leaves are ever
+decoded; attachment payloads are skipped in place. Text is decoded with its
+declared charset, HTML is reduced to plain text, and the result is capped
+before anything is embedded.
+"""
+
+import re
+import quopri
+import binascii
+from email.parser import BytesHeaderParser
+from email.message import Message
+from typing import List, Tuple, Optional
+
+from core.html_text import html_to_text
+
+# Upper bound on the extracted body, in UTF-8 bytes
+MAX_BODY_BYTES = 32 * 1024
+# Nested multiparts beyond this depth are ignored
+MAX_DEPTH = 10
+
+_HEADER_END_RE = re.compile(rb"\r?\n\r?\n")
+_header_parser = BytesHeaderParser()
+
+
+def _split_headers(data: bytes, start: int, end: int) -> Tuple[Message, int]:
+    """Parse the header block at data[start:end]; returns (headers, body offset)."""
+    match = _HEADER_END_RE.search(data, start, end)
+    if match is None:
+        # Headers only, no body
+        return _header_parser.parsebytes(data[start:end]), end
+    return _header_parser.parsebytes(data[start:match.start()]), match.end()
+
+
+def _decode_payload(headers: Message, payload: bytes) -> str:
+    encoding = (headers.get("Content-Transfer-Encoding") or "").strip().lower()
+    try:
+        if encoding == "base64":
+            # The payload may have been cut short; decode whole 4-char groups only
+            payload = b"".join(payload.split())
+            payload = binascii.a2b_base64(payload[:len(payload) - len(payload) % 4])
+        elif encoding == "quoted-printable":
+            payload = quopri.decodestring(payload)
+    except (binascii.Error, ValueError):
+        pass
+
+    charset = headers.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        # Unknown charset label
+        return payload.decode("utf-8", errors="replace")
+
+
+def _is_attachment(headers: Message) -> bool:
+    disposition = (headers.get("Content-Disposition") or "").strip().lower()
+    return disposition.startswith("attachment") or (
+        "filename=" in disposition and not disposition.startswith("inline")
+    )
+
+
+def _find_delimiter(data: bytes, delimiter: bytes, start: int, end: int) -> Optional[Tuple[int, int, bool]]:
+    """
+    Find the next boundary delimiter line in data[start:end].
+
+    Per RFC 2046 a delimiter starts a line and is followed only by optional
+    whitespace and the line break, or by "--" for the closing delimiter, so
+    boundary text inside a body line does not count.
+
+    Returns:
+        (delimiter offset, offset of the next line, closing), or None.
+    """
+    position = data.find(delimiter, start, end)
+    while position != -1:
+        after = position + len(delimiter)
+        closing = data.startswith(b"--", after, end)
+        if closing:
+            after += 2
+        line_end = data.find(b"\n", after, end)
+        next_line = line_end + 1 if line_end != -1 else end
+        at_line_start = position == start or data[position - 1:position] == b"\n"
+        if at_line_start and not data[after:next_line].strip(b" \t\r\n"):
+            return position, next_line, closing
+        position = data.find(delimiter, after, end)
+    return None
+
+
+def _walk(data: bytes, start: int, end: int, headers: Message, plain: List[str], html: List[str],
+          budget: List[int], depth: int = 0):
+    """Collect decoded text leaves of the part spanning data[start:end]."""
+    if budget[0] <= 0 or depth > MAX_DEPTH:
+        return
+
+    content_type = headers.get_content_type()
+    if content_type.startswith("multipart/"):
+        boundary = headers.get_param("boundary")
+        if not boundary:
+            return
+        delimiter = b"--" + boundary.encode("latin-1", errors="replace")
+        found = _find_delimiter(data, delimiter, start, end)
+        while found is not None and budget[0] > 0:
+            _, part_start, closing = found
+            if closing or part_start >= end:
+                return
+            found = _find_delimiter(data, delimiter, part_start, end)
+            part_end = found[0] if found is not None else end
+            # The line break before a delimiter belongs to the delimiter
+            if data.endswith(b"\r\n", part_start, part_end):
+                part_end -= 2
+            elif data.endswith(b"\n", part_start, part_end):
+                part_end -= 1
+            part_headers, body_start = _split_headers(data, part_start, part_end)
+            _walk(data, body_start, part_end, part_headers, plain, html, budget, depth + 1)
+        return
+
+    if _is_attachment(headers) or content_type not in ("text/plain", "text/html"):
+        # Skipped without decoding: attachments, images, nested messages, calendars...
+        return
+
+    # Never decode more than the remaining budget needs: base64 expands text by 4/3,
+    # and HTML markup typically outweighs its visible text several times over
+    raw_limit = budget[0] * (8 if content_type == "text/html" else 2) + 4
+    payload = data[start:min(end, start + raw_limit)]
+    text = _decode_payload(headers, payload)
+    target = plain if content_type == "text/plain" else html
+    target.append(text)
+    if content_type == "text/plain":
+        budget[0] -= len(text.encode("utf-8", errors="replace"))
+
+
+def _truncate(text: str, max_bytes: int) -> str:
+    encoded = text.encode("utf-8", errors="replace")
+    if len(encoded) <= max_bytes:
+        return text
+    marker = " [truncated]"
+    cut = encoded[:max(0, max_bytes - len(marker))].decode("utf-8", errors="ignore")
+    return cut.rsplit(" ", 1)[0] + marker
+
+
+def extract_message(raw: bytes, max_bytes: int = MAX_BODY_BYTES) -> Tuple[Message, str]:
+    """
+    Extract headers and a readable text body from a raw message.
+
+    Args:
+        raw: The RFC822 bytes.
+        max_bytes: Cap on the returned body, in UTF-8 bytes.
+
+    Returns:
+        (headers, body). The body prefers text/plain parts and falls back to
+        HTML converted to text; it is empty if the message has no text.
+    """
+    headers, body_start = _split_headers(raw, 0, len(raw))
+    plain: List[str] = []
+    html: List[str] = []
+    _walk(raw, body_start, len(raw), headers, plain, html, [max_bytes])
+
+    if any(p.strip() for p in plain):
+        body = "\n".join(p.strip() for p in plain if p.strip())
+    elif html:
+        body = "\n".join(html_to_text(h, max_chars=max_bytes) for h in html)
+    else:
+        body = ""
+    return headers, _truncate(body, max_bytes)
@@ -0,0 +1,278 @@
+"""
+Outbound email queue.
+
+send_email appends the fully built message to a durable local journal and
+returns; a background worker delivers queued mail over pooled SMTP sessions,
+one session per account for a whole batch. Temporary failures (4xx replies,
+dropped connections) are retried with exponential backoff, permanent ones
+(5xx replies) and messages out of attempts are kept as failed for reporting.
+Messages still queued when the process exits are replayed from the journal
+and sent once start() is called again.
+"""
+
+import os
+import json
+import time
+import uuid
+import smtplib
+import threading
+from email.utils import getaddresses
+from typing import List, Dict, Any, Optional, Callable
+
+from .smtp import get_smtp_pool
+
+MAX_ATTEMPTS = 8
+# Retry delays: 30s, 1m, 2m, 4m ... capped at 1h
+RETRY_BASE = 30.0
+RETRY_MAX = 3600.0
+# Failed messages remembered for check_outbox
+KEEP_FAILED = 50
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE * 2 ** max(0, attempts - 1), RETRY_MAX)
+
+
+class Outbox:
+    """Durable queue of outgoing messages with a background sender."""
+
+    def __init__(
+        self,
+        journal_path: str,
+        get_account_config: Callable[[str], Optional[Dict[str, Any]]],
+        batch_size: int = 50,
+        compact_after: int = 500
+    ):
+        """
+        Args:
+            journal_path: JSONL journal file.
+            get_account_config: Resolves a sender address to its account config at send
+                time, so passwords never enter the journal.
+            batch_size: Messages sent per worker pass.
+            compact_after: Journal lines after which an idle queue rewrites the journal.
+        """
+        self.journal_path = journal_path
+        self.get_account_config = get_account_config
+        self.batch_size = batch_size
+        self.compact_after = compact_after
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._failed: List[Dict[str, Any]] = []
+        self._journal_lines = 0
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"queued": 0, "sent": 0, "retries": 0, "failed": 0, "last_error": None}
+
+        self._replay()
+
+    def _replay(self):
+        """Recover messages that were queued but never sent."""
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    self._journal_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    op = record.get("op")
+                    if op == "queue":
+                        self._pending[record["id"]] = record
+                    elif op == "retry" and record["id"] in self._pending:
+                        self._pending[record["id"]].update(
+                            attempts=record["attempts"], next_attempt=record["next_attempt"], last_error=record["error"]
+                        )
+                    elif op == "done":
+                        for message_id in record.get("ids", []):
+                            self._pending.pop(message_id, None)
+                    elif op == "failed":
+                        message = self._pending.pop(record["id"], None)
+                        if message is not None:
+                            self._failed.append(dict(message, last_error=record["error"]))
+        except Exception as e:
+            print(f"Warning: Failed to replay email outbox {self.journal_path}: {e}")
+        self._failed = self._failed[-KEEP_FAILED:]
+
+    def _append(self, records: List[Dict[str, Any]]):
+        """Append records to the journal and fsync before returning."""
+        with open(self.journal_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(records)
+
+    def _compact(self):
+        """Rewrite the journal with only queued and recently failed messages."""
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for message in self._failed:
+                f.write(json.dumps(dict(message, op="queue")) + "\n")
+                f.write(json.dumps({"op": "failed", "id": message["id"], "error": message.get("last_error")}) + "\n")
+            for message in self._pending.values():
+                f.write(json.dumps(message) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._journal_lines = len(self._pending) + 2 * len(self._failed)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, sender: str, to: str, message: str, subject: str = "") -> str:
+        """
+        Durably queue a message for delivery.
+
+        Args:
+            sender: The sending account's address (envelope sender).
+            to: Recipients, comma-separated.
+            message: The complete RFC822 message text.
+            subject: Subject, for status listings.
+
+        Returns:
+            The queue id.
+        """
+        recipients = [address for _, address in getaddresses([to]) if address]
+        if not recipients:
+            raise ValueError(f"No valid recipient address in '{to}'.")
+        record = {
+            "op": "queue",
+            "id": uuid.uuid4().hex[:12],
+            "from": sender,
+            "to": recipients,
+            "subject": subject,
+            "message": message,
+            "queued_at": time.time(),
+            "attempts": 0,
+            "next_attempt": 0,
+            "last_error": None,
+        }
+        with self._lock:
+            self._append([record])
+            self._pending[record["id"]] = record
+            self.stats["queued"] += 1
+            self._wakeup.notify()
+        self.start()
+        return record["id"]
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Queued messages (without their bodies), oldest first."""
+        with self._lock:
+            return [{k: v for k, v in r.items() if k != "message"} for r in self._pending.values()]
+
+    def failed(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{k: v for k, v in r.items() if k != "message"} for r in self._failed]
+
+    def _next_due(self) -> List[Dict[str, Any]]:
+        """Wait for messages whose next attempt is due."""
+        with self._lock:
+            while True:
+                now = time.time()
+                due = [r for r in self._pending.values() if r["next_attempt"] <= now]
+                if due:
+                    return due[:self.batch_size]
+                waits = [r["next_attempt"] - now for r in self._pending.values()]
+                self._wakeup.wait(min(waits) if waits else None)
+
+    def _sent(self, message_id: str):
+        """Journal one accepted message before the next is sent, so a crash cannot resend it."""
+        with self._lock:
+            self._pending.pop(message_id, None)
+            self._append([{"op": "done", "ids": [message_id]}])
+            self.stats["sent"] += 1
+
+    def _finish(self, retry: List[tuple], failed: List[tuple]):
+        """Record the outcome of a pass: (record, error) to retry, (record, error) that failed."""
+        with self._lock:
+            records = []
+            for record, error in retry:
+                record["attempts"] += 1
+                if record["attempts"] >= MAX_ATTEMPTS:
+                    failed.append((record, f"Gave up after {record['attempts']} attempts: {error}"))
+                    continue
+                record["next_attempt"] = time.time() + retry_delay(record["attempts"])
+                record["last_error"] = error
+                records.append({
+                    "op": "retry", "id": record["id"], "attempts": record["attempts"],
+                    "next_attempt": record["next_attempt"], "error": error
+                })
+                self.stats["retries"] += 1
+                self.stats["last_error"] = error
+            for record, error in failed:
+                self._pending.pop(record["id"], None)
+                self._failed.append(dict(record, last_error=error))
+                records.append({"op": "failed", "id": record["id"], "error": error})
+                self.stats["failed"] += 1
+                self.stats["last_error"] = error
+            self._failed = self._failed[-KEEP_FAILED:]
+            if records:
+                self._append(records)
+            if not self._pending and self._journal_lines >= self.compact_after:
+                self._compact()
+
+    def _send_account(self, sender: str, records: List[Dict[str, Any]]):
+        retry, failed = [], []
+        account_config = self.get_account_config(sender)
+        if not account_config:
+            self._finish([], [(r, f"No email account configured for {sender}.") for r in records])
+            return
+
+        remaining = list(records)
+        try:
+            with get_smtp_pool(account_config).connection() as server:
+                while remaining:
+                    record = remaining[0]
+                    try:
+                        refused = server.sendmail(record["from"], record["to"], record["message"])
+                        self._sent(record["id"])
+                        if refused:
+                            print(f"Warning: Email {record['id']} was refused for {', '.join(refused)}")
+                    except smtplib.SMTPRecipientsRefused as e:
+                        codes = [code for code, _ in e.recipients.values()]
+                        error = f"All recipients refused: {e.recipients}"
+                        (failed if all(code >= 500 for code in codes) else retry).append((record, error))
+                    except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                        error = f"{e.smtp_code} {e.smtp_error.decode(errors='replace') if isinstance(e.smtp_error, bytes) else e.smtp_error}"
+                        (failed if e.smtp_code >= 500 else retry).append((record, error))
+                    remaining.pop(0)
+        except (smtplib.SMTPException, OSError, ValueError) as e:
+            # Could not connect or the session dropped: everything not yet sent is retried
+            retry.extend((record, str(e)) for record in remaining)
+        self._finish(retry, failed)
+
+    def _run(self):
+        while True:
+            batch = self._next_due()
+            by_sender: Dict[str, List[Dict[str, Any]]] = {}
+            for record in batch:
+                by_sender.setdefault(record["from"], []).append(record)
+            for sender, records in by_sender.items():
+                try:
+                    self._send_account(sender, records)
+                except Exception as e:
+                    # Never let one bad message stop the worker; retry it later
+                    self._finish([(r, str(e)) for r in records if r["id"] in self._pending], [])
+
+    def start(self):
+        """Start the background sender (idempotent)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until no message is due for sending. Returns False on timeout."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not any(r["next_attempt"] <= time.time() for r in self._pending.values()):
+                    return True
+                self._wakeup.notify()
+            time.sleep(0.05)
+        return False
@@ -0,0 +1,157 @@
+"""
+IMAP connection pool.
+
+Keeps logged-in IMAP connections per account so tool calls skip the TLS
+handshake and LOGIN. Connections idle for a while are checked with NOOP
+before reuse and replaced transparently when the server has dropped them.
+"""
+
+import time
+import socket
+import imaplib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+
+def connect_imap(account_config: Dict[str, Any], timeout: float = 30.0):
+    """Open and log in a new IMAP connection for an account config."""
+    email_user = account_config.get("EMAIL_ADDRESS")
+    email_pass = account_config.get("EMAIL_PASSWORD")
+    imap_server = account_config.get("IMAP_SERVER")
+
+    if not all([email_user, email_pass, imap_server]):
+        raise ValueError("Incomplete email configuration.")
+
+    use_ssl = str(account_config.get("IMAP_SSL", True)).lower() not in ("false", "0", "no")
+    port = int(account_config.get("IMAP_PORT") or (993 if use_ssl else 143))
+    if use_ssl:
+        mail = imaplib.IMAP4_SSL(imap_server, port, timeout=timeout)
+    else:
+        mail = imaplib.IMAP4(imap_server, port, timeout=timeout)
+    mail.login(email_user, email_pass)
+    return mail
+
+
+def _close(mail):
+    try:
+        mail.logout()
+    except Exception:
+        try:
+            mail.shutdown()
+        except Exception:
+            pass
+
+
+class ImapPool:
+    """A small pool of logged-in connections for one account."""
+
+    def __init__(
+        self,
+        account_config: Dict[str, Any],
+        max_size: int = 2,
+        check_after: float = 30.0,
+        max_idle: float = 600.0
+    ):
+        """
+        Args:
+            account_config: The account's EMAIL_ADDRESS/EMAIL_PASSWORD/IMAP_* settings.
+            max_size: Connections kept open when idle.
+            check_after: Idle seconds after which a connection is NOOP-checked before reuse.
+            max_idle: Idle seconds after which a connection is closed instead of reused
+                (servers commonly drop idle sessions after 10-30 minutes).
+        """
+        self.account_config = dict(account_config)
+        self.max_size = max_size
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[Any, float]] = []
+        self.stats = {"connects": 0, "reuses": 0, "health_checks": 0, "reconnects": 0}
+
+    def _healthy(self, mail, idle_for: float) -> bool:
+        if idle_for < self.check_after:
+            return True
+        self.stats["health_checks"] += 1
+        try:
+            return mail.noop()[0] == "OK"
+        except (imaplib.IMAP4.error, OSError):
+            return False
+
+    def acquire(self):
+        """Take a healthy connection from the pool, or open a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                mail, released_at = self._idle.pop()
+            idle_for = time.time() - released_at
+            if idle_for < self.max_idle and self._healthy(mail, idle_for):
+                self.stats["reuses"] += 1
+                return mail
+            self.stats["reconnects"] += 1
+            _close(mail)
+
+        self.stats["connects"] += 1
+        return connect_imap(self.account_config)
+
+    def release(self, mail, broken: bool = False):
+        """Return a connection; broken ones (and any beyond max_size) are closed."""
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.max_size:
+                    self._idle.append((mail, time.time()))
+                    return
+        _close(mail)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with-block. Connections that
+        raise protocol or socket errors are discarded rather than returned.
+        """
+        mail = self.acquire()
+        broken = False
+        try:
+            yield mail
+        except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError, socket.timeout):
+            broken = True
+            raise
+        finally:
+            self.release(mail, broken=broken)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for mail, _ in idle:
+            _close(mail)
+
+
+# Account key -> pool
+_pools: Dict[Tuple, ImapPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(account_config: Dict[str, Any]) -> Tuple:
+    return tuple(str(account_config.get(k)) for k in ("EMAIL_ADDRESS", "EMAIL_PASSWORD", "IMAP_SERVER", "IMAP_PORT", "IMAP_SSL"))
+
+
+def get_imap_pool(account_config: Dict[str, Any]) -> ImapPool:
+    """Get the shared pool for an account; changed settings get a fresh pool."""
+    key = _pool_key(account_config)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Drop pools left behind by an older config of the same address
+            for old_key in [k for k in _pools if k[0] == key[0]]:
+                _pools.pop(old_key).close()
+            pool = _pools[key] = ImapPool(account_config)
+        return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,186 @@
+"""
+SMTP helpers.
+
+Opens logged-in SMTP sessions according to the account's SMTP_SERVER,
+SMTP_PORT and SMTP_SECURITY ("starttls", the default, "ssl" or "none"),
+keeps them in a per-account pool so consecutive sends skip the TLS handshake
+and AUTH, and builds outgoing messages.
+"""
+
+import time
+import socket
+import smtplib
+import threading
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import Dict, Any, List, Tuple
+
+SECURITY_MODES = ("starttls", "ssl", "none")
+DEFAULT_PORTS = {"starttls": 587, "ssl": 465, "none": 25}
+
+
+def smtp_security(account_config: Dict[str, Any]) -> str:
+    security = str(account_config.get("SMTP_SECURITY") or "starttls").lower()
+    if security not in SECURITY_MODES:
+        raise ValueError(f"SMTP_SECURITY must be one of {', '.join(SECURITY_MODES)}, not '{security}'.")
+    return security
+
+
+def connect_smtp(account_config: Dict[str, Any], timeout: float = 30.0):
+    """Open and log in a new SMTP session for an account config."""
+    email_user = account_config.get("EMAIL_ADDRESS")
+    email_pass = account_config.get("EMAIL_PASSWORD")
+    smtp_server = account_config.get("SMTP_SERVER")
+
+    if not all([email_user, email_pass, smtp_server]):
+        raise ValueError("Missing SMTP configuration for this account.")
+
+    security = smtp_security(account_config)
+    port = int(account_config.get("SMTP_PORT") or DEFAULT_PORTS[security])
+    if security == "ssl":
+        server = smtplib.SMTP_SSL(smtp_server, port, timeout=timeout)
+    else:
+        server = smtplib.SMTP(smtp_server, port, timeout=timeout)
+        if security == "starttls":
+            server.starttls()
+    try:
+        server.login(email_user, email_pass)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def build_message(sender: str, to: str, subject: str, body: str) -> MIMEText:
+    msg = MIMEText(body)
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid(domain=sender.rsplit("@", 1)[-1] if "@" in sender else None)
+    return msg
+
+
+def _close(server):
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+class SmtpPool:
+    """Logged-in SMTP sessions for one account, reused across sends."""
+
+    def __init__(
+        self,
+        account_config: Dict[str, Any],
+        max_size: int = 1,
+        check_after: float = 10.0,
+        max_idle: float = 120.0
+    ):
+        """
+        Args:
+            account_config: The account's EMAIL_ADDRESS/EMAIL_PASSWORD/SMTP_* settings.
+            max_size: Sessions kept open when idle.
+            check_after: Idle seconds after which a session is NOOP-checked before reuse.
+            max_idle: Idle seconds after which a session is closed instead of reused
+                (SMTP servers drop idle clients much sooner than IMAP servers).
+        """
+        self.account_config = dict(account_config)
+        self.max_size = max_size
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[Any, float]] = []
+        self.stats = {"connects": 0, "reuses": 0, "health_checks": 0, "reconnects": 0}
+
+    def _healthy(self, server, idle_for: float) -> bool:
+        if idle_for < self.check_after:
+            return True
+        self.stats["health_checks"] += 1
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self):
+        """Take a healthy session from the pool, or open a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, released_at = self._idle.pop()
+            idle_for = time.time() - released_at
+            if idle_for < self.max_idle and self._healthy(server, idle_for):
+                self.stats["reuses"] += 1
+                return server
+            self.stats["reconnects"] += 1
+            _close(server)
+
+        self.stats["connects"] += 1
+        return connect_smtp(self.account_config)
+
+    def release(self, server, broken: bool = False):
+        """Return a session; broken ones (and any beyond max_size) are closed."""
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.max_size:
+                    self._idle.append((server, time.time()))
+                    return
+        _close(server)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a session for the duration of a with-block. Sessions whose
+        connection failed are discarded rather than returned.
+        """
+        server = self.acquire()
+        broken = False
+        try:
+            yield server
+        except (smtplib.SMTPServerDisconnected, OSError, socket.timeout):
+            broken = True
+            raise
+        finally:
+            self.release(server, broken=broken)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            _close(server)
+
+
+# Account key -> pool
+_pools: Dict[Tuple, SmtpPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(account_config: Dict[str, Any]) -> Tuple:
+    return tuple(str(account_config.get(k)) for k in ("EMAIL_ADDRESS", "EMAIL_PASSWORD", "SMTP_SERVER", "SMTP_PORT", "SMTP_SECURITY"))
+
+
+def get_smtp_pool(account_config: Dict[str, Any]) -> SmtpPool:
+    """Get the shared pool for an account; changed settings get a fresh pool."""
+    key = _pool_key(account_config)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Drop pools left behind by an older config of the same address
+            for old_key in [k for k in _pools if k[0] == key[0]]:
+                _pools.pop(old_key).close()
+            pool = _pools[key] = SmtpPool(account_config)
+        return pool
+
+
+def close_all_smtp_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
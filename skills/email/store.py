@@ -0,0 +1,247 @@
+"""
+Email store.
+
+Full text and headers of archived emails in SQLite, keyed by the message's
+document id (its Message-ID, or account_folder_uid without one). The vector
+store only holds chunks; read_email loads the complete message from here.
+
+The store doubles as the metadata index: emails can be looked up directly by
+Message-ID or by account/folder/UID, and References/In-Reply-To headers group
+them into threads.
+"""
+
+import re
+import json
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+_MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    id TEXT PRIMARY KEY,
+    account TEXT,
+    folder TEXT,
+    uid INTEGER,
+    subject TEXT,
+    sender TEXT,
+    date TEXT,
+    content TEXT NOT NULL,
+    chunks INTEGER NOT NULL DEFAULT 1,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Index columns added after the first release of the store
+_INDEX_COLUMNS = {
+    "message_id": "TEXT",
+    "in_reply_to": "TEXT",
+    "thread_id": "TEXT",
+    "sent_at": "REAL",
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS emails_message_id ON emails (message_id);
+CREATE INDEX IF NOT EXISTS emails_uid ON emails (account COLLATE NOCASE, folder COLLATE NOCASE, uid);
+CREATE INDEX IF NOT EXISTS emails_thread ON emails (thread_id, sent_at);
+"""
+
+
+def normalize_message_id(value: Optional[str]) -> str:
+    """"<id@host>" for any of "<id@host>", "id@host" or a header with surrounding text."""
+    if not value:
+        return ""
+    match = _MESSAGE_ID_RE.search(value)
+    if match:
+        return match.group(0)
+    value = value.strip()
+    return f"<{value}>" if value and "@" in value else value
+
+
+def message_ids(value: Optional[str]) -> List[str]:
+    """All Message-IDs in a References/In-Reply-To header, in order."""
+    return _MESSAGE_ID_RE.findall(value or "")
+
+
+def _timestamp(date: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(date).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class EmailStore:
+    """SQLite-backed full text of archived emails."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Used from tool calls, the IDLE watcher and sync threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+            self._conn.executescript(_INDEXES)
+
+    def _migrate(self):
+        """Add the index columns to stores created before them and fill them from the saved metadata."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(emails)")}
+        missing = [name for name in _INDEX_COLUMNS if name not in columns]
+        if not missing:
+            return
+        for name in missing:
+            self._conn.execute(f"ALTER TABLE emails ADD COLUMN {name} {_INDEX_COLUMNS[name]}")
+        rows = self._conn.execute("SELECT id, date, metadata FROM emails").fetchall()
+        for row in rows:
+            meta = json.loads(row["metadata"] or "{}")
+            message_id = normalize_message_id(meta.get("message_id")) or row["id"]
+            self._conn.execute(
+                "UPDATE emails SET message_id = ?, thread_id = ?, sent_at = ? WHERE id = ?",
+                (message_id, message_id, _timestamp(row["date"]), row["id"])
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM emails WHERE id = ?", (doc_id,)).fetchone() is not None
+
+    def _thread_of(self, message_id: str, in_reply_to: str, references: List[str]) -> str:
+        """
+        Thread id of a new message: the root of its References chain, else its
+        parent's thread, else the message itself.
+        """
+        if references:
+            return references[0]
+        if in_reply_to:
+            row = self._conn.execute(
+                "SELECT thread_id FROM emails WHERE message_id = ? LIMIT 1", (in_reply_to,)
+            ).fetchone()
+            return row["thread_id"] if row and row["thread_id"] else in_reply_to
+        return message_id
+
+    def put_many(self, documents: Iterable[Any], chunk_counts: Dict[str, int]):
+        """
+        Store archived email Documents and index their ids and thread.
+
+        Args:
+            documents: Documents built by sync.parse_message.
+            chunk_counts: Number of vector store chunks per document id.
+        """
+        documents = list(documents)
+        if not documents:
+            return
+        with self._lock, self._conn:
+            for doc in documents:
+                meta = doc.metadata
+                message_id = normalize_message_id(meta.get("message_id")) or doc.id
+                in_reply_to = normalize_message_id(meta.get("in_reply_to"))
+                thread_id = self._thread_of(message_id, in_reply_to, message_ids(meta.get("references")))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO emails (id, account, folder, uid, subject, sender, date, content, chunks, "
+                    "metadata, message_id, in_reply_to, thread_id, sent_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        doc.id, meta.get("account"), meta.get("folder"), meta.get("uid"),
+                        meta.get("subject"), meta.get("sender"), meta.get("date"),
+                        doc.page_content, chunk_counts.get(doc.id, 1), json.dumps(meta),
+                        message_id, in_reply_to, thread_id, _timestamp(meta.get("date"))
+                    )
+                )
+                if thread_id != message_id:
+                    # Replies archived before this message joined a thread rooted at it
+                    self._conn.execute("UPDATE emails SET thread_id = ? WHERE thread_id = ?", (thread_id, message_id))
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        email = json.loads(row["metadata"] or "{}")
+        email.update({
+            "id": row["id"], "account": row["account"], "folder": row["folder"], "uid": row["uid"],
+            "subject": row["subject"], "sender": row["sender"], "date": row["date"],
+            "content": row["content"], "chunks": row["chunks"],
+            "message_id": row["message_id"], "thread_id": row["thread_id"]
+        })
+        return email
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """The stored email as a dict (metadata fields plus "id" and "content"), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM emails WHERE id = ?", (doc_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def lookup(self, email_id: str) -> Optional[Dict[str, Any]]:
+        """Find an email by document id or Message-ID (angle brackets optional)."""
+        email = self.get(email_id.strip())
+        if email is not None:
+            return email
+        message_id = normalize_message_id(email_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM emails WHERE message_id = ? ORDER BY rowid DESC LIMIT 1", (message_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_by_uid(self, account: str, folder: str, uid: int) -> Optional[Dict[str, Any]]:
+        """The email archived from account/folder under an IMAP UID."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM emails WHERE account = ? COLLATE NOCASE AND folder = ? COLLATE NOCASE AND uid = ? "
+                "ORDER BY rowid DESC LIMIT 1",
+                (account, folder, uid)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def thread(self, doc_id: str) -> List[Dict[str, Any]]:
+        """Every archived email in the same thread as doc_id, oldest first."""
+        with self._lock:
+            row = self._conn.execute("SELECT thread_id, message_id FROM emails WHERE id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return []
+            thread_id = row["thread_id"] or row["message_id"]
+            rows = self._conn.execute(
+                "SELECT * FROM emails WHERE thread_id = ? OR id = ? ORDER BY sent_at IS NULL, sent_at, rowid",
+                (thread_id, doc_id)
+            ).fetchall()
+        # The same message archived from two folders (e.g. Inbox and Sent) appears once
+        seen = set()
+        thread = []
+        for r in rows:
+            if r["message_id"] not in seen:
+                seen.add(r["message_id"])
+                thread.append(self._to_dict(r))
+        return thread
+
+    def chunk_counts(self, doc_ids: List[str]) -> Dict[str, int]:
+        """Number of chunks stored for each known id."""
+        counts = {}
+        with self._lock:
+            for start in range(0, len(doc_ids), 500):
+                batch = doc_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in self._conn.execute(f"SELECT id, chunks FROM emails WHERE id IN ({placeholders})", batch):
+                    counts[row["id"]] = row["chunks"]
+        return counts
+
+    def delete(self, doc_ids: List[str]):
+        if not doc_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM emails WHERE id = ?", [(doc_id,) for doc_id in doc_ids])
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, value))
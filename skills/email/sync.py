@@ -0,0 +1,541 @@
+"""
+Incremental IMAP sync.
+
+Each account/folder keeps its UIDVALIDITY, the highest UID archived so far and
+the UID -> document id map of archived messages, in SQLite. A sync only asks the server
+for UIDs above the high-water mark; messages deleted on the server are
+reconciled lazily (at most once per interval), and a full resync happens only
+when the server reports a new UIDVALIDITY.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import email
+import datetime
+import threading
+from email.header import decode_header
+from typing import List, Dict, Any, Optional, Callable, Tuple, Iterable
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    Document = None
+
+from .mime import extract_message
+
+# How often deleted messages are looked for, in seconds
+RECONCILE_INTERVAL = 24 * 3600
+# Messages per UID FETCH round trip
+FETCH_BATCH = 100
+HEADER_FIELDS = "BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]"
+
+_UID_RE = re.compile(rb"\bUID (\d+)")
+_SIZE_RE = re.compile(rb"\bRFC822\.SIZE (\d+)")
+_RESPONSE_START_RE = re.compile(rb"^\d+ \(")
+# IMAP dates use English month names whatever the locale
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    account TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    uidvalidity INTEGER,
+    last_uid INTEGER NOT NULL DEFAULT 0,
+    last_reconcile REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (account, folder)
+);
+CREATE TABLE IF NOT EXISTS uids (
+    account TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (account, folder, uid)
+);
+CREATE INDEX IF NOT EXISTS uids_doc_id ON uids (doc_id);
+"""
+
+
+class SyncState:
+    """
+    Per-account, per-folder sync state in SQLite: one row per folder and one per
+    archived UID, so a sync writes only the folder row and the UIDs it changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._legacy_path = os.path.splitext(path)[0] + ".json"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_STATE_SCHEMA)
+        self._migrate_json()
+
+    def _migrate_json(self):
+        """Import the JSON state of older versions once, then set it aside."""
+        if self._legacy_path == self.path or not os.path.exists(self._legacy_path):
+            return
+        try:
+            with open(self._legacy_path, "r") as f:
+                legacy = json.load(f)
+            for account, folders in legacy.items():
+                for folder, entry in folders.items():
+                    added = {int(uid): doc_id for uid, doc_id in entry.get("uids", {}).items()}
+                    self.put(account, folder, entry, added=added, replace=True)
+            os.replace(self._legacy_path, self._legacy_path + ".migrated")
+        except Exception as e:
+            print(f"Warning: Failed to migrate email sync state {self._legacy_path}: {e}")
+
+    def get(self, account: str, folder: str) -> Optional[Dict[str, Any]]:
+        """{"uidvalidity", "last_uid", "last_reconcile"} of a folder, or None before its first sync."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uidvalidity, last_uid, last_reconcile FROM folders WHERE account = ? AND folder = ?",
+                (account, folder.lower())
+            ).fetchone()
+        if row is None:
+            return None
+        return {"uidvalidity": row[0], "last_uid": row[1], "last_reconcile": row[2]}
+
+    def uid_map(self, account: str, folder: str) -> Dict[int, str]:
+        """UID -> document id of the archived messages of a folder."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT uid, doc_id FROM uids WHERE account = ? AND folder = ?", (account, folder.lower())
+            ).fetchall()
+        return dict(rows)
+
+    def orphaned(self, account: str, folder: str, gone: Dict[int, str]) -> List[str]:
+        """
+        Document ids of `gone` (UID -> doc id in this folder) that no other UID,
+        in this or any other folder or account, still maps to.
+        """
+        doc_ids = set(gone.values())
+        if not doc_ids:
+            return []
+        folder = folder.lower()
+        still_mapped = set()
+        with self._lock:
+            for doc_id in doc_ids:
+                rows = self._conn.execute(
+                    "SELECT account, folder, uid FROM uids WHERE doc_id = ?", (doc_id,)
+                ).fetchall()
+                if any(not (a == account and f == folder and uid in gone) for a, f, uid in rows):
+                    still_mapped.add(doc_id)
+        return sorted(doc_ids - still_mapped)
+
+    def put(
+        self,
+        account: str,
+        folder: str,
+        entry: Dict[str, Any],
+        added: Optional[Dict[int, str]] = None,
+        removed: Iterable[int] = (),
+        replace: bool = False
+    ):
+        """
+        Store a folder's state and its UID changes in one transaction.
+
+        Args:
+            account: The account's email address.
+            folder: Mailbox name.
+            entry: {"uidvalidity", "last_uid", "last_reconcile"}.
+            added: UID -> document id of newly archived messages.
+            removed: UIDs deleted on the server.
+            replace: Drop every stored UID of the folder first (new UIDVALIDITY).
+        """
+        folder = folder.lower()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?)",
+                (account, folder, entry.get("uidvalidity"), entry.get("last_uid", 0), entry.get("last_reconcile", 0))
+            )
+            if replace:
+                self._conn.execute("DELETE FROM uids WHERE account = ? AND folder = ?", (account, folder))
+            removed = list(removed)
+            if removed:
+                self._conn.executemany(
+                    "DELETE FROM uids WHERE account = ? AND folder = ? AND uid = ?",
+                    [(account, folder, uid) for uid in removed]
+                )
+            if added:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO uids VALUES (?, ?, ?, ?)",
+                    [(account, folder, uid, doc_id) for uid, doc_id in added.items()]
+                )
+
+    def reset(self, account: str, folder: Optional[str] = None):
+        with self._lock, self._conn:
+            if folder is None:
+                self._conn.execute("DELETE FROM folders WHERE account = ?", (account,))
+                self._conn.execute("DELETE FROM uids WHERE account = ?", (account,))
+            else:
+                params = (account, folder.lower())
+                self._conn.execute("DELETE FROM folders WHERE account = ? AND folder = ?", params)
+                self._conn.execute("DELETE FROM uids WHERE account = ? AND folder = ?", params)
+
+
+def quote_folder(folder: str) -> str:
+    """IMAP mailbox names with spaces must be quoted."""
+    if " " in folder and not folder.startswith('"'):
+        return f'"{folder}"'
+    return folder
+
+
+def select_folder(mail, folder: str) -> int:
+    """SELECT a folder (read-only) and return its UIDVALIDITY."""
+    status, data = mail.select(quote_folder(folder), readonly=True)
+    if status != "OK":
+        raise RuntimeError(f"Cannot open folder '{folder}': {data}")
+    _, values = mail.response("UIDVALIDITY")
+    if not values or values[0] is None:
+        _, values = mail.status(quote_folder(folder), "(UIDVALIDITY)")
+        # e.g. b'INBOX (UIDVALIDITY 1234)'
+        return int(values[0].decode().rsplit("UIDVALIDITY", 1)[1].strip(" )"))
+    return int(values[0])
+
+
+def search_uids(mail, criteria: str) -> List[int]:
+    status, data = mail.uid("SEARCH", None, criteria)
+    if status != "OK" or not data or not data[0]:
+        return []
+    return sorted(int(uid) for uid in data[0].split())
+
+
+def imap_date(day: datetime.date) -> str:
+    """e.g. 01-Feb-2025, the date format of SEARCH SINCE/BEFORE."""
+    return f"{day.day:02d}-{_MONTHS[day.month - 1]}-{day.year}"
+
+
+def _imap_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_search(
+    sender: Optional[str] = None,
+    subject: Optional[str] = None,
+    since: Optional[datetime.date] = None,
+    before: Optional[datetime.date] = None,
+    unread: bool = False
+) -> Tuple[List[str], Optional[bytes]]:
+    """
+    Compile structured filters into UID SEARCH criteria.
+
+    ASCII text is sent as quoted strings. A non-ASCII value has to travel as a
+    UTF-8 literal, and imaplib sends at most one literal per command, so it is
+    placed last and only one such filter is allowed.
+
+    Returns:
+        (criteria tokens, literal bytes or None)
+    """
+    criteria: List[str] = []
+    literal: Optional[Tuple[str, bytes]] = None
+    for key, value in (("FROM", sender), ("SUBJECT", subject)):
+        if not value:
+            continue
+        try:
+            value.encode("ascii")
+            criteria += [key, _imap_quote(value)]
+        except UnicodeEncodeError:
+            if literal is not None:
+                raise ValueError("Only one of sender/subject may contain non-ASCII characters.")
+            literal = (key, value.encode("utf-8"))
+    if since:
+        criteria += ["SINCE", imap_date(since)]
+    if before:
+        criteria += ["BEFORE", imap_date(before)]
+    if unread:
+        criteria.append("UNSEEN")
+    if literal is not None:
+        criteria.append(literal[0])
+        return criteria, literal[1]
+    return criteria or ["ALL"], None
+
+
+def query_uids(mail, **filters) -> List[int]:
+    """
+    Run a server-side UID SEARCH for the filters of build_search on the selected folder.
+
+    Returns:
+        Matching UIDs, ascending.
+    """
+    criteria, literal = build_search(**filters)
+    if literal is not None:
+        # imaplib appends the literal after the last criterion
+        mail.literal = literal
+        status, data = mail.uid("SEARCH", "CHARSET", "UTF-8", *criteria)
+    else:
+        status, data = mail.uid("SEARCH", None, *criteria)
+    if status != "OK" or not data or not data[0]:
+        return []
+    return sorted(int(uid) for uid in data[0].split())
+
+
+def decode_subject(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    parts = []
+    for chunk, encoding in decode_header(value):
+        if isinstance(chunk, bytes):
+            try:
+                chunk = chunk.decode(encoding or "utf-8", errors="replace")
+            except LookupError:
+                chunk = chunk.decode("utf-8", errors="replace")
+        parts.append(chunk)
+    # Encoded words are separated by whitespace that decode_header drops
+    return "".join(parts).strip()
+
+
+def parse_message(raw: bytes, account: str, folder: str, uid: int) -> Dict[str, Any]:
+    """
+    Parse one raw RFC822 message into {"id", "content", "metadata"}.
+    Plain data only, so it can run in a worker process.
+    """
+    msg, body = extract_message(raw)
+
+    subject = decode_subject(msg["Subject"])
+    sender = msg.get("From")
+    date_str = msg.get("Date")
+    message_id = msg.get("Message-ID", "").strip()
+
+    # Use Message-ID as unique ID for vector store if available
+    doc_id = message_id if message_id else f"{account}_{folder.lower()}_{uid}"
+
+    if not body:
+        body = "[No Text Content]"
+
+    full_content = f"Subject: {subject}\nFrom: {sender}\nDate: {date_str}\n\n{body}"
+    meta = {
+        "subject": subject,
+        "sender": sender,
+        "date": date_str,
+        "message_id": message_id,
+        # Thread links, indexed by the EmailStore
+        "in_reply_to": " ".join((msg.get("In-Reply-To") or "").split()),
+        "references": " ".join((msg.get("References") or "").split()),
+        "account": account,
+        "folder": folder,
+        "uid": uid,
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+    return {"id": doc_id, "content": full_content, "metadata": meta}
+
+
+def message_to_document(raw: bytes, account: str, folder: str, uid: int):
+    """Build the archive Document for one raw RFC822 message."""
+    return to_document(parse_message(raw, account, folder, uid))
+
+
+def to_document(parsed: Dict[str, Any]):
+    return Document(page_content=parsed["content"], metadata=parsed["metadata"], id=parsed["id"])
+
+
+def uid_set(uids: List[int]) -> str:
+    """Compress sorted UIDs into an IMAP set, e.g. [1, 2, 3, 7] -> "1:3,7"."""
+    parts = []
+    uids = sorted(uids)
+    start = prev = None
+    for uid in uids:
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            parts.append(f"{start}:{prev}" if prev != start else str(start))
+            start = prev = uid
+    if start is not None:
+        parts.append(f"{start}:{prev}" if prev != start else str(start))
+    return ",".join(parts)
+
+
+def uid_fetch(mail, uids: List[int], items: str, batch_size: int = FETCH_BATCH) -> Dict[int, Dict[str, Any]]:
+    """
+    UID FETCH `items` for many messages in batched round trips.
+
+    Returns {uid: {"size": int or None, "data": bytes or None}}; "data" is the
+    first literal of each response (the header block or the full message).
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    uids = sorted(uids)
+    for start in range(0, len(uids), batch_size):
+        status, data = mail.uid("FETCH", uid_set(uids[start:start + batch_size]), f"(UID RFC822.SIZE {items})")
+        if status != "OK":
+            continue
+        current = None
+        for part in data:
+            # A literal response arrives as (prefix, literal), and anything after
+            # the literal (some servers put UID there) as a following bytes item
+            prefix, literal = (part[0], part[1]) if isinstance(part, tuple) else (part, None)
+            if not isinstance(prefix, bytes):
+                continue
+            uid_match = _UID_RE.search(prefix)
+            if isinstance(part, tuple) or _RESPONSE_START_RE.match(prefix):
+                current = {"uid": None, "size": None, "data": literal}
+            if current is None:
+                continue
+            if uid_match:
+                current["uid"] = int(uid_match.group(1))
+            size_match = _SIZE_RE.search(prefix)
+            if size_match:
+                current["size"] = int(size_match.group(1))
+            if current["uid"] is not None:
+                results[current["uid"]] = {"size": current["size"], "data": current["data"]}
+    return results
+
+
+def fetch_headers(mail, uids: List[int], batch_size: int = FETCH_BATCH) -> List[Dict[str, Any]]:
+    """From/Subject/Date/Message-ID and size of each message, without downloading bodies."""
+    headers = []
+    for uid, item in uid_fetch(mail, uids, HEADER_FIELDS, batch_size).items():
+        msg = email.message_from_bytes(item["data"] or b"")
+        headers.append({
+            "uid": uid,
+            # Encoded or raw 8-bit sender names decode to plain text too
+            "from": decode_subject(msg.get("From")),
+            "subject": decode_subject(msg.get("Subject")),
+            "date": msg.get("Date"),
+            "message_id": (msg.get("Message-ID") or "").strip(),
+            "size": item["size"],
+        })
+    return sorted(headers, key=lambda h: h["uid"])
+
+
+def fetch_documents(mail, account: str, folder: str, uids: List[int], batch_size: int = FETCH_BATCH) -> List[Any]:
+    """Fetch full messages for the given UIDs in batches and convert them to Documents."""
+    documents = []
+    for uid, item in sorted(uid_fetch(mail, uids, "BODY.PEEK[]", batch_size).items()):
+        if item["data"]:
+            documents.append(message_to_document(item["data"], account, folder, uid))
+    return documents
+
+
+def collect_folder(
+    mail,
+    account: str,
+    folder: str,
+    state: SyncState,
+    limit: int = 20,
+    full_resync: bool = False,
+    reconcile_interval: float = RECONCILE_INTERVAL,
+    fetch: Callable = fetch_documents
+) -> Dict[str, Any]:
+    """
+    First half of a sync: talk to the server and gather what changed, without
+    touching the archive or the stored state (see commit_folder).
+
+    Returns:
+        A batch dict: {"account", "folder", "entry", "documents", "added", "gone", "remaining", "resynced"},
+        where added and gone map UIDs to document ids.
+    """
+    uidvalidity = select_folder(mail, folder)
+    entry = None if full_resync else state.get(account, folder)
+    resynced = entry is None or entry.get("uidvalidity") != uidvalidity
+
+    if resynced:
+        # First sync, or UIDs were renumbered: start from the most recent messages.
+        # Message-ID based document ids keep already archived mail from being re-embedded.
+        all_uids = search_uids(mail, "ALL")
+        new_uids = all_uids[-limit:] if limit else all_uids
+        entry = {
+            "uidvalidity": uidvalidity,
+            "last_uid": all_uids[-1] if all_uids else 0,
+            "last_reconcile": time.time()
+        }
+        remaining = 0
+    else:
+        # "n:*" always matches the highest UID, even when it is below n
+        new_uids = [uid for uid in search_uids(mail, f"UID {entry['last_uid'] + 1}:*") if uid > entry["last_uid"]]
+        remaining = max(0, len(new_uids) - limit) if limit else 0
+        # Oldest first, so the high-water mark never skips a message
+        if limit:
+            new_uids = new_uids[:limit]
+        if new_uids:
+            entry["last_uid"] = new_uids[-1]
+
+    documents = fetch(mail, account, folder, new_uids) if new_uids else []
+    added = {int(doc.metadata["uid"]): doc.id for doc in documents}
+
+    gone: Dict[int, str] = {}
+    if not resynced and time.time() - entry.get("last_reconcile", 0) >= reconcile_interval:
+        present = set(search_uids(mail, "ALL"))
+        gone = {uid: doc_id for uid, doc_id in state.uid_map(account, folder).items() if uid not in present}
+        entry["last_reconcile"] = time.time()
+
+    return {
+        "account": account,
+        "folder": folder,
+        "entry": entry,
+        "documents": documents,
+        "added": added,
+        "gone": gone,
+        "remaining": remaining,
+        "resynced": resynced,
+    }
+
+
+def commit_folder(
+    batch: Dict[str, Any],
+    state: SyncState,
+    archive: Optional[Callable[[List[Any]], None]],
+    delete: Callable[[List[str]], None]
+) -> Dict[str, Any]:
+    """
+    Second half of a sync: archive the batch's documents (pass archive=None if the
+    caller already did), apply deletions, then advance the stored state. The state
+    only moves once the archive is written, so a failure re-fetches next time.
+    A message deleted from this folder is only removed from the archive when no
+    other folder (e.g. the one it was moved to) still maps to it.
+    """
+    if batch["documents"] and archive is not None:
+        archive(batch["documents"])
+    deleted_ids = state.orphaned(batch["account"], batch["folder"], batch["gone"])
+    if deleted_ids:
+        delete(deleted_ids)
+    state.put(
+        batch["account"], batch["folder"], batch["entry"],
+        added=batch["added"], removed=batch["gone"], replace=batch["resynced"]
+    )
+    return {
+        "fetched": len(batch["documents"]),
+        "removed": len(deleted_ids),
+        "remaining": batch["remaining"],
+        "resynced": batch["resynced"],
+    }
+
+
+def sync_folder(
+    mail,
+    account: str,
+    folder: str,
+    state: SyncState,
+    archive: Callable[[List[Any]], None],
+    delete: Callable[[List[str]], None],
+    limit: int = 20,
+    full_resync: bool = False,
+    reconcile_interval: float = RECONCILE_INTERVAL,
+    fetch: Callable = fetch_documents
+) -> Dict[str, Any]:
+    """
+    Archive new messages of one folder.
+
+    Args:
+        mail: A logged-in imaplib connection.
+        account: The account's email address (state key).
+        folder: Mailbox name, e.g. "inbox".
+        state: The SyncState to read and update.
+        archive: Called with the new Documents.
+        delete: Called with document ids whose messages were deleted on the server.
+        limit: Maximum number of messages fetched by this call.
+        full_resync: Ignore the stored state and start over.
+        reconcile_interval: Seconds between deletion checks.
+        fetch: Function (mail, account, folder, uids) -> Documents.
+
+    Returns:
+        {"fetched", "removed", "remaining", "resynced"}
+    """
+    batch = collect_folder(mail, account, folder, state, limit, full_resync, reconcile_interval, fetch)
+    return commit_folder(batch, state, archive, delete)
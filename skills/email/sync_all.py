@@ -0,0 +1,171 @@
+"""
+Multi-account sync.
+
+Syncs every configured account at once: IMAP work runs on a bounded thread
+pool (one connection per account), MIME parsing of large batches runs in a
+process pool so it does not contend for the GIL, and documents from all
+accounts are embedded together in large batches instead of per account.
+"""
+
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
+
+from .pool import get_imap_pool
+from .sync import SyncState, collect_folder, commit_folder, uid_fetch, parse_message, to_document
+
+# Batches smaller than this are parsed inline; process start-up would cost more
+PROCESS_PARSE_THRESHOLD = 50
+EMBED_BATCH = 256
+
+
+class _Parser:
+    """Parses fetched messages inline or in a lazily started process pool."""
+
+    def __init__(self, processes: Optional[int]):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._disabled = processes == 0
+
+    def parse(self, raws: List[bytes], account: str, folder: str, uids: List[int]) -> List[Dict[str, Any]]:
+        if self._disabled or len(raws) < PROCESS_PARSE_THRESHOLD:
+            return [parse_message(r, account, folder, u) for r, u in zip(raws, uids)]
+        with self._lock:
+            if self._executor is None:
+                # Spawn, not fork: forking this multi-threaded process (IMAP pool, IDLE
+                # watchers, locks held by other threads) can deadlock the children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        try:
+            n = len(raws)
+            return list(self._executor.map(parse_message, raws, [account] * n, [folder] * n, uids, chunksize=16))
+        except Exception as e:
+            # e.g. a platform where worker processes cannot start; parse inline from now on
+            print(f"Warning: Parallel MIME parsing unavailable, parsing inline: {e}")
+            self._disabled = True
+            return [parse_message(r, account, folder, u) for r, u in zip(raws, uids)]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def sync_accounts(
+    accounts: List[Dict[str, Any]],
+    state: SyncState,
+    archive: Callable[[List[Any]], None],
+    delete: Callable[[List[str]], None],
+    folder: str = "inbox",
+    limit: int = 100,
+    max_workers: int = 4,
+    parse_processes: Optional[int] = None,
+    embed_batch: int = EMBED_BATCH,
+    account_lock: Optional[Callable[[str], threading.Lock]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Sync `folder` of every account concurrently.
+
+    Args:
+        accounts: Account configs (EMAIL_ADDRESS, EMAIL_PASSWORD, IMAP_*).
+        state: Shared SyncState.
+        archive: Called with Documents to embed and store (batched across accounts).
+        delete: Called with document ids deleted on the server.
+        folder: Folder to sync in each account.
+        limit: Maximum new messages per account.
+        max_workers: Accounts synced at the same time.
+        parse_processes: Worker processes for MIME parsing (None = CPU count, 0 = inline).
+        embed_batch: Documents per archive call.
+        account_lock: Optional function returning the per-account sync lock.
+
+    Returns:
+        One dict per account: {"account", "fetched", "removed", "remaining", "seconds", "rate", "error"}.
+    """
+    parser = _Parser(parse_processes)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: List[Dict[str, Any]] = []
+    pending_docs = 0
+    # Every batch that took its account's lock, so none stays locked if we stop early
+    collected: List[Dict[str, Any]] = []
+
+    def release(batch):
+        lock, batch["lock"] = batch["lock"], None
+        if lock is not None:
+            lock.release()
+
+    def fetch(mail, account, folder_name, uids):
+        items = uid_fetch(mail, uids, "BODY.PEEK[]")
+        ordered = [(uid, items[uid]["data"]) for uid in sorted(items) if items[uid]["data"]]
+        parsed = parser.parse([raw for _, raw in ordered], account, folder_name, [uid for uid, _ in ordered])
+        return [to_document(p) for p in parsed]
+
+    def collect(account_config):
+        address = account_config.get("EMAIL_ADDRESS")
+        lock = account_lock(address) if account_lock else None
+        if lock is not None:
+            lock.acquire()
+        start = time.perf_counter()
+        try:
+            with get_imap_pool(account_config).connection() as mail:
+                batch = collect_folder(mail, address, folder, state, limit=limit, fetch=fetch)
+        except Exception:
+            if lock is not None:
+                lock.release()
+            raise
+        batch["seconds"] = time.perf_counter() - start
+        batch["lock"] = lock
+        collected.append(batch)
+        return batch
+
+    def flush():
+        """Embed everything collected so far in one pass, then advance those accounts' state."""
+        nonlocal pending, pending_docs
+        documents = [doc for batch in pending for doc in batch["documents"]]
+        try:
+            for start in range(0, len(documents), embed_batch):
+                archive(documents[start:start + embed_batch])
+            for batch in pending:
+                outcome = commit_folder(batch, state, None, delete)
+                results[batch["account"]].update(outcome)
+        except Exception as e:
+            for batch in pending:
+                results[batch["account"]]["error"] = f"Archiving failed: {e}"
+        finally:
+            for batch in pending:
+                release(batch)
+            pending, pending_docs = [], 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(collect, account): account for account in accounts}
+            for future in as_completed(futures):
+                address = futures[future].get("EMAIL_ADDRESS")
+                result = {"account": address, "fetched": 0, "removed": 0, "remaining": 0,
+                          "seconds": 0.0, "rate": 0.0, "error": None}
+                results[address] = result
+                try:
+                    batch = future.result()
+                except Exception as e:
+                    result["error"] = str(e)
+                    continue
+                result["seconds"] = batch["seconds"]
+                result["rate"] = len(batch["documents"]) / batch["seconds"] if batch["seconds"] else 0.0
+                pending.append(batch)
+                pending_docs += len(batch["documents"])
+                # Embed while slower accounts are still downloading
+                if pending_docs >= embed_batch:
+                    flush()
+            if pending:
+                flush()
+    finally:
+        # Batches never flushed (an error above, or still being collected when it
+        # happened) must not leave their account locked for download_emails and IDLE
+        for batch in collected:
+            release(batch)
+        parser.close()
+
+    return [results[a.get("EMAIL_ADDRESS")] for a in accounts if a.get("EMAIL_ADDRESS") in results]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+MIME body extraction check: boundary delimiters only count at the start of a
+line (RFC 2046), so boundary text inside a body line does not end the part.
+
+Usage:
+    python skills/email/test_mime.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from skills.email.mime import extract_message
+
+
+def check(label, condition):
+    print(f"{'PASS' if condition else 'FAIL'}: {label}")
+    return condition
+
+
+def message(body_lines):
+    return "\r\n".join([
+        "From: a@example.com",
+        "Subject: Boundaries",
+        "MIME-Version: 1.0",
+        'Content-Type: multipart/mixed; boundary="b1"',
+        "",
+        "preamble",
+        *body_lines,
+    ]).encode("utf-8")
+
+
+def main():
+    ok = True
+
+    raw = message([
+        "--b1",
+        "Content-Type: text/plain; charset=utf-8",
+        "",
+        "line with --b1x inside and --b1 too",
+        "second line",
+        "--b1 ",
+        "Content-Type: text/plain",
+        "",
+        "next part",
+        "--b1--",
+        "epilogue",
+    ])
+    _, body = extract_message(raw)
+    ok &= check("boundary text inside a line keeps the part", "line with --b1x inside and --b1 too\r\nsecond line" in body)
+    ok &= check("delimiter with trailing whitespace starts a part", "next part" in body)
+    ok &= check("epilogue after the closing delimiter ignored", "epilogue" not in body)
+
+    raw = message([
+        "--b1",
+        "Content-Type: text/plain",
+        "",
+        "only part",
+        "--b1x",
+        "still the same part",
+        "--b1--",
+    ])
+    _, body = extract_message(raw)
+    ok &= check("longer boundary-like line is body text", "only part\r\n--b1x\r\nstill the same part" in body)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
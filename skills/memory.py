@@ -4,6 +4,11 @@ import datetime
 from langchain_core.tools import tool, BaseTool
 from .base import Skill
 from core.paths import paths
+from core.keyword_index import KeywordIndex, hybrid_search
+from core.vector_store import (
+    content_id, normalize_text, dedupe_collection, delete_documents, register_store, recover_rebuild
+)
+from core.ingest_queue import IngestQueue
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -20,6 +25,11 @@ class MemorySkill(Skill):
         # Use centralized data directory
         self.persist_directory = paths.get_skill_data_dir("memory_notes")
         self.last_retrieved_ids = [] # To store IDs of listed notes for deletion by index
+        self.keyword_index = KeywordIndex(self.persist_directory, "user_memory")
+        self.ingest_queue = IngestQueue(self.persist_directory, "user_memory", lambda: self.vectorstore, self.keyword_index)
+        register_store(
+            "user_memory", lambda: self.vectorstore, self.persist_directory, self.keyword_index, self.ingest_queue
+        )
 
         # Ensure data directory exists
         # os.makedirs(self.persist_directory, exist_ok=True) # handled by paths
@@ -50,6 +60,10 @@ class MemorySkill(Skill):
                     embedding_function=self.embeddings,
                     collection_name="user_memory"
                 )
+                recover_rebuild(self.vectorstore)
+                self.keyword_index.sync(self.vectorstore._collection, keep=self.ingest_queue.pending_ids())
+                if len(self.ingest_queue):
+                    self.ingest_queue.start()
             except Exception as e:
                 print(f"Failed to initialize Chroma: {e}")
 
@@ -57,6 +71,18 @@ class MemorySkill(Skill):
     def required_config(self) -> List[str]:
         return ["OPENAI_API_KEY"]
 
+    def _document_id(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Notes are content-addressed by their normalized text."""
+        return content_id("note", normalize_text(content))
+
+    def dedupe(self) -> Dict[str, int]:
+        """Collapse duplicate notes and move legacy random ids to content ids."""
+        if not self.vectorstore:
+            return {}
+        if not self.ingest_queue.flush():
+            raise RuntimeError(f"{len(self.ingest_queue)} queued note(s) are not embedded yet; try again later.")
+        return dedupe_collection(self.vectorstore, self._document_id, self.keyword_index)
+
     def get_tools(self) -> List[BaseTool]:
 
         @tool
@@ -73,7 +99,13 @@ class MemorySkill(Skill):
                 "timestamp": datetime.datetime.now().isoformat(),
                 "type": "user_note"
             }
-            self.vectorstore.add_documents([Document(page_content=content, metadata=meta)])
+            doc_id = self._document_id(content, meta)
+            # Same id means the same normalized text, so an existing note is never re-embedded
+            if doc_id in self.keyword_index:
+                return "✅ Already in memory."
+
+            # Embedding and the Chroma write happen in the background
+            self.ingest_queue.enqueue([Document(page_content=content, metadata=meta)], [doc_id], overwrite=False)
             return "✅ Saved to memory."
 
         @tool
@@ -95,6 +127,10 @@ class MemorySkill(Skill):
                 combined = []
                 for d, m, i in zip(docs, metas, ids):
                     combined.append({"content": d, "metadata": m, "id": i})
+                # Include notes still waiting to be embedded
+                for doc in self.ingest_queue.pending():
+                    if doc.id not in ids:
+                        combined.append({"content": doc.page_content, "metadata": doc.metadata, "id": doc.id})
 
                 combined.sort(key=lambda x: x["metadata"].get("timestamp", ""), reverse=True)
                 recent = combined[:10]
@@ -115,16 +151,17 @@ class MemorySkill(Skill):
                 return f"❌ Failed to retrieve notes list: {e}"
 
         @tool
-        def search_notes(query: str) -> str:
+        def search_notes(query: str, mode: str = "hybrid") -> str:
             """
-            Search for information in existing notes by semantic similarity.
+            Search for information in existing notes by keyword and semantic similarity.
             Args:
                 query: The search query.
+                mode: "hybrid" (default), "keyword" for exact terms such as numbers or names (no embedding call), or "semantic".
             """
-            if not self.vectorstore:
+            if not self.vectorstore and mode != "keyword":
                 return "Memory system not initialized."
 
-            results = self.vectorstore.similarity_search(query, k=3)
+            results = hybrid_search(self.vectorstore, self.keyword_index, query, k=3, mode=mode)
             if not results:
                 return "I couldn't find any relevant notes in your memory."
 
@@ -162,7 +199,8 @@ class MemorySkill(Skill):
 
             if ids_to_delete:
                 try:
-                    self.vectorstore.delete(ids=ids_to_delete)
+                    self.ingest_queue.discard(ids_to_delete)
+                    delete_documents(self.vectorstore, ids_to_delete, self.keyword_index)
                     response_msg = f"✅ Deleted note(s): {', '.join(map(str, deleted_indices))}."
                     if failed_indices:
                         response_msg += f"\n❌ Could not find note(s): {', '.join(map(str, failed_indices))}."
@@ -1,8 +1,14 @@
 from typing import List, Dict, Any
 from langchain_core.tools import tool
-from ddgs import DDGS
 from ..base import Skill
 import json
+import time
+from datetime import datetime
+from core.news_cache import get_news_query_cache
+from .search import fetch_news, fetch_many, DEFAULT_REGION
+from .prefetch import get_article_prefetcher
+from .clusters import get_cluster_index, collapse
+from .feeds import get_feed_fetcher, find_feeds, DEFAULT_INTERVAL
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -18,6 +24,7 @@ class NewsSkill(Skill):
     _last_query: str = ""
     _just_searched: bool = False  # Flag to indicate a search just completed
     _current_cache_id: str = None  # ID of the current search if loaded from cache
+    _history_id: str = None  # ID under which the current search was recorded in the history
 
     def __init__(self):
         super().__init__()
@@ -51,41 +58,101 @@ class NewsSkill(Skill):
     def name(self) -> str:
         return "NewsSkill"
 
+    def _query_cache(self):
+        cache = get_news_query_cache()
+        # NEWS_CACHE_TTL: minutes a search result is reused (0 disables the cache)
+        ttl = self.config.get("NEWS_CACHE_TTL")
+        if ttl is not None:
+            cache.ttl = float(ttl) * 60
+        return cache
+
+    def _prefetch(self, results: List[Dict[str, Any]]):
+        """Download the top results' articles in the background for offline reading."""
+        # NEWS_PREFETCH: number of top results whose articles are downloaded (0 disables)
+        top_n = int(self.config.get("NEWS_PREFETCH", 10))
+        try:
+            get_article_prefetcher().prefetch(results, top_n)
+        except Exception as e:
+            print(f"Warning: News prefetch failed: {e}")
+
     def get_tools(self):
+        # Keep subscribed feeds up to date in the background
+        try:
+            from core.news_cache import get_news_cache_manager
+            if get_news_cache_manager().list_feeds():
+                get_feed_fetcher().start()
+        except Exception as e:
+            print(f"Warning: News feed fetcher not started: {e}")
+
+        def _collapse(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            """One representative per story; syndicated copies are listed under its "similar"."""
+            try:
+                return collapse(results, get_cluster_index())
+            except Exception as e:
+                print(f"Warning: News clustering failed: {e}")
+                return results
+
+        def _remember(query: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            """
+            Collapse near-duplicate results, make them the current list for read_news_item
+            and save them to the search history. Returns the collapsed results.
+            """
+            results = _collapse(results)
+            NewsSkill._news_cache = results
+            NewsSkill._last_query = query
+            NewsSkill._just_searched = True
+            NewsSkill._current_cache_id = None
+            NewsSkill._history_id = None
+
+            # Save to news cache manager
+            try:
+                from core.news_cache import get_news_cache_manager
+                cache_mgr = get_news_cache_manager()
+                NewsSkill._history_id = cache_mgr.save_search(query, results)
+            except Exception:
+                pass  # Silently fail if cache save fails
+            self._prefetch(results)
+            return results
+
+        def _list_items(results: List[Dict[str, Any]]) -> List[str]:
+            output = []
+            for i, item in enumerate(results, 1):
+                title = item.get('title', 'No Title')
+                source = item.get('source', 'Unknown Source')
+                date = item.get('date', '')
+                line = f"{i}. [{source}] {title} ({date})"
+                if item.get('similar'):
+                    line += f" (+{len(item['similar'])} similar)"
+                output.append(line)
+            return output
+
         @tool
-        def search_news(query: str) -> str:
+        def search_news(query: str, region: str = DEFAULT_REGION, refresh: bool = False) -> str:
             """
             Search for news articles based on a query.
             Example: "local news in Sydney today"
-            Returns a numbered list of news items.
+            Returns a numbered list of news items. Results of the same query are reused for a few minutes.
+            Args:
+                query: The news search query.
+                region: Region code such as "us-en", "uk-en" or "au-en" (default: "us-en").
+                refresh: Fetch fresh results even if the query was searched recently.
             """
             try:
-                # DDGS().news returns a generator, convert to list
-                # Use positional argument for query as per ddgs package
-                results = list(DDGS().news(query, max_results=10))
+                results, fetched_at = fetch_news(query, self._query_cache(), region=region, refresh=refresh)
 
                 if not results:
                     return f"No news found for '{query}'."
 
-                NewsSkill._news_cache = results
-                NewsSkill._last_query = query
-                NewsSkill._just_searched = True
-                NewsSkill._current_cache_id = None
-
-                # Save to news cache manager
-                try:
-                    from core.news_cache import get_news_cache_manager
-                    cache_mgr = get_news_cache_manager()
-                    cache_mgr.save_search(query, results)
-                except Exception:
-                    pass  # Silently fail if cache save fails
-
-                output = [f"Found {len(results)} news items for '{query}':\n"]
-                for i, item in enumerate(results, 1):
-                    title = item.get('title', 'No Title')
-                    source = item.get('source', 'Unknown Source')
-                    date = item.get('date', '')
-                    output.append(f"{i}. [{source}] {title} ({date})")
+                found = len(results)
+                results = _remember(query, results)
+
+                header = f"Found {found} news items for '{query}'"
+                if len(results) < found:
+                    header += f", {len(results)} distinct stories"
+                if fetched_at is not None:
+                    header += f" (cached {int((time.time() - fetched_at) // 60)} min ago; use refresh=True for the latest)"
+                output = [header + ":\n"]
+                output.extend(_list_items(results))
 
                 output.append("\nTo read a specific item, use the 'read_news_item' tool with the item number (e.g., 'read_news_item 1').")
                 output.append("\nTip: Use 'list_cached_news' to browse previous searches, or 'load_cached_news' to reload one.")
@@ -95,13 +162,50 @@ class NewsSkill(Skill):
                 return f"Error searching news: {str(e)}"
 
         @tool
-        def read_news_item(index: int) -> str:
+        def search_news_multi(queries: List[str], region: str = DEFAULT_REGION, refresh: bool = False) -> str:
+            """
+            Search news for several queries at once and combine the results without duplicates.
+            Use this when the user asks about several topics together, e.g. "news about AI, climate and the election".
+            Args:
+                queries: The news search queries (one topic each).
+                region: Region code such as "us-en", "uk-en" or "au-en" (default: "us-en").
+                refresh: Fetch fresh results even for queries searched recently.
             """
-            Read the title and content summary of a specific news item from the last search results.
+            queries = [q.strip() for q in queries if q and q.strip()]
+            if not queries:
+                return "Please provide at least one query."
+            try:
+                results, statuses = fetch_many(queries, self._query_cache(), region=region, refresh=refresh)
+            except Exception as e:
+                return f"Error searching news: {str(e)}"
+
+            if not results:
+                errors = [f"'{s['query']}': {s['error']}" for s in statuses if s["error"]]
+                return "No news found for these queries." + (f" Errors: {'; '.join(errors)}" if errors else "")
+
+            combined_query = " | ".join(queries)
+            results = _remember(combined_query, results)
+
+            output = [f"Found {len(results)} distinct stories for {len(queries)} queries:"]
+            for status in statuses:
+                if status["error"]:
+                    output.append(f"  ❌ '{status['query']}': {status['error']}")
+                else:
+                    output.append(f"  - '{status['query']}': {status['count']} items{' (cached)' if status['cached'] else ''}")
+            output.append("")
+            output.extend(_list_items(results))
+            output.append("\nTo read a specific item, use the 'read_news_item' tool with the item number (e.g., 'read_news_item 1').")
+            return "\n".join(output)
+
+        @tool
+        def read_news_item(index: int, max_chars: int = 4000) -> str:
+            """
+            Read a specific news item from the last search results: title, summary and the article text.
             Use this when the user asks to see details, read, show, or get more information about a specific news item by number.
             Examples: "read 1", "show me detail for item 2", "get more info on article 3", "what about item 4", "tell me about number 5".
             Args:
                 index: The number of the news item to read (1-based).
+                max_chars: Maximum characters of article text shown (default: 4000).
             """
             if not NewsSkill._news_cache:
                 return "No news items available. Please search for news first or load a cached search."
@@ -116,12 +220,29 @@ class NewsSkill(Skill):
             url = item.get('url', '#')
             date = item.get('date', '')
 
-            return (
+            output = (
                 f"**Title:** {title}\n"
                 f"**Source:** {source} ({date})\n"
                 f"**Summary:** {body}\n"
                 f"**Link:** {url}"
             )
+            if item.get('similar'):
+                sources = sorted({s.get('source') for s in item['similar'] if s.get('source')})
+                output += f"\n**Also reported by:** {', '.join(sources) or 'other sources'} ({len(item['similar'])} similar articles)"
+
+            if url.startswith("http"):
+                # Prefetched articles are instant; otherwise wait briefly for the download
+                article = get_article_prefetcher().get_text(url, wait=8.0, fetch=True)
+                if article["text"]:
+                    text = article["text"]
+                    if len(text) > max_chars:
+                        text = text[:max_chars].rsplit(" ", 1)[0] + " ..."
+                    output += f"\n\n**Article:**\n{text}"
+                elif article["status"] == "pending":
+                    output += "\n\n(The article is still downloading; try again in a moment.)"
+                elif article["error"]:
+                    output += f"\n\n(Article text unavailable: {article['error']})"
+            return output
 
         @tool
         def save_news_search() -> str:
@@ -135,29 +256,43 @@ class NewsSkill(Skill):
             try:
                 from core.news_cache import get_news_cache_manager
                 cache_mgr = get_news_cache_manager()
-                cache_id = cache_mgr.save_search(NewsSkill._last_query, NewsSkill._news_cache)
+                # Searches are already in the history; pin that entry so retention keeps it
+                cache_id = NewsSkill._current_cache_id or NewsSkill._history_id
+                if not cache_id or not cache_mgr.pin_search(cache_id):
+                    cache_id = cache_mgr.save_search(NewsSkill._last_query, NewsSkill._news_cache, pinned=True)
                 return f"✅ Successfully saved news search! (ID: {cache_id})\nUse 'list_cached_news' to browse saved searches, or 'load_cached_news' to reload this one."
             except Exception as e:
                 return f"Error saving news search: {str(e)}"
 
         @tool
-        def list_cached_news() -> str:
+        def list_cached_news(page: int = 1) -> str:
             """
-            List all cached news searches.
-            Shows all previously saved news searches with their timestamps.
+            List cached news searches, most recent first, 20 per page.
+            Shows previously saved news searches with their timestamps.
+            Args:
+                page: Page number (1-based).
             """
+            page_size = 20
             try:
                 from core.news_cache import get_news_cache_manager
                 cache_mgr = get_news_cache_manager()
-                searches = cache_mgr.get_all_searches()
+                total = cache_mgr.count_searches()
 
-                if not searches:
+                if not total:
                     return "No cached news searches found. Search for news and use 'save_news_search' to save it!"
 
-                output = ["📰 Saved News Searches:\n"]
-                for i, entry in enumerate(searches, 1):
-                    output.append(f"{i}. {entry.get_display_title()}")
+                pages = (total + page_size - 1) // page_size
+                page = min(max(1, page), pages)
+                offset = (page - 1) * page_size
+                searches = cache_mgr.list_searches(offset, page_size)
+
+                output = [f"📰 Saved News Searches (page {page} of {pages}, {total} total):\n"]
+                for i, entry in enumerate(searches, offset + 1):
+                    pin = " 📌" if entry.pinned else ""
+                    output.append(f"{i}. {entry.get_display_title()} - {entry.item_count} items{pin}")
 
+                if page < pages:
+                    output.append(f"\nMore searches: 'list_cached_news {page + 1}'.")
                 output.append("\nTo load a search, say 'load_cached_news 1' (or whatever number you want).")
                 output.append("You can also say 'load most recent news' to load the most recent one.")
                 return "\n".join(output)
@@ -177,34 +312,160 @@ class NewsSkill(Skill):
             try:
                 from core.news_cache import get_news_cache_manager
                 cache_mgr = get_news_cache_manager()
-                searches = cache_mgr.get_all_searches()
+                total = cache_mgr.count_searches()
 
-                if not searches:
+                if not total:
                     return "No cached news searches found."
 
-                if index < 1 or index > len(searches):
-                    return f"Invalid index. Please choose a number between 1 and {len(searches)}."
+                if index < 1 or index > total:
+                    return f"Invalid index. Please choose a number between 1 and {total}."
 
-                entry = searches[index - 1]
+                entry = cache_mgr.get_search_at(index - 1)
+                entry.news_items = _collapse(entry.news_items)
                 NewsSkill._news_cache = entry.news_items
                 NewsSkill._last_query = entry.query
                 NewsSkill._just_searched = True
                 NewsSkill._current_cache_id = entry.cache_id
+                self._prefetch(entry.news_items)
 
                 output = [f"✅ Loaded news search: \"{entry.query}\"\n"]
                 output.append(f"Found {len(entry.news_items)} news items:\n")
-
-                for i, item in enumerate(entry.news_items, 1):
-                    title = item.get('title', 'No Title')
-                    source = item.get('source', 'Unknown Source')
-                    date = item.get('date', '')
-                    output.append(f"{i}. [{source}] {title} ({date})")
+                output.extend(_list_items(entry.news_items))
 
                 return "\n".join(output)
 
             except Exception as e:
                 return f"Error loading cached news: {str(e)}"
 
+        @tool
+        def set_news_retention(max_entries: int = None, max_age_days: float = None, max_articles: int = None) -> str:
+            """
+            Configure how long news search history is kept. Saved (pinned) searches are always kept.
+            Args:
+                max_entries: Maximum number of unpinned searches kept (0 = unlimited).
+                max_age_days: Delete unpinned searches and downloaded articles older than this many days (0 = never).
+                max_articles: Maximum number of downloaded articles kept for offline reading (0 = unlimited).
+            """
+            try:
+                from core.news_cache import get_news_cache_manager
+                cache_mgr = get_news_cache_manager()
+                if max_entries is None and max_age_days is None and max_articles is None:
+                    retention = cache_mgr.retention
+                    return (
+                        f"News history retention: max_entries={retention['max_entries']}, max_age_days={retention['max_age_days']}, "
+                        f"max_articles={retention['max_articles']} (0 = no limit)."
+                    )
+                before = cache_mgr.count_searches()
+                retention = cache_mgr.set_retention(max_entries, max_age_days, max_articles)
+                removed = before - cache_mgr.count_searches()
+                return (
+                    f"✅ News history retention: max_entries={retention['max_entries']}, max_age_days={retention['max_age_days']}, "
+                    f"max_articles={retention['max_articles']} (0 = no limit). Removed {removed} old searches."
+                )
+            except Exception as e:
+                return f"❌ Error setting news retention: {str(e)}"
+
+        @tool
+        def subscribe_feed(url: str, name: str = None, interval_minutes: int = DEFAULT_INTERVAL // 60) -> str:
+            """
+            Follow a news source through its RSS or Atom feed. New articles are collected in the
+            background, so "today's news from <source>" is answered instantly with feed_news.
+            Args:
+                url: The feed URL (RSS or Atom).
+                name: Optional short name for the source (default: the feed's title).
+                interval_minutes: How often to check the feed (default: 30).
+            """
+            try:
+                from core.news_cache import get_news_cache_manager
+                cache_mgr = get_news_cache_manager()
+                existing = next((f for f in cache_mgr.list_feeds() if f["url"] == url), None)
+                if existing is not None and not name and existing["name"] != url:
+                    # Re-subscribing without a name keeps the one already shown for the feed
+                    name = existing["name"]
+                cache_mgr.add_feed(url, name or url, interval=max(5, interval_minutes) * 60)
+                fetcher = get_feed_fetcher()
+                result = fetcher.fetch({"url": url, "name": name or ""}, force=True)
+                if result["status"] == "error":
+                    # Only undo a subscription this call created; an existing one keeps its items
+                    if existing is None:
+                        cache_mgr.remove_feed(url)
+                    return f"❌ Could not read the feed at {url}: {result['error']}"
+                if not name:
+                    name = result["title"] or url
+                    cache_mgr.update_feed(url, name=name)
+                fetcher.start()
+                return f"✅ Subscribed to {name}: {result['new']} articles stored. Checking every {max(5, interval_minutes)} minutes."
+            except Exception as e:
+                return f"❌ Error subscribing to feed: {str(e)}"
+
+        @tool
+        def unsubscribe_feed(name: str) -> str:
+            """
+            Stop following a news feed.
+            Args:
+                name: Name, URL or website of the feed (as shown by list_feeds).
+            """
+            from core.news_cache import get_news_cache_manager
+            cache_mgr = get_news_cache_manager()
+            feeds = find_feeds(cache_mgr, name)
+            if not feeds:
+                return f"No subscribed feed matches '{name}'. Use list_feeds to see subscriptions."
+            if len(feeds) > 1:
+                return f"'{name}' matches several feeds: {', '.join(f['name'] for f in feeds)}. Please be more specific."
+            cache_mgr.remove_feed(feeds[0]["url"])
+            return f"✅ Unsubscribed from {feeds[0]['name']}."
+
+        @tool
+        def list_feeds() -> str:
+            """
+            List subscribed news feeds with their article counts and last check.
+            """
+            from core.news_cache import get_news_cache_manager
+            feeds = get_news_cache_manager().list_feeds()
+            if not feeds:
+                return "No news feeds subscribed. Use 'subscribe_feed' with an RSS or Atom URL."
+            output = [f"📡 {len(feeds)} subscribed feeds:"]
+            for feed in feeds:
+                checked = (
+                    datetime.fromtimestamp(feed["last_checked"]).strftime("%b %d %H:%M") if feed["last_checked"] else "never"
+                )
+                output.append(
+                    f"- {feed['name']}: {feed['items']} articles, checked {checked} ({feed['last_status'] or 'pending'}) | {feed['url']}"
+                )
+            return "\n".join(output)
+
+        @tool
+        def feed_news(source: str = None, hours: int = 24, limit: int = 20, refresh: bool = False) -> str:
+            """
+            Read the latest news from subscribed feeds, answered from the local cache.
+            Use this for "today's news from <source>" when the source is subscribed (see list_feeds).
+            Args:
+                source: Feed name, URL or website; omit for all subscribed feeds.
+                hours: Only articles published within this many hours (default: 24).
+                limit: Maximum articles (default: 20).
+                refresh: Check the feeds for new articles first.
+            """
+            from core.news_cache import get_news_cache_manager
+            cache_mgr = get_news_cache_manager()
+            feeds = find_feeds(cache_mgr, source) if source else cache_mgr.list_feeds()
+            if not feeds:
+                if source:
+                    return f"No subscribed feed matches '{source}'. Use search_news, or subscribe_feed to follow it."
+                return "No news feeds subscribed. Use 'subscribe_feed' with an RSS or Atom URL."
+            if refresh:
+                get_feed_fetcher().fetch_all(feeds)
+
+            results = cache_mgr.feed_items([f["url"] for f in feeds], since=time.time() - hours * 3600, limit=limit)
+            label = source or "your feeds"
+            if not results:
+                return f"No articles from {label} in the last {hours} hours."
+            results = _remember(f"feeds: {label}", results)
+
+            output = [f"📡 {len(results)} articles from {label} in the last {hours} hours:\n"]
+            output.extend(_list_items(results))
+            output.append("\nTo read a specific item, use the 'read_news_item' tool with the item number (e.g., 'read_news_item 1').")
+            return "\n".join(output)
+
         @tool
         def check_news_cache() -> str:
             """
@@ -234,4 +495,4 @@ class NewsSkill(Skill):
             output.append("\nTip: Use 'list_cached_news' to see all saved searches, or 'save_news_search' to save the current one.")
             return "\n".join(output)
 
-        return [search_news, read_news_item, save_news_search, list_cached_news, load_cached_news, check_news_cache]
+        return [search_news, search_news_multi, read_news_item, save_news_search, list_cached_news, load_cached_news, set_news_retention, subscribe_feed, unsubscribe_feed, list_feeds, feed_news, check_news_cache]
@@ -0,0 +1,243 @@
+"""
+Near-duplicate news clustering.
+
+The same story is syndicated across many sources with slightly different
+titles and snippets. Every news result gets a 64-bit SimHash of its title and
+body; results whose signatures differ in at most MAX_DISTANCE bits belong to
+the same story cluster. Signatures persist in SQLite, so clusters span all
+cached searches.
+
+Lookups use banded LSH with multi-probing: the signature is split into
+BANDS bands of 16 bits, each stored in an indexed table. A lookup probes, for
+every band, all values within PROBE_RADIUS bits of the query's band value, so
+any signature within BANDS * (PROBE_RADIUS + 1) - 1 bits (11) is found.
+Candidates come from the band index rather than a scan, and only about 1 in
+120 stored signatures is compared per lookup.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from itertools import combinations
+from typing import List, Dict, Any, Optional
+
+from core.paths import paths
+from core.vector_store import normalize_url
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+PROBE_RADIUS = 2
+MAX_DISTANCE = 10
+# Signatures older than this are pruned from the index
+MAX_AGE_DAYS = 30
+
+_TOKEN_RE = re.compile(r"\w+")
+# " - Reuters", " | CNN": the source suffix differs between syndicated copies
+_TITLE_SOURCE_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    url_key TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    cluster_id TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signatures_cluster ON signatures (cluster_id);
+CREATE INDEX IF NOT EXISTS signatures_seen_at ON signatures (seen_at);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    url_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);
+CREATE INDEX IF NOT EXISTS bands_url ON bands (url_key);
+"""
+
+
+def _features(text: str) -> Dict[str, int]:
+    features: Dict[str, int] = {}
+    for token in _TOKEN_RE.findall(text.casefold()):
+        if token not in _STOPWORDS:
+            features[token] = features.get(token, 0) + 1
+    return features
+
+
+def simhash(title: str, body: str = "") -> int:
+    """64-bit SimHash of a news item's title and body (word features, stopwords dropped)."""
+    title = _TITLE_SOURCE_RE.sub("", title or "")
+    weights = [0] * BITS
+    for feature, count in _features(f"{title} {body or ''}").items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def bands(signature: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(signature >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def _probes(value: int) -> List[int]:
+    """Band values within PROBE_RADIUS bits of value."""
+    probes = [value]
+    for radius in range(1, PROBE_RADIUS + 1):
+        for flipped in combinations(range(BAND_BITS), radius):
+            probe = value
+            for bit in flipped:
+                probe ^= 1 << bit
+            probes.append(probe)
+    return probes
+
+
+def _to_sql(signature: int) -> int:
+    # SQLite integers are signed 64-bit
+    return signature - (1 << 64) if signature >= 1 << 63 else signature
+
+
+def _from_sql(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def item_key(item: Dict[str, Any]) -> str:
+    return normalize_url(item.get("url", "")) or f"title:{(item.get('title') or '').casefold()}"
+
+
+class NewsClusterIndex:
+    """Persistent SimHash/LSH index assigning news items to story clusters."""
+
+    def __init__(self, path: str, max_distance: int = MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self.stats = {"lookups": 0, "candidates": 0}
+        self.prune()
+
+    def _nearest(self, signature: int) -> Optional[str]:
+        """Cluster of the closest stored signature within max_distance, via band candidates."""
+        candidates = {}
+        for band, value in enumerate(bands(signature)):
+            probes = _probes(value)
+            rows = self._conn.execute(
+                f"SELECT s.url_key, s.simhash, s.cluster_id FROM bands b JOIN signatures s ON s.url_key = b.url_key "
+                f"WHERE b.band = ? AND b.value IN ({','.join('?' * len(probes))})", [band] + probes
+            ).fetchall()
+            for url_key, value, cluster_id in rows:
+                candidates[url_key] = (value, cluster_id)
+        self.stats["lookups"] += 1
+        self.stats["candidates"] += len(candidates)
+        best, best_distance = None, self.max_distance + 1
+        for value, cluster_id in candidates.values():
+            distance = hamming(signature, _from_sql(value))
+            if distance < best_distance:
+                best, best_distance = cluster_id, distance
+        return best
+
+    def assign(self, items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Assign news items to clusters, adding new items to the index.
+
+        Returns:
+            The cluster id of each item, in order.
+        """
+        now = time.time()
+        cluster_ids = []
+        with self._lock, self._conn:
+            for item in items:
+                key = item_key(item)
+                row = self._conn.execute("SELECT cluster_id FROM signatures WHERE url_key = ?", (key,)).fetchone()
+                if row:
+                    self._conn.execute("UPDATE signatures SET seen_at = ? WHERE url_key = ?", (now, key))
+                    cluster_ids.append(row[0])
+                    continue
+                signature = simhash(item.get("title", ""), item.get("body", ""))
+                cluster_id = self._nearest(signature) or key
+                self._conn.execute(
+                    "INSERT INTO signatures VALUES (?, ?, ?, ?)", (key, _to_sql(signature), cluster_id, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO bands VALUES (?, ?, ?)",
+                    [(i, value, key) for i, value in enumerate(bands(signature))]
+                )
+                cluster_ids.append(cluster_id)
+        return cluster_ids
+
+    def cluster_sizes(self, cluster_ids: List[str]) -> Dict[str, int]:
+        """Number of distinct items indexed per cluster."""
+        ids = list(set(cluster_ids))
+        sizes = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT cluster_id, COUNT(*) FROM signatures WHERE cluster_id IN ({','.join('?' * len(batch))}) "
+                    f"GROUP BY cluster_id", batch
+                ).fetchall()
+                sizes.update(rows)
+        return sizes
+
+    def prune(self, max_age_days: float = MAX_AGE_DAYS) -> int:
+        """Drop signatures not seen for max_age_days."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM bands WHERE url_key IN (SELECT url_key FROM signatures WHERE seen_at < ?)", (cutoff,)
+            )
+            return self._conn.execute("DELETE FROM signatures WHERE seen_at < ?", (cutoff,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+
+def collapse(items: List[Dict[str, Any]], index: NewsClusterIndex) -> List[Dict[str, Any]]:
+    """
+    Keep the first (best-ranked) item of every story cluster. The representative
+    lists the others under "similar" (title, source, url only) and carries
+    "cluster" and "cluster_size" (items of the story seen across all searches).
+    """
+    cluster_ids = index.assign(items)
+    sizes = index.cluster_sizes(cluster_ids)
+    representatives: Dict[str, Dict[str, Any]] = {}
+    collapsed = []
+    for item, cluster_id in zip(items, cluster_ids):
+        representative = representatives.get(cluster_id)
+        if representative is None:
+            representative = representatives[cluster_id] = dict(
+                item, cluster=cluster_id, cluster_size=sizes.get(cluster_id, 1), similar=list(item.get("similar", []))
+            )
+            collapsed.append(representative)
+        elif item_key(item) != item_key(representative):
+            representative["similar"].append(
+                {"title": item.get("title", ""), "source": item.get("source", ""), "url": item.get("url", "")}
+            )
+    return collapsed
+
+
+# Global instance
+_cluster_index: Optional[NewsClusterIndex] = None
+
+
+def get_cluster_index() -> NewsClusterIndex:
+    """Get the global news cluster index (news_cache/clusters.db)."""
+    global _cluster_index
+    if _cluster_index is None:
+        cache_dir = paths.get_skill_data_dir("news_cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        _cluster_index = NewsClusterIndex(os.path.join(cache_dir, "clusters.db"))
+    return _cluster_index
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Fake Feed Server
+In-process HTTP stand-in serving RSS 2.0 and Atom feeds for testing the news
+feed fetcher without network access. Feeds answer conditional requests
+(If-None-Match / If-Modified-Since) with 304 until entries are added, and
+every response is counted by status code.
+
+Usage:
+    python skills/news/fake_feed_server.py --entries 20 --port 8765
+"""
+
+import time
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Optional
+from xml.sax.saxutils import escape
+
+
+class _Feed:
+    def __init__(self, kind: str, title: str):
+        self.kind = kind
+        self.title = title
+        self.entries: List[Dict] = []
+        self.version = 0
+        self.modified = time.time()
+
+    @property
+    def etag(self) -> str:
+        return f'"v{self.version}"'
+
+    def render(self, base_url: str) -> bytes:
+        if self.kind == "atom":
+            entries = "".join(
+                f"<entry><title>{escape(e['title'])}</title><link rel=\"alternate\" href=\"{escape(e['url'])}\"/>"
+                f"<id>{escape(e['id'])}</id><updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(e['published']))}</updated>"
+                f"<summary type=\"html\">{escape(e['summary'])}</summary>"
+                + (f"<content type=\"html\">{escape(e['content'])}</content>" if e.get("content") else "")
+                + "</entry>"
+                for e in reversed(self.entries)
+            )
+            return (
+                f"<?xml version=\"1.0\" encoding=\"utf-8\"?><feed xmlns=\"http://www.w3.org/2005/Atom\">"
+                f"<title>{escape(self.title)}</title><link href=\"{escape(base_url)}\"/>{entries}</feed>"
+            ).encode("utf-8")
+        items = "".join(
+            f"<item><title>{escape(e['title'])}</title><link>{escape(e['url'])}</link>"
+            f"<guid>{escape(e['id'])}</guid><pubDate>{formatdate(e['published'])}</pubDate>"
+            f"<description>{escape(e['summary'])}</description>"
+            + (f"<content:encoded>{escape(e['content'])}</content:encoded>" if e.get("content") else "")
+            + "</item>"
+            for e in reversed(self.entries)
+        )
+        return (
+            f"<?xml version=\"1.0\" encoding=\"utf-8\"?>"
+            f"<rss version=\"2.0\" xmlns:content=\"http://purl.org/rss/1.0/modules/content/\"><channel>"
+            f"<title>{escape(self.title)}</title><link>{escape(base_url)}</link>{items}</channel></rss>"
+        ).encode("utf-8")
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, status: int):
+        with self.server.owner._lock:
+            self.server.owner.responses[status] = self.server.owner.responses.get(status, 0) + 1
+
+    def do_GET(self):
+        owner = self.server.owner
+        if owner.latency:
+            time.sleep(owner.latency)
+        feed = owner.feeds.get(self.path)
+        if feed is None:
+            self._count(404)
+            self.send_error(404)
+            return
+        with owner._lock:
+            etag = feed.etag
+            last_modified = formatdate(feed.modified, usegmt=True)
+            body = feed.render(owner.url(self.path))
+
+        if self.headers.get("If-None-Match") == etag or (
+            self.headers.get("If-None-Match") is None and self.headers.get("If-Modified-Since") == last_modified
+        ):
+            self._count(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self._count(200)
+        self.send_response(200)
+        content_type = "application/atom+xml" if feed.kind == "atom" else "application/rss+xml"
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        owner.bytes_sent += len(body)
+        self.wfile.write(body)
+
+
+class FakeFeedServer:
+    """HTTP server publishing fake RSS/Atom feeds at arbitrary paths."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            latency: Seconds added to every request.
+            host: Interface to listen on.
+            port: Port to listen on (0 = any free port).
+        """
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.feeds: Dict[str, _Feed] = {}
+        self.responses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def add_feed(self, path: str, title: str, kind: str = "rss"):
+        """Publish an empty feed ("rss" or "atom") at path."""
+        self.feeds[path] = _Feed(kind, title)
+
+    def add_entries(self, path: str, count: int = 1, content: bool = False) -> List[Dict]:
+        """Append entries to a feed; this changes its ETag and Last-Modified."""
+        feed = self.feeds[path]
+        added = []
+        with self._lock:
+            for _ in range(count):
+                n = len(feed.entries) + 1
+                entry = {
+                    "id": f"{path}#{n}",
+                    "title": f"{feed.title} story {n}",
+                    "url": self.url(f"{path}/story-{n}"),
+                    "summary": f"<p>Summary of <b>story {n}</b> from {feed.title}.</p>",
+                    "published": time.time() - (count - len(added)) * 60,
+                }
+                if content:
+                    entry["content"] = f"<p>Full text of story {n}. " + "More detail. " * 50 + "</p>"
+                feed.entries.append(entry)
+                added.append(entry)
+            feed.version += 1
+            # Last-Modified has one-second resolution
+            feed.modified = max(time.time(), feed.modified + 1)
+        return added
+
+    def reset_counters(self):
+        with self._lock:
+            self.responses = {}
+            self.bytes_sent = 0
+
+    def url(self, path: str) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}{path}"
+
+    @property
+    def address(self):
+        return self._server.server_address[:2] if self._server else (self.host, self.port)
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _FeedHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.address
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake RSS/Atom feed server")
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeFeedServer(port=args.port)
+    server.add_feed("/world.rss", "World Desk")
+    server.add_feed("/tech.atom", "Tech Daily", kind="atom")
+    server.add_entries("/world.rss", args.entries)
+    server.add_entries("/tech.atom", args.entries, content=True)
+    server.start()
+    print(f"Feeds: {server.url('/world.rss')} (RSS), {server.url('/tech.atom')} (Atom)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
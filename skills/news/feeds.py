@@ -0,0 +1,276 @@
+"""
+RSS/Atom feed subscriptions.
+
+Feeds are fetched on a schedule with conditional requests (If-None-Match /
+If-Modified-Since), so an unchanged feed costs one 304 response. Changed
+feeds are parsed straight from the response stream with iterparse, one entry
+at a time, and entries not seen before are stored in the news cache, where
+feed_news reads them without any network access. Full-text entries
+(content:encoded, Atom content) are also stored as article text for
+read_news_item.
+"""
+
+import time
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Iterator, IO
+from urllib.parse import urlsplit
+
+from core.html_text import html_to_text
+from core.news_cache import NewsCacheManager, get_news_cache_manager
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+USER_AGENT = "Mozilla/5.0 (compatible; Collig feed reader)"
+DEFAULT_INTERVAL = 30 * 60
+# Entry summaries are cut at this length
+MAX_BODY_CHARS = 600
+# Entries read per fetch; feeds list the newest first
+MAX_ENTRIES = 200
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+_DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+def _entry(element: ET.Element, source: str) -> Dict[str, Any]:
+    """Normalize an RSS <item> or Atom <entry> element."""
+    fields: Dict[str, Any] = {"title": "", "url": "", "summary": "", "content": "", "guid": "", "date": None}
+    for child in element:
+        tag = _local(child.tag)
+        text = (child.text or "").strip()
+        if tag == "title":
+            fields["title"] = html_to_text(text) if "<" in text or "&" in text else text
+        elif tag == "link":
+            # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+            href = child.get("href")
+            if href is None:
+                fields["url"] = fields["url"] or text
+            elif child.get("rel", "alternate") == "alternate" and not fields["url"]:
+                fields["url"] = href
+        elif tag in ("description", "summary"):
+            fields["summary"] = text
+        elif child.tag == _CONTENT_ENCODED or child.tag == f"{_ATOM}content":
+            fields["content"] = text
+        elif tag in ("guid", "id"):
+            fields["guid"] = text
+        elif tag in ("pubDate", "published", "updated") or child.tag == _DC_DATE:
+            fields["date"] = fields["date"] or _parse_date(text)
+
+    body = html_to_text(fields["summary"] or fields["content"], max_chars=MAX_BODY_CHARS)
+    key_source = fields["guid"] or fields["url"] or fields["title"]
+    return {
+        "key": hashlib.sha1(key_source.encode("utf-8")).hexdigest(),
+        "title": fields["title"] or "No Title",
+        "url": fields["url"],
+        "body": body,
+        "source": source,
+        "published": fields["date"],
+        "content": fields["content"],
+    }
+
+
+def parse_feed(stream: IO[bytes], source: str = "", max_entries: int = MAX_ENTRIES) -> Iterator[Dict[str, Any]]:
+    """
+    Stream entries out of an RSS 2.0, RSS 1.0 or Atom document.
+
+    Each entry's element is released once read, so memory stays bounded by one
+    entry regardless of feed size. The channel/feed title is yielded as
+    {"feed_title": ...} where it appears in the document.
+
+    Args:
+        stream: Binary file-like object (e.g. the raw HTTP response).
+        source: Source name recorded on entries.
+        max_entries: Stop after this many entries.
+    """
+    count = 0
+    parents: List[ET.Element] = []
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        tag = _local(element.tag)
+        if tag in ("item", "entry"):
+            yield _entry(element, source)
+            # Detach the entry so the tree never holds more than the one being read
+            if parents:
+                parents[-1].remove(element)
+            count += 1
+            if count >= max_entries:
+                return
+        elif tag == "title" and parents and _local(parents[-1].tag) in ("channel", "feed"):
+            yield {"feed_title": (element.text or "").strip()}
+
+
+class FeedFetcher:
+    """Fetches subscribed feeds on a schedule and stores their new entries."""
+
+    def __init__(self, store: NewsCacheManager, max_workers: int = 4, timeout: tuple = (5.0, 15.0), poll: float = 60.0):
+        """
+        Args:
+            store: News cache holding subscriptions and entries.
+            max_workers: Feeds fetched at once.
+            timeout: (connect, read) timeout per request in seconds.
+            poll: Seconds between checks for feeds that are due.
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.poll = poll
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"fetches": 0, "not_modified": 0, "new_items": 0, "errors": 0}
+
+    def _session(self):
+        if getattr(self._local, "session", None) is None:
+            self._local.session = requests.Session()
+            self._local.session.headers["User-Agent"] = USER_AGENT
+        return self._local.session
+
+    def fetch(self, feed: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+        """
+        Fetch one feed and store its new entries.
+
+        Args:
+            feed: A row of NewsCacheManager.list_feeds().
+            force: Ignore the stored ETag/Last-Modified and download the feed in full.
+
+        Returns:
+            {"url", "status" ("ok" | "not_modified" | "error"), "new", "title", "error"}
+        """
+        if requests is None:
+            raise ImportError("The requests package is required to fetch feeds.")
+        url = feed["url"]
+        headers = {}
+        if not force:
+            if feed.get("etag"):
+                headers["If-None-Match"] = feed["etag"]
+            if feed.get("last_modified"):
+                headers["If-Modified-Since"] = feed["last_modified"]
+
+        result = {"url": url, "status": "ok", "new": 0, "title": None, "error": None}
+        self.stats["fetches"] += 1
+        try:
+            with self._session().get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304:
+                    self.stats["not_modified"] += 1
+                    result["status"] = "not_modified"
+                    self.store.update_feed(url, last_checked=time.time(), last_status="not modified")
+                    return result
+                response.raise_for_status()
+                response.raw.decode_content = True
+
+                items = []
+                for entry in parse_feed(response.raw, source=feed.get("name") or ""):
+                    if "feed_title" in entry:
+                        result["title"] = entry["feed_title"]
+                    else:
+                        items.append(entry)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except Exception as e:
+            self.stats["errors"] += 1
+            result.update(status="error", error=str(e)[:300])
+            self.store.update_feed(url, last_checked=time.time(), last_status=f"error: {result['error']}")
+            return result
+
+        # Unnamed subscriptions show the feed's own title as the source
+        if not feed.get("name") or feed.get("name") == url:
+            source = result["title"] or urlsplit(url).hostname or url
+            for item in items:
+                item["source"] = source
+        result["new"] = self.store.add_feed_items(url, items)
+        self.stats["new_items"] += result["new"]
+        # Full-text feeds: keep the content as the article text for offline reading
+        for item in items:
+            if item["url"] and item["content"] and len(item["content"]) > len(item["body"]):
+                status = self.store.article_status([item["url"]])
+                if not status.get(item["url"], {}).get("has_text"):
+                    self.store.put_article(item["url"], text=html_to_text(item["content"]))
+        self.store.update_feed(
+            url, etag=etag, last_modified=last_modified, last_checked=time.time(),
+            last_status=f"ok, {len(items)} entries, {result['new']} new"
+        )
+        return result
+
+    def due_feeds(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [f for f in self.store.list_feeds() if now - f["last_checked"] >= f["interval"]]
+
+    def fetch_all(self, feeds: List[Dict[str, Any]] = None, force: bool = False) -> List[Dict[str, Any]]:
+        """Fetch feeds concurrently (default: those that are due)."""
+        feeds = self.due_feeds() if feeds is None else feeds
+        if not feeds:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(feeds))) as executor:
+            return list(executor.map(lambda feed: self.fetch(feed, force), feeds))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.fetch_all()
+            except Exception as e:
+                print(f"Warning: Feed fetch failed: {e}")
+            self._stop.wait(self.poll)
+
+    def start(self):
+        """Start the background schedule (idempotent)."""
+        if requests is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="news-feeds", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def find_feeds(store: NewsCacheManager, name: str) -> List[Dict[str, Any]]:
+    """Subscribed feeds whose name, URL or host matches name (case-insensitive substring)."""
+    needle = (name or "").strip().casefold()
+    matches = []
+    for feed in store.list_feeds():
+        host = (urlsplit(feed["url"]).hostname or "").casefold()
+        if needle in feed["name"].casefold() or needle in feed["url"].casefold() or needle in host:
+            matches.append(feed)
+    return matches
+
+
+# Global instance
+_fetcher: Optional[FeedFetcher] = None
+
+
+def get_feed_fetcher() -> FeedFetcher:
+    """Get the global feed fetcher."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = FeedFetcher(get_news_cache_manager())
+    return _fetcher
@@ -0,0 +1,228 @@
+"""
+News article prefetch.
+
+After a search, the top results' pages are downloaded in the background so
+read_news_item and the CLI news browser can show the article text instantly
+and offline. Downloads run on a bounded worker pool, at most a few at a time
+per host, with connect/read timeouts and a size cap; readable text is
+extracted with html_to_text and stored compressed in the news cache database.
+"""
+
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+from core.html_text import html_to_text
+from core.news_cache import NewsCacheManager, get_news_cache_manager
+
+try:
+    import requests
+    from requests.compat import chardet
+except ImportError:
+    requests = None
+    chardet = None
+
+USER_AGENT = "Mozilla/5.0 (compatible; Collig news reader)"
+# Failed downloads are not retried by prefetch until this many seconds later
+RETRY_FAILED_AFTER = 3600
+# Stored article text is cut at this length
+MAX_ARTICLE_CHARS = 50_000
+
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="text/html; charset=...">
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+def html_encoding(content_type: str, data: bytes) -> str:
+    """
+    Character encoding of an HTML page: the Content-Type charset if the header
+    names one, else the page's <meta> charset, else UTF-8 if the bytes are valid
+    UTF-8, else a guess from the content.
+
+    requests reports ISO-8859-1 for any text/* response without a charset
+    parameter, which would turn UTF-8 pages declared only in <meta> into mojibake.
+    """
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    if match:
+        return match.group(1)
+    match = _META_CHARSET_RE.search(data[:4096])
+    if match:
+        return match.group(1).decode("ascii", errors="replace")
+    try:
+        data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # The size cap may have cut a multi-byte character at the very end
+        if e.start >= len(data) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    guess = chardet.detect(bytes(data)).get("encoding") if chardet is not None else None
+    return guess or "utf-8"
+
+
+class ArticlePrefetcher:
+    """Downloads and stores news article text on a background worker pool."""
+
+    def __init__(
+        self,
+        store: NewsCacheManager,
+        max_workers: int = 6,
+        per_host: int = 2,
+        timeout: Tuple[float, float] = (5.0, 10.0),
+        max_bytes: int = 2 * 1024 * 1024
+    ):
+        """
+        Args:
+            store: News cache holding the article text.
+            max_workers: Downloads running at once overall.
+            per_host: Downloads running at once against the same host.
+            timeout: (connect, read) timeout per request in seconds.
+            max_bytes: Larger pages are cut off at this size.
+        """
+        self.store = store
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-prefetch")
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._inflight: Dict[str, Future] = {}
+        # requests.Session is not thread-safe; each worker keeps its own connections
+        self._local = threading.local()
+        self.stats = {"fetched": 0, "failed": 0, "skipped": 0, "bytes": 0}
+
+    def _session(self):
+        if getattr(self._local, "session", None) is None:
+            self._local.session = requests.Session()
+            self._local.session.headers["User-Agent"] = USER_AGENT
+        return self._local.session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _download(self, url: str) -> str:
+        """Fetch a page and return its readable text."""
+        with self._host_slot(url):
+            with self._session().get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                if "html" not in content_type and "text" not in content_type:
+                    raise ValueError(f"Not an HTML page ({content_type or 'unknown type'})")
+                data = bytearray()
+                for block in response.iter_content(64 * 1024):
+                    data.extend(block)
+                    if len(data) >= self.max_bytes:
+                        break
+        encoding = html_encoding(content_type, bytes(data))
+        with self._lock:
+            self.stats["bytes"] += len(data)
+        try:
+            html = data.decode(encoding, errors="replace")
+        except LookupError:
+            html = data.decode("utf-8", errors="replace")
+        return html_to_text(html, max_chars=MAX_ARTICLE_CHARS, skip_boilerplate=True)
+
+    def _fetch(self, url: str) -> Optional[str]:
+        try:
+            text = self._download(url)
+            if not text:
+                raise ValueError("No readable text on the page")
+            self.store.put_article(url, text=text)
+            with self._lock:
+                self.stats["fetched"] += 1
+            return text
+        except Exception as e:
+            self.store.put_article(url, error=str(e)[:300])
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _submit(self, url: str) -> Future:
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                future = self._inflight[url] = self._executor.submit(self._fetch, url)
+            return future
+
+    def prefetch(self, items: List[Dict[str, Any]], top_n: int = 10) -> int:
+        """
+        Queue the articles of the first top_n news items that are not stored yet.
+
+        Returns:
+            Number of downloads queued.
+        """
+        if requests is None or top_n <= 0:
+            return 0
+        urls = [item.get("url") for item in items[:top_n] if (item.get("url") or "").startswith("http")]
+        status = self.store.article_status(urls)
+        queued = 0
+        for url in urls:
+            stored = status.get(url)
+            if stored and (stored["has_text"] or time.time() - stored["fetched_at"] < RETRY_FAILED_AFTER):
+                with self._lock:
+                    self.stats["skipped"] += 1
+                continue
+            self._submit(url)
+            queued += 1
+        return queued
+
+    def is_pending(self, url: str) -> bool:
+        with self._lock:
+            return url in self._inflight
+
+    def get_text(self, url: str, wait: float = 0.0, fetch: bool = False) -> Dict[str, Any]:
+        """
+        Article text for a news item URL.
+
+        Args:
+            url: The article URL.
+            wait: Seconds to wait for a download that is in progress (or started by fetch).
+            fetch: Download now if the article is not stored yet.
+
+        Returns:
+            {"text": str or None, "status": "stored" | "pending" | "failed" | "missing", "error": str or None}
+        """
+        with self._lock:
+            future = self._inflight.get(url)
+        if future is None:
+            stored = self.store.get_article(url)
+            if stored and stored["text"]:
+                return {"text": stored["text"], "status": "stored", "error": None}
+            if not fetch or requests is None:
+                if stored:
+                    return {"text": None, "status": "failed", "error": stored["error"]}
+                return {"text": None, "status": "missing", "error": None}
+            future = self._submit(url)
+
+        try:
+            text = future.result(timeout=wait) if wait > 0 else (future.result() if future.done() else None)
+        except Exception:
+            text = None
+        if text:
+            return {"text": text, "status": "stored", "error": None}
+        if not future.done():
+            return {"text": None, "status": "pending", "error": None}
+        stored = self.store.get_article(url)
+        return {"text": None, "status": "failed", "error": stored["error"] if stored else None}
+
+
+# Global instance
+_prefetcher: Optional[ArticlePrefetcher] = None
+
+
+def get_article_prefetcher() -> ArticlePrefetcher:
+    """Get the global article prefetcher."""
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = ArticlePrefetcher(get_news_cache_manager())
+    return _prefetcher
@@ -0,0 +1,139 @@
+"""
+News search helpers.
+
+Runs DDGS news searches through the shared query cache, spaces out requests
+to each search backend with a rate limiter, and runs several queries at once,
+merging their results without duplicate articles.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from core.news_cache import NewsQueryCache
+from core.vector_store import normalize_url
+
+# News backends of the ddgs package that multi-query searches spread over
+NEWS_BACKENDS = ("duckduckgo", "bing", "yahoo")
+DEFAULT_REGION = "us-en"
+
+
+class RateLimiter:
+    """Minimum spacing between requests, tracked separately per backend."""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, backend: str):
+        """Block until a request to the backend may start."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(backend, 0.0))
+            self._next_slot[backend] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_limiter = RateLimiter()
+# DDGS instances are reused per thread rather than shared across threads
+_local = threading.local()
+
+
+def _ddgs():
+    if getattr(_local, "ddgs", None) is None:
+        from ddgs import DDGS
+        _local.ddgs = DDGS()
+    return _local.ddgs
+
+
+def fetch_news(
+    query: str,
+    cache: NewsQueryCache,
+    region: str = DEFAULT_REGION,
+    backend: str = "auto",
+    max_results: int = 10,
+    refresh: bool = False,
+    limiter: RateLimiter = None
+) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    """
+    Search news, answering from the cache while its entry is fresh.
+
+    Args:
+        query: The search query.
+        cache: Query cache to read and fill.
+        region: DDGS region code.
+        backend: DDGS news backend ("auto" lets ddgs choose).
+        max_results: Maximum results fetched.
+        refresh: Skip the cache and fetch again.
+        limiter: Rate limiter for the backend (default: the module-wide one).
+
+    Returns:
+        (results, fetched_at) where fetched_at is the cache time, or None if just fetched.
+    """
+    if not refresh:
+        entry = cache.get(query, region)
+        if entry is not None:
+            return entry["results"], entry["fetched_at"]
+
+    (limiter or _limiter).wait(backend)
+    results = list(_ddgs().news(query, region=region, max_results=max_results, backend=backend))
+    if results:
+        cache.put(query, region, results)
+    return results, None
+
+
+def merge_results(result_lists: List[List[Dict[str, Any]]], limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Interleave result lists (so every query keeps its best hits near the top)
+    and drop articles already seen under the same normalized URL.
+    """
+    merged = []
+    seen = set()
+    for rank in range(max((len(r) for r in result_lists), default=0)):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            item = results[rank]
+            key = normalize_url(item.get("url", "")) or item.get("title", "")
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return merged[:limit] if limit else merged
+
+
+def fetch_many(
+    queries: List[str],
+    cache: NewsQueryCache,
+    region: str = DEFAULT_REGION,
+    backends: Tuple[str, ...] = NEWS_BACKENDS,
+    max_results: int = 10,
+    refresh: bool = False,
+    max_workers: int = 4,
+    limiter: RateLimiter = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Run several news queries concurrently, assigning backends round-robin.
+
+    Returns:
+        (merged results, one status dict per query with query, count, cached and error)
+    """
+    def run(i: int, query: str) -> Dict[str, Any]:
+        try:
+            results, fetched_at = fetch_news(
+                query, cache, region, backends[i % len(backends)], max_results, refresh, limiter
+            )
+            return {"query": query, "results": results, "cached": fetched_at is not None, "error": None}
+        except Exception as e:
+            return {"query": query, "results": [], "cached": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as executor:
+        statuses = list(executor.map(run, range(len(queries)), queries))
+
+    merged = merge_results([s["results"] for s in statuses])
+    for status in statuses:
+        status["count"] = len(status.pop("results"))
+    return merged, statuses
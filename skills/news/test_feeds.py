@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Feed fetcher check against the local fake feed server: first fetch stores
+every entry, unchanged feeds cost a 304, new entries are picked up
+incrementally, and full-text entries become readable offline.
+
+Usage:
+    python skills/news/test_feeds.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from core.news_cache import NewsCacheManager
+from skills.news.fake_feed_server import FakeFeedServer
+from skills.news.feeds import FeedFetcher, find_feeds
+
+
+def check(label, condition):
+    print(f"{'PASS' if condition else 'FAIL'}: {label}")
+    return condition
+
+
+def main():
+    server = FakeFeedServer()
+    server.add_feed("/world.rss", "World Desk")
+    server.add_feed("/tech.atom", "Tech Daily", kind="atom")
+    server.add_entries("/world.rss", 10)
+    server.add_entries("/tech.atom", 10, content=True)
+    server.start()
+
+    cache_dir = tempfile.mkdtemp(prefix="feeds-test-")
+    ok = True
+    try:
+        store = NewsCacheManager(cache_dir, os.path.join(cache_dir, "retention.json"))
+        store.add_feed(server.url("/world.rss"), "World Desk")
+        store.add_feed(server.url("/tech.atom"), "Tech Daily")
+        fetcher = FeedFetcher(store)
+
+        results = fetcher.fetch_all(store.list_feeds())
+        ok &= check("first fetch stores all entries", sorted(r["new"] for r in results) == [10, 10])
+        ok &= check("feed titles parsed", {r["title"] for r in results} == {"World Desk", "Tech Daily"})
+
+        server.reset_counters()
+        results = fetcher.fetch_all(store.list_feeds())
+        ok &= check("unchanged feeds answer 304", server.responses == {304: 2} and all(r["status"] == "not_modified" for r in results))
+
+        server.add_entries("/world.rss", 3)
+        server.reset_counters()
+        results = {r["url"]: r for r in fetcher.fetch_all(store.list_feeds())}
+        ok &= check("only the changed feed is downloaded", server.responses == {200: 1, 304: 1})
+        ok &= check("new entries picked up incrementally", results[server.url("/world.rss")]["new"] == 3)
+
+        feed_urls = [f["url"] for f in find_feeds(store, "world")]
+        items = store.feed_items(feed_urls, since=time.time() - 86400)
+        ok &= check("today's items answered locally", len(items) == 13 and items[0]["title"] == "World Desk story 13")
+        ok &= check("HTML summaries converted to text", "<" not in items[0]["body"] and "story 13" in items[0]["body"])
+
+        atom_items = store.feed_items([server.url("/tech.atom")], limit=1)
+        article = store.get_article(atom_items[0]["url"])
+        ok &= check("full-text entries stored as articles", bool(article and article["text"].startswith("Full text")))
+
+        ok &= check("due_feeds respects the interval", fetcher.due_feeds() == [])
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 from typing import Dict, Any, List, Optional
 import os
+import re
 import datetime
 from langchain_core.tools import tool, BaseTool
 from .base import Skill
 from core.paths import paths
+from core.profile_store import get_profile_store, normalize_key
+from core.vector_store import content_id, register_store, recover_rebuild
 
 try:
     from langchain_openai import OpenAIEmbeddings
@@ -19,7 +22,9 @@ class ProfileSkill(Skill):
         self.vectorstore = None
         # Use centralized data directory
         self.persist_directory = paths.get_skill_data_dir("personal_profile")
-        
+        self.store = get_profile_store()
+        register_store("user_profile", lambda: self.vectorstore, self.persist_directory)
+
         # Ensure data directory exists
         # os.makedirs(self.persist_directory, exist_ok=True) # Handled by paths
 
@@ -49,9 +54,37 @@ class ProfileSkill(Skill):
                     embedding_function=self.embeddings,
                     collection_name="user_profile"
                 )
+                recover_rebuild(self.vectorstore)
+                if not len(self.store):
+                    self._migrate_from_vectorstore()
             except Exception as e:
                 print(f"Failed to initialize Chroma for profile: {e}")
 
+    def _migrate_from_vectorstore(self):
+        """One-time import of attributes stored only as vector documents into the key-value table."""
+        data = self.vectorstore._collection.get(where={"type": "user_profile_attribute"}, include=["documents", "metadatas"])
+        entries = {}
+        for doc, meta in zip(data.get("documents", []), data.get("metadatas", [])):
+            key = meta.get("key")
+            if not key:
+                continue
+            value = meta.get("value")
+            if value is None:
+                # Legacy content format: "User's {key} is {value}. (Category: {category})"
+                match = re.match(r"User's .+? is (.*)\. \(Category: .*\)$", doc or "", re.DOTALL)
+                value = match.group(1) if match else doc
+            entries[normalize_key(key) or key] = {
+                "value": value,
+                "category": meta.get("category", "general"),
+                "timestamp": meta.get("timestamp", "")
+            }
+        if entries:
+            self.store.import_entries(entries)
+
+    def get_profile(self) -> Dict[str, str]:
+        """The full profile as an in-memory key -> value dict (no embedding call)."""
+        return self.store.as_dict()
+
     @property
     def required_config(self) -> List[str]:
         return ["OPENAI_API_KEY"]
@@ -68,41 +101,37 @@ class ProfileSkill(Skill):
                 value: The value of the attribute (e.g., "Oatlands NSW 2117", "Jacob").
                 category: Optional category (e.g., "location", "identity", "preference").
             """
-            if not self.vectorstore:
-                return "Profile system not initialized. Check OPENAI_API_KEY."
-
-            # Check if key already exists (simple exact match on metadata)
-            # This is a bit tricky with vector stores. We might want to "update" logic.
-            # But for now, we just add a new document. The retrieval will likely find the most recent or relevant one.
-            # To be smarter, we could search for existing key and delete/update it.
-            
-            # Implementation for "upsert" logic based on key:
-            try:
-                collection = self.vectorstore._collection
-                # Find by key in metadata
-                existing = collection.get(where={"key": key})
-                if existing and existing['ids']:
-                    # Delete existing
-                    collection.delete(ids=existing['ids'])
-                    # print(f"Updated existing profile entry for '{key}'")
-
-            except Exception as e:
-                print(f"Error checking existing profile info: {e}")
+            # The key-value table is the source of truth. Facts are stored under the key given;
+            # aliases only apply to lookups, so "city" and "location" stay separate facts.
+            timestamp = datetime.datetime.now().isoformat()
+            key = self.store.set(key, value, category, timestamp)
+
+            # Keep a vector copy for fuzzy questions that don't name a known key
+            if self.vectorstore:
+                meta = {
+                    "key": key,
+                    "value": value,
+                    "category": category,
+                    "timestamp": timestamp,
+                    "type": "user_profile_attribute"
+                }
+                content = f"User's {key} is {value}. (Category: {category})"
+                try:
+                    # Drop legacy random-id documents stored under any spelling of this key
+                    # ("Favorite Color", "favorite color"...) before the deterministic upsert
+                    collection = self.vectorstore._collection
+                    doc_id = content_id("profile", key)
+                    existing = collection.get(where={"type": "user_profile_attribute"}, include=["metadatas"])
+                    stale = [
+                        i for i, m in zip(existing.get("ids", []), existing.get("metadatas", []))
+                        if i != doc_id and normalize_key((m or {}).get("key", "")) == key
+                    ]
+                    if stale:
+                        collection.delete(ids=stale)
+                    self.vectorstore.add_documents([Document(page_content=content, metadata=meta)], ids=[doc_id])
+                except Exception as e:
+                    print(f"Error updating profile vector index: {e}")
 
-            meta = {
-                "key": key,
-                "category": category,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "type": "user_profile_attribute"
-            }
-            
-            # Content is structured for semantic search
-            # Crucially, we must include the value in a way that retrieval for "wife's name" works.
-            # If key is "wife" and value is "Xueqing Pan", content "wife: Xueqing Pan" works.
-            # But if key is obscure, it might fail.
-            content = f"User's {key} is {value}. (Category: {category})"
-            
-            self.vectorstore.add_documents([Document(page_content=content, metadata=meta)])
             return f"✅ Personal info updated: {key} = {value}"
 
         @tool
@@ -111,26 +140,46 @@ class ProfileSkill(Skill):
             Retrieve personal information about the user based on a query.
             Use this when the user asks "what is my location?" or "do you know my name?".
             Args:
-                query: The question or keyword to search for (e.g., "location", "my address").
+                query: The attribute name or question to look up (e.g., "location", "my address").
             """
+            # Exact key or alias: O(1), no embedding call
+            entry = self.store.get(query)
+            if entry:
+                return f"Here is what I found in your profile:\nUser's {entry['key']} is {entry['value']}. (Category: {entry['category']})"
+
             if not self.vectorstore:
-                return "Profile system not initialized."
+                if not len(self.store):
+                    return "Your profile is empty."
+                return f"I don't have any information about '{query}' in your profile."
 
             try:
-                # Similarity search
-                # Increase k to catch more context if multiple attributes match "wife"
+                # Fall back to similarity search for questions that don't name a known key
                 docs = self.vectorstore.similarity_search(query, k=5)
                 if not docs:
                     return f"I don't have any information about '{query}' in your profile."
-                
+
                 results = []
                 for doc in docs:
                     # Return the full sentence we stored
                     results.append(doc.page_content)
-                
+
                 return "Here is what I found in your profile:\n" + "\n".join(results)
 
             except Exception as e:
                 return f"Error retrieving personal info: {e}"
 
-        return [set_personal_info, get_personal_info]
+        @tool
+        def list_personal_info() -> str:
+            """
+            List everything stored in the user's profile.
+            """
+            entries = self.store.entries()
+            if not entries:
+                return "Your profile is empty."
+
+            output = ["Your profile:"]
+            for key, entry in sorted(entries.items()):
+                output.append(f"- {key}: {entry['value']} ({entry.get('category', 'general')})")
+            return "\n".join(output)
+
+        return [set_personal_info, get_personal_info, list_personal_info]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cache skill check: an item still waiting in the ingest queue (not yet embedded)
+shows up in list_cache and can be opened with get_cache_item.
+
+Runs against a temporary data directory with an empty collection standing in
+for Chroma, and the queue worker held back, so no embedding call is made.
+
+Usage:
+    python skills/test_cache.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Replace this script's directory: skills/email would shadow the standard library's email package
+sys.path[0] = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from core.paths import paths
+
+
+class EmptyCollection:
+    """A collection where nothing has been committed yet."""
+
+    name = "user_cache"
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        return {"ids": [], "documents": [], "metadatas": []}
+
+
+class PendingVectorStore:
+    _collection = EmptyCollection()
+
+
+def check(label, condition):
+    print(f"{'PASS' if condition else 'FAIL'}: {label}")
+    return condition
+
+
+def main():
+    home = tempfile.mkdtemp(prefix="cache-test-")
+    paths.config_dir = os.path.join(home, "configs")
+    paths.data_dir = os.path.join(home, "data")
+
+    from skills.cache import CacheSkill
+
+    ok = True
+    try:
+        skill = CacheSkill()
+        skill.vectorstore = PendingVectorStore()
+        # Keep the item queued: the worker would otherwise embed and commit it
+        skill.ingest_queue.start = lambda: None
+        tools = {t.name: t for t in skill.get_tools()}
+
+        result = tools["cache_content"].invoke({
+            "content": "Queued body text",
+            "content_type": "article",
+            "title": "Queued article",
+            "url": "https://example.com/queued",
+        })
+        ok &= check("item queued", result.startswith("✅") and len(skill.ingest_queue) == 1)
+
+        listing = tools["list_cache"].invoke({})
+        ok &= check("queued item listed", "Queued article" in listing)
+
+        item = tools["get_cache_item"].invoke({"index": 1})
+        ok &= check("queued item readable", "Queued article" in item and "Queued body text" in item)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
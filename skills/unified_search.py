@@ -0,0 +1,151 @@
+from typing import Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.tools import tool, BaseTool
+from .base import Skill
+from core.keyword_index import hybrid_search, reciprocal_rank_fusion
+
+
+class UnifiedSearchSkill(Skill):
+    """Searches notes, bookmarks, cached content and archived emails in one tool call."""
+
+    # Skill name -> label shown next to each hit
+    SOURCE_LABELS = {
+        "Memory & Notes": "Note",
+        "Bookmarks": "Bookmark",
+        "Cache": "Cache",
+        "Email Manager": "Email",
+    }
+
+    def __init__(self, skills: List[Skill]):
+        super().__init__()
+        self.sources = [s for s in skills if s.name in self.SOURCE_LABELS]
+
+    @property
+    def name(self) -> str:
+        return "Unified Search"
+
+    @property
+    def description(self) -> str:
+        return "Searches all personal stores (notes, bookmarks, cache, emails) at once."
+
+    def _vectorstore(self, skill: Skill):
+        # The email store is created lazily
+        if hasattr(skill, "_get_vectorstore"):
+            return skill._get_vectorstore()
+        return skill.vectorstore
+
+    def _embed_queries(self, query: str, stores: List[Tuple[Skill, Any]]) -> Dict[Tuple, List[float]]:
+        """Embed the query once per distinct embedding model in use."""
+        embeddings = {}
+        for skill, vectorstore in stores:
+            model = getattr(skill, "embeddings", None)
+            if vectorstore is None or model is None:
+                continue
+            key = self._model_key(model)
+            if key not in embeddings:
+                embeddings[key] = model.embed_query(query)
+        return embeddings
+
+    @staticmethod
+    def _model_key(model) -> Tuple:
+        return (type(model).__name__, getattr(model, "model", None), getattr(model, "dimensions", None))
+
+    def _format_hit(self, label: str, doc) -> str:
+        meta = doc.metadata
+        if label == "Bookmark":
+            desc = "No description"
+            for line in doc.page_content.split("\n"):
+                if line.startswith("Description:"):
+                    desc = line.replace("Description:", "").strip()
+                    break
+            return f"{meta.get('url', 'No URL')} - {desc}"
+        if label == "Cache":
+            source = meta.get("source", "")
+            title = meta.get("title") or "No Title"
+            return f"{title} ({source})" if source else title
+        if label == "Email":
+            return f"From: {meta.get('sender')} | Subject: {meta.get('subject')} | Date: {meta.get('date')}"
+        ts = meta.get("timestamp", "")[:16].replace("T", " ")
+        snippet = doc.page_content.replace("\n", " ")
+        if len(snippet) > 200:
+            snippet = snippet[:200] + "..."
+        return f"[{ts}] {snippet}" if ts else snippet
+
+    def get_tools(self) -> List[BaseTool]:
+
+        @tool
+        def search_everything(query: str, limit: int = 8, mode: str = "hybrid") -> str:
+            """
+            Search notes, bookmarks, cached content and archived emails at once, e.g. "what did I save about the Sydney trip".
+            Prefer this over calling search_notes, search_bookmarks, search_cache and search_emails one by one.
+            Args:
+                query: The search query.
+                limit: Maximum number of merged results (default: 8).
+                mode: "hybrid" (default), "keyword" for exact terms such as invoice numbers or URLs (no embedding call), or "semantic".
+            """
+            stores = [(skill, self._vectorstore(skill) if mode != "keyword" else skill.vectorstore) for skill in self.sources]
+            if not any(vs is not None or getattr(skill, "keyword_index", None) is not None for skill, vs in stores):
+                return "No personal stores are initialized. Check OPENAI_API_KEY."
+
+            try:
+                query_embeddings = self._embed_queries(query, stores) if mode != "keyword" else {}
+            except Exception as e:
+                return f"Error embedding query: {e}"
+
+            def search_one(skill, vectorstore):
+                model = getattr(skill, "embeddings", None)
+                embedding = query_embeddings.get(self._model_key(model)) if model is not None else None
+                return hybrid_search(
+                    vectorstore,
+                    getattr(skill, "keyword_index", None),
+                    query,
+                    k=limit,
+                    mode=mode,
+                    embedding=embedding,
+                    quantized=getattr(skill, "quantized_index", None)
+                )
+
+            with ThreadPoolExecutor(max_workers=len(stores) or 1) as pool:
+                futures = [(skill, pool.submit(search_one, skill, vs)) for skill, vs in stores]
+
+            rankings = []
+            hits: Dict[str, Tuple[str, Any]] = {}
+            errors = []
+            for skill, future in futures:
+                label = self.SOURCE_LABELS[skill.name]
+                try:
+                    docs = future.result()
+                except Exception as e:
+                    errors.append(f"{label}: {e}")
+                    continue
+                ranking = []
+                for doc in docs:
+                    # Emails are stored as chunks; rank each email once, by its best chunk
+                    doc_key = doc.metadata.get("message_id") if label == "Email" and "chunk" in doc.metadata else doc.id
+                    key = f"{label}:{doc_key or doc.page_content}"
+                    if key in hits:
+                        continue
+                    hits[key] = (label, doc)
+                    ranking.append(key)
+                rankings.append(ranking)
+
+                # Search hits count as accesses for cache eviction
+                if hasattr(skill, "evictor"):
+                    skill.evictor.touch([doc.id for doc in docs if doc.id])
+
+            fused = reciprocal_rank_fusion(rankings)[:limit]
+            if not fused:
+                message = f"Nothing found for '{query}' in notes, bookmarks, cache or emails."
+                if errors:
+                    message += "\nErrors: " + "; ".join(errors)
+                return message
+
+            output = [f"Found {len(fused)} results for '{query}':"]
+            for i, (key, _) in enumerate(fused, 1):
+                label, doc = hits[key]
+                output.append(f"{i}. [{label}] {self._format_hit(label, doc)}")
+            if errors:
+                output.append("\nSome stores could not be searched: " + "; ".join(errors))
+            return "\n".join(output)
+
+        return [search_everything]
@@ -1,12 +1,83 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import requests
 import re
+import os
+import json
+import time
+import threading
 from langchain_core.tools import tool, BaseTool
 from .base import Skill
+from core.paths import paths
+
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+# (connect, read) timeouts for Open-Meteo requests
+HTTP_TIMEOUT = (5, 10)
+# Place coordinates do not change; re-resolve occasionally in case the geocoder improves
+GEOCODE_TTL = 90 * 86400
+# Open-Meteo refreshes current conditions every 15 minutes
+FORECAST_TTL = 10 * 60
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session for all weather requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
+
+class GeocodeCache:
+    """Persistent cache of resolved locations keyed by the parsed (city, state, postcode)."""
+
+    def __init__(self, cache_file: str, ttl: float = GEOCODE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "r") as f:
+                    self._entries = json.load(f)
+            except Exception:
+                self._entries = {}
+
+    @staticmethod
+    def key(city: str, state: Optional[str], postcode: Optional[str]) -> str:
+        return "|".join((part or "").strip().lower() for part in (city, state, postcode))
+
+    def get(self, city: str, state: Optional[str], postcode: Optional[str]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(self.key(city, state, postcode))
+        if entry is None or time.time() - entry["cached_at"] >= self.ttl:
+            return None
+        return entry["location"]
+
+    def put(self, city: str, state: Optional[str], postcode: Optional[str], location: Dict[str, Any]):
+        keep = ("name", "latitude", "longitude", "admin1", "country", "timezone")
+        with self._lock:
+            self._entries[self.key(city, state, postcode)] = {
+                "location": {k: location[k] for k in keep if k in location},
+                "cached_at": time.time()
+            }
+            try:
+                tmp_file = self.cache_file + ".tmp"
+                with open(tmp_file, "w") as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_file, self.cache_file)
+            except Exception as e:
+                print(f"Warning: Failed to save geocode cache: {e}")
+
 
 class WeatherSkill(Skill):
     def __init__(self):
         super().__init__()
+        self.geocode_cache = GeocodeCache(os.path.join(paths.get_skill_data_dir("weather"), "geocode_cache.json"))
+        # (rounded lat, lon) -> (fetched_at, current conditions)
+        self._forecasts: Dict[Tuple[float, float], Tuple[float, Dict[str, Any]]] = {}
 
     @property
     def name(self) -> str:
@@ -85,6 +156,55 @@ class WeatherSkill(Skill):
 
         return score
 
+    def _geocode(self, name: str) -> List[Dict]:
+        resp = get_http_session().get(
+            GEOCODE_URL, params={"name": name, "count": 20, "language": "en", "format": "json"}, timeout=HTTP_TIMEOUT
+        )
+        resp.raise_for_status()
+        return resp.json().get("results") or []
+
+    def _resolve_location(self, query: str) -> Optional[Dict]:
+        """Best geocoding match for a location query, from the cache when known."""
+        target_city, target_state, target_postcode = self._parse_location_query(query)
+        location = self.geocode_cache.get(target_city, target_state, target_postcode)
+        if location is not None:
+            return location
+
+        # Get more results to choose from
+        locations = self._geocode(target_city) if target_city else []
+        if not locations and target_city != query:
+            # Try with original query if parsing stripped too much
+            locations = self._geocode(query)
+        if not locations:
+            return None
+
+        # Score locations and pick the best match
+        location = max(locations, key=lambda loc: self._score_location_match(loc, target_city, target_state))
+        self.geocode_cache.put(target_city, target_state, target_postcode, location)
+        return location
+
+    def _current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Current conditions at a point, reused for FORECAST_TTL seconds."""
+        key = (round(lat, 2), round(lon, 2))
+        cached = self._forecasts.get(key)
+        if cached and time.time() - cached[0] < FORECAST_TTL:
+            return cached[1]
+        resp = get_http_session().get(
+            FORECAST_URL,
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+                "temperature_unit": "celsius",
+                "wind_speed_unit": "kmh"
+            },
+            timeout=HTTP_TIMEOUT
+        )
+        resp.raise_for_status()
+        current = resp.json().get("current", {})
+        self._forecasts[key] = (time.time(), current)
+        return current
+
     def get_tools(self) -> List[BaseTool]:
         @tool
         def get_weather(city: str) -> str:
@@ -94,34 +214,10 @@ class WeatherSkill(Skill):
                 city: The name of the city (e.g., "London", "Tokyo", "Oatlands NSW 2117").
             """
             try:
-                # Parse the query to extract city, state, postcode
-                target_city, target_state, target_postcode = self._parse_location_query(city)
-
-                # 1. Geocoding - get more results to choose from
-                geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={target_city}&count=20&language=en&format=json"
-                geo_resp = requests.get(geo_url)
-                geo_data = geo_resp.json()
-
-                if not geo_data.get("results"):
-                    # Try with original query if parsing stripped too much
-                    if target_city != city:
-                        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=20&language=en&format=json"
-                        geo_resp = requests.get(geo_url)
-                        geo_data = geo_resp.json()
-
-                    if not geo_data.get("results"):
-                        return f"I couldn't find the location '{city}'."
-
-                # Score and sort locations to find the best match
-                locations = geo_data["results"]
-                scored_locations = [
-                    (loc, self._score_location_match(loc, target_city, target_state))
-                    for loc in locations
-                ]
-                scored_locations.sort(key=lambda x: x[1], reverse=True)
-
-                # Pick the best match
-                location = scored_locations[0][0]
+                location = self._resolve_location(city)
+                if location is None:
+                    return f"I couldn't find the location '{city}'."
+
                 lat = location["latitude"]
                 lon = location["longitude"]
                 name = location["name"]
@@ -135,12 +231,7 @@ class WeatherSkill(Skill):
                 location_parts.append(country)
                 display_location = ", ".join(location_parts)
 
-                # 2. Weather
-                weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m&temperature_unit=celsius&wind_speed_unit=kmh"
-                weather_resp = requests.get(weather_url)
-                weather_data = weather_resp.json()
-
-                current = weather_data.get("current", {})
+                current = self._current_weather(lat, lon)
                 temp = current.get("temperature_2m")
                 humidity = current.get("relative_humidity_2m")
                 wind = current.get("wind_speed_10m")